@@ -1,7 +1,15 @@
 import argparse
+import collections
+import itertools
+import json
 import logging
+import os
+import queue
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import bpy
 
 logging.basicConfig(level=logging.INFO)
@@ -11,6 +19,18 @@ ROOT_FROM_ID_TYPE = {
     'ACTION': 'actions',
 }
 
+# Prefix of the worker stdout lines carrying a response, the other lines being Blender logs
+WORKER_MESSAGE_MARKER = "ASSET_EDITOR_WORKER:"
+# Delay (in seconds) without request after which the worker exits, it is started again on the next edit
+WORKER_IDLE_TIMEOUT = 600.0
+# Delays (in seconds) to wait for a worker to answer a health check, and to save an edited file
+WORKER_PING_TIMEOUT = 30.0
+WORKER_EDIT_TIMEOUT = 300.0
+# Number of the last worker stderr lines kept, reported when the worker fails
+WORKER_STDERR_TAIL_LINES = 20
+# Default number of workers of a batch edit, each one being a background Blender session
+BATCH_EDIT_MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+
 
 def _get_extra_args():
     """ Get Blender extra args
@@ -35,19 +55,42 @@ def _parse_args():
     """
     parser = argparse.ArgumentParser()
 
+    parser.add_argument(
+        "--serve",
+        help="Run as a persistent worker, reading edit requests as JSON lines from stdin",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--jobs",
+        help="JSON file listing the asset edits of a batch edit",
+        type=str,
+    )
+
+    parser.add_argument(
+        "--workers",
+        help="Number of background Blender workers of a batch edit",
+        type=int,
+        default=BATCH_EDIT_MAX_WORKERS
+    )
+
+    parser.add_argument(
+        "--results",
+        help="JSON file to write the batch edit results to",
+        type=str,
+    )
+
     parser.add_argument(
         "--asset-id-type",
         help="Asset type to edit within the blender file",
         type=str,
         choices=ROOT_FROM_ID_TYPE.keys(),
-        required=True
     )
 
     parser.add_argument(
         "--asset-name",
         help="Asset name to edit within the blender file",
         type=str,
-        required=True
     )
 
     parser.add_argument(
@@ -59,6 +102,8 @@ def _parse_args():
         metavar=('path','value')
     )
     args, _ = parser.parse_known_args(_get_extra_args())
+    if not args.serve and not args.jobs and (args.asset_id_type is None or args.asset_name is None):
+        parser.error("--asset-id-type and --asset-name are required")
     return args
 
 
@@ -137,6 +182,311 @@ def set_local_asset_properties(
         )
 
 
+def edit_asset_file(
+        asset_filepath: str,
+        asset_edits: list[dict]
+    ) -> list[dict]:
+    """ Open an asset file, set the properties of some of its assets and save the file
+
+    Args:
+        asset_filepath (str): Asset filepath to edit
+        asset_edits (list[dict]): The edits of the file assets, with an "asset_name", an "id_type" and "properties"
+
+    Returns:
+        list[dict]: The result of each asset edit, with a "status" ("ok" or "failed") and an "error" if failed
+    """
+    bpy.ops.wm.open_mainfile(filepath=asset_filepath, load_ui=False)
+    results = []
+    for asset_edit in asset_edits:
+        result = {"asset_name": asset_edit["asset_name"], "status": "ok"}
+        try:
+            id_root = getattr(bpy.data, ROOT_FROM_ID_TYPE.get(asset_edit["id_type"], ""), None)
+            if id_root is None or id_root.get(asset_edit["asset_name"]) is None:
+                raise ValueError(f"Asset {asset_edit['asset_name']} not found in {asset_filepath}")
+            set_local_asset_properties(asset_edit["asset_name"], asset_edit["id_type"], asset_edit["properties"])
+        except Exception as e:
+            result.update(status="failed", error=str(e))
+        results.append(result)
+
+    if any(result["status"] == "ok" for result in results):
+        bpy.ops.wm.save_mainfile()
+    return results
+
+
+# Messages are sent by the requests reading thread too
+_send_lock = threading.Lock()
+
+
+def _send_message(message: dict):
+    with _send_lock:
+        print(f"{WORKER_MESSAGE_MARKER}{json.dumps(message)}", flush=True)
+
+
+def _read_requests(requests: queue.Queue):
+    """ Read the worker requests from stdin, until it is closed by the add-on session
+
+        Malformed requests are answered with an error, without an id since it can't be read.
+    """
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a JSON object is expected")
+        except ValueError as e:
+            logging.error(f"Invalid asset editor request: {e}")
+            _send_message({"id": None, "status": "failed", "error": f"Invalid request: {e}"})
+            continue
+        requests.put(request)
+    requests.put(None)
+
+
+def run_worker(idle_timeout: float = WORKER_IDLE_TIMEOUT):
+    """ Serve edit requests until stdin is closed, a stop request is received, or no request came for a while
+
+    Requests and responses are JSON lines, with an id matching a response to its request. Requests are read by a
+    thread, the edits run in the main thread.
+
+    Args:
+        idle_timeout (float, optional): Delay (in seconds) without request before exiting. Defaults to WORKER_IDLE_TIMEOUT.
+    """
+    requests = queue.Queue()
+    threading.Thread(target=_read_requests, args=(requests,), daemon=True).start()
+    _send_message({"id": None, "status": "ready"})
+    while True:
+        try:
+            request = requests.get(timeout=idle_timeout)
+        except queue.Empty:
+            logging.info("Asset editor worker idle, exiting")
+            return
+        if request is None or request.get("command") == "stop":
+            return
+
+        response = {"id": request.get("id"), "status": "ok"}
+        if request.get("command") == "edit":
+            try:
+                response["assets"] = edit_asset_file(request["filepath"], request["assets"])
+                failed_assets = [result for result in response["assets"] if result["status"] != "ok"]
+                if failed_assets:
+                    response.update(status="failed", error="; ".join(result["error"] for result in failed_assets))
+            except Exception as e:
+                response.update(status="failed", error=str(e))
+            if response["status"] != "ok":
+                logging.error(f"Can't edit {request.get('filepath')}: {response['error']}")
+        elif request.get("command") != "ping":
+            response.update(status="failed", error=f"Unknown command {request.get('command')}")
+        _send_message(response)
+
+
+class AssetEditorWorkerError(RuntimeError):
+    pass
+
+
+class AssetEditorWorker():
+    """ Persistent background Blender session editing shared asset files
+
+        The session is started on the first request, and kept alive between requests so an edit only costs the file
+        input/output. It exits by itself after WORKER_IDLE_TIMEOUT seconds without request, and is started again when
+        needed. Requests are sent one at a time.
+    """
+    def __init__(self):
+        self._process: subprocess.Popen = None
+        self._responses: queue.Queue = None
+        self._stderr_lines: collections.deque = None
+        self._stderr_reader: threading.Thread = None
+        self._request_ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def _read_responses(self, process: subprocess.Popen, responses: queue.Queue):
+        for line in process.stdout:
+            if line.startswith(WORKER_MESSAGE_MARKER):
+                responses.put(json.loads(line[len(WORKER_MESSAGE_MARKER):]))
+            else:
+                logging.debug(f"Asset editor worker: {line.rstrip()}")
+        # The worker exited
+        responses.put(None)
+
+    def _read_stderr(self, process: subprocess.Popen, stderr_lines: collections.deque):
+        for line in process.stderr:
+            stderr_lines.append(line.rstrip())
+
+    def _get_stderr_tail(self) -> str:
+        """ Get the last lines the worker wrote to stderr, to report them with its errors
+        """
+        if self._stderr_reader is not None:
+            # Let the reader catch up with an exiting worker
+            self._stderr_reader.join(timeout=1.0)
+        if not self._stderr_lines:
+            return ""
+        return "\n" + "\n".join(self._stderr_lines)
+
+    def _start(self):
+        args = [
+            bpy.app.binary_path,
+            "--factory-startup",
+            "--background",
+            "--python", f"{__file__}",
+            "--",
+            "--serve",
+        ]
+        logging.info(f"Starting asset editor worker: {' '.join(args)}")
+        self._process = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        self._responses = queue.Queue()
+        threading.Thread(
+            target=self._read_responses,
+            args=(self._process, self._responses),
+            daemon=True
+        ).start()
+        # Only the tail of stderr is kept, for the error reports
+        self._stderr_lines = collections.deque(maxlen=WORKER_STDERR_TAIL_LINES)
+        self._stderr_reader = threading.Thread(
+            target=self._read_stderr,
+            args=(self._process, self._stderr_lines),
+            daemon=True
+        )
+        self._stderr_reader.start()
+
+    def _request(self, message: dict, timeout: float) -> dict:
+        request_id = next(self._request_ids)
+        try:
+            self._process.stdin.write(json.dumps(dict(message, id=request_id)) + "\n")
+            self._process.stdin.flush()
+        except OSError as e:
+            raise AssetEditorWorkerError(f"Asset editor worker is not reachable: {e}{self._get_stderr_tail()}")
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                response = self._responses.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                self.stop()
+                raise AssetEditorWorkerError(
+                    f"Asset editor worker didn't answer in {timeout}s{self._get_stderr_tail()}"
+                )
+            if response is None:
+                raise AssetEditorWorkerError(f"Asset editor worker exited{self._get_stderr_tail()}")
+            # Skip the ready message, and the responses of timed out requests
+            if response.get("id") == request_id:
+                return response
+
+    def _ensure_started(self):
+        """ Start the worker if it is not running, or doesn't answer the health check
+        """
+        if self.is_alive():
+            try:
+                self._request({"command": "ping"}, WORKER_PING_TIMEOUT)
+                return
+            except AssetEditorWorkerError as e:
+                logging.warning(f"Restarting asset editor worker: {e}")
+                self.stop()
+        self._start()
+        self._request({"command": "ping"}, WORKER_PING_TIMEOUT)
+
+    def ping(self) -> bool:
+        """ Check if the worker is running and answers requests
+        """
+        with self._lock:
+            if not self.is_alive():
+                return False
+            try:
+                self._request({"command": "ping"}, WORKER_PING_TIMEOUT)
+            except AssetEditorWorkerError:
+                return False
+            return True
+
+    def edit_file(
+            self,
+            asset_filepath: str,
+            asset_edits: list[dict]
+        ) -> dict:
+        """ Edit assets of a shared file in the worker, starting it if needed. The file is saved once.
+
+        Args:
+            asset_filepath (str): Asset filepath to edit
+            asset_edits (list[dict]): The edits of the file assets, with an "asset_name", an "id_type" and "properties"
+
+        Returns:
+            dict: The worker response, with a "status" ("ok" or "failed"), an "error" if failed, and the result of
+                each asset edit in "assets"
+        """
+        message = {
+            "command": "edit",
+            "filepath": asset_filepath,
+            "assets": [
+                dict(asset_edit, properties=[list(item) for item in asset_edit["properties"]])
+                for asset_edit in asset_edits
+            ],
+        }
+        with self._lock:
+            try:
+                self._ensure_started()
+                return self._request(message, WORKER_EDIT_TIMEOUT)
+            except AssetEditorWorkerError as e:
+                # The worker may have exited while idle, retry once with a new one
+                logging.warning(f"Retrying asset edit with a new worker: {e}")
+                self.stop()
+                self._ensure_started()
+                return self._request(message, WORKER_EDIT_TIMEOUT)
+
+    def edit(
+            self,
+            asset_filepath: str,
+            asset_name: str,
+            id_type: str,
+            properties: list[tuple[str, str]]
+        ) -> dict:
+        """ Edit a shared asset file in the worker, starting it if needed
+
+        Args:
+            asset_filepath (str): Asset filepath to edit
+            asset_name (str): Asset name to edit within the blender file
+            id_type (str): Asset type to edit within the blender file
+            properties (list[tuple[str, str]]): Asset properties to edit within the blender file
+
+        Returns:
+            dict: The worker response, with a "status" ("ok" or "failed") and an "error" if failed
+        """
+        return self.edit_file(
+            asset_filepath,
+            [{"asset_name": asset_name, "id_type": id_type, "properties": properties}]
+        )
+
+    def stop(self):
+        if self._process is None:
+            return
+        if self._process.poll() is None:
+            try:
+                self._process.stdin.write(json.dumps({"command": "stop"}) + "\n")
+                self._process.stdin.close()
+                self._process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+        self._process = None
+        self._responses = None
+
+
+# Worker of the add-on session, started on the first shared asset edit
+_asset_editor_worker = AssetEditorWorker()
+
+
+def stop_worker():
+    """ Stop the worker of the add-on session, if running
+    """
+    _asset_editor_worker.stop()
+
+
 def set_shared_asset_properties(
         asset_filepath: str,
         asset_name: str,
@@ -145,35 +495,115 @@ def set_shared_asset_properties(
     ):
     """ Set a shared asset properties
 
+    The file is edited by the persistent background worker of the session.
+
     Args:
         asset_filepath (str): Asset filepath to edit
         asset_name (str): Asset name to edit within the blender file
         id_type (str): Asset type to edit within the blender file
         properties (list[tuple[str, str]]): Asset properties to edit within the blender file
+
+    Returns:
+        dict: The worker response, with a "status" ("ok" or "failed") and an "error" if failed
     """
-    args = [
-        bpy.app.binary_path,
-        asset_filepath,
-        "--factory-startup",
-        "--background",
-        "--python", f"{__file__}",
-        "--",
-        "--asset-id-type", id_type,
-        "--asset-name", asset_name,
-    ]
+    logging.info(f"Editing {asset_name} in {asset_filepath}")
+    try:
+        response = _asset_editor_worker.edit(asset_filepath, asset_name, id_type, properties)
+    except AssetEditorWorkerError as e:
+        response = {"status": "failed", "error": str(e)}
+    if response["status"] != "ok":
+        logging.error(f"Can't edit {asset_name} in {asset_filepath}: {response.get('error')}")
+    return response
 
-    for property_path, property_value in properties:
-        args.extend(["--property", property_path, property_value])
-    
-    logging.info(f"Running command: {' '.join(args)}")
+def _edit_file_in_pool(workers: queue.Queue, asset_filepath: str, asset_edits: list[dict]) -> dict:
+    worker = workers.get()
+    try:
+        response = worker.edit_file(asset_filepath, asset_edits)
+    except AssetEditorWorkerError as e:
+        response = {"status": "failed", "error": str(e)}
+    finally:
+        workers.put(worker)
+    return {
+        "filepath": asset_filepath,
+        "status": response["status"],
+        "error": response.get("error"),
+        "assets": response.get("assets", []),
+    }
+
+
+def run_batch_edit(jobs: list[dict], max_workers: int = BATCH_EDIT_MAX_WORKERS) -> list[dict]:
+    """ Edit many shared assets, on a pool of background workers
+
+    The jobs are grouped by file, each file being opened and saved once by one of the workers.
+
+    Args:
+        jobs (list[dict]): The asset edits, with a "filepath", an "asset_name", an "id_type" and "properties"
+        max_workers (int, optional): Maximum number of workers. Defaults to BATCH_EDIT_MAX_WORKERS.
+
+    Returns:
+        list[dict]: The result of each file, with a "filepath", a "status" ("ok" or "failed"), an "error" if failed,
+            and the result of each asset edit in "assets"
+    """
+    edits_by_file: dict[str, list[dict]] = {}
+    for job in jobs:
+        properties = job["properties"]
+        if isinstance(properties, dict):
+            properties = list(properties.items())
+        edits_by_file.setdefault(job["filepath"], []).append({
+            "asset_name": job["asset_name"],
+            "id_type": job.get("id_type", "ACTION"),
+            "properties": properties,
+        })
+    if not edits_by_file:
+        return []
+
+    workers_count = max(1, min(max_workers, len(edits_by_file)))
+    workers = queue.Queue()
+    for _ in range(workers_count):
+        workers.put(AssetEditorWorker())
+    logging.info(f"Editing {len(jobs)} assets in {len(edits_by_file)} files with {workers_count} workers")
+
+    results = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers_count) as executor:
+            futures = [
+                executor.submit(_edit_file_in_pool, workers, asset_filepath, asset_edits)
+                for asset_filepath, asset_edits in edits_by_file.items()
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                if result["status"] != "ok":
+                    logging.error(f"Can't edit {result['filepath']}: {result['error']}")
+                results.append(result)
+    finally:
+        while not workers.empty():
+            workers.get().stop()
+    return results
+
+
+def _run_batch_edit_command(editing_args) -> int:
+    with open(editing_args.jobs, "r", encoding="utf-8") as jobs_file:
+        jobs = json.load(jobs_file)
+    results = run_batch_edit(jobs, editing_args.workers)
+    if editing_args.results:
+        with open(editing_args.results, "w", encoding="utf-8") as results_file:
+            json.dump(results, results_file, indent=4)
+
+    failed_files = [result for result in results if result["status"] != "ok"]
+    logging.info(f"{len(results) - len(failed_files)}/{len(results)} files edited")
+    return 1 if failed_files else 0
 
-    return subprocess.run(
-        args
-    )
 
 if __name__ == "__main__":
     editing_args = _parse_args()
 
+    if editing_args.serve:
+        run_worker()
+        sys.exit(0)
+
+    if editing_args.jobs:
+        sys.exit(_run_batch_edit_command(editing_args))
+
     for property_path, property_value in editing_args.property:
         set_local_asset_property(
             asset_name=editing_args.asset_name,
@@ -0,0 +1,554 @@
+""" Patch the asset metadata of .blend files in place, without Blender.
+
+    Small metadata edits (name, catalog, tags, author, description, custom string properties) are turned into byte
+    range replacements of the uncompressed file: fields are overwritten in their block, string blocks are replaced, and
+    new blocks (tags, strings) are inserted after the asset metadata block. The file is then written to a temporary file
+    renamed over the original one:
+        - uncompressed files are copied around the replaced ranges,
+        - zstd files only recompress the frames containing a replaced range, the other frames are copied as is,
+        - gzip files (written before Blender 3.0) are recompressed entirely.
+
+    The other edits raise BlendPatchUnsupported, the file has to be opened and saved by Blender to apply them.
+"""
+import bisect
+import gzip
+import os
+import re
+import shutil
+import struct
+import tempfile
+import uuid
+from dataclasses import dataclass
+
+from .blend_reader import (
+    BLOCK_CODE_DATA,
+    ID_TYPE_FROM_CODE,
+    IDP_STRING,
+    IDP_STRING_SUB_BYTE,
+    BHead,
+    BlendFile,
+    BlendFileError,
+    zstandard,
+)
+
+ZSTD_SKIPPABLE_FRAME_MAGIC = 0x184D2A5E
+ZSTD_SEEK_TABLE_MAGIC = 0x8F92EAB1
+# Frames count (uint32), flags (uint8) and magic (uint32) closing the seek table
+ZSTD_SEEK_TABLE_FOOTER_FORMAT = '<IBI'
+ZSTD_SEEK_TABLE_CHECKSUM_FLAG = 0x80
+ZSTD_COMPRESSION_LEVEL = 3
+GZIP_COMPRESSION_LEVEL = 1
+# Size (in bytes) of the chunks copied from the original file
+COPY_CHUNK_SIZE = 1 << 20
+# Distance between the old pointers given to the inserted blocks
+NEW_POINTER_STEP = 0x10
+
+ID_CODE_FROM_TYPE = {id_type: id_code for id_code, id_type in ID_TYPE_FROM_CODE.items()}
+# Asset metadata strings, stored in their own block
+ASSET_STRING_PROPERTIES = {
+    'asset_data.author': 'author',
+    'asset_data.description': 'description',
+    'asset_data.copyright': 'copyright',
+    'asset_data.license': 'license',
+}
+# Custom property of the asset metadata, e.g. asset_data["armature"]
+CUSTOM_PROPERTY_PATH = re.compile(r'^asset_data\[(["\'])(.+)\1\]$')
+
+
+class BlendPatchUnsupported(Exception):
+    pass
+
+
+@dataclass
+class BlendReplacement:
+    """Dataclass to store a byte range replacement of the uncompressed content of a .blend file.
+    """
+    offset: int
+    # Length of the replaced range, 0 for an insertion
+    length: int
+    data: bytes
+
+
+class BlendPatch:
+    """ Byte range replacements of a .blend file, located from its block index and structure description
+
+    Args:
+        blend_file (BlendFile): The file to patch
+    """
+    def __init__(self, blend_file: BlendFile):
+        self.blend_file = blend_file
+        self.replacements: list[BlendReplacement] = []
+        self._last_pointer = max(blend_file.block_by_pointer, default=0)
+
+    def new_pointer(self) -> int:
+        """ Get an old pointer used by none of the file blocks, to insert a block
+        """
+        self._last_pointer += NEW_POINTER_STEP
+        return self._last_pointer
+
+    def encode_pointer(self, pointer: int) -> bytes:
+        pointer_format = 'Q' if self.blend_file.pointer_size == 8 else 'I'
+        return struct.pack(f'{self.blend_file.byte_order}{pointer_format}', pointer)
+
+    def encode_int(self, struct_name: str, field_path: str, value: int) -> bytes:
+        struct_field = self.blend_file.sdna.get_field(struct_name, field_path)
+        int_format = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}[struct_field.size]
+        return struct.pack(f'{self.blend_file.byte_order}{int_format}', value)
+
+    def encode_char_array(self, struct_name: str, field_path: str, text: str) -> bytes:
+        struct_field = self.blend_file.sdna.get_field(struct_name, field_path)
+        data = text.encode('utf-8')
+        # Keep the null terminator
+        if len(data) >= struct_field.size:
+            raise BlendPatchUnsupported(f"'{text}' is too long for {struct_name}.{field_path}")
+        return data.ljust(struct_field.size, b'\0')
+
+    def pack_struct(self, struct_name: str, fields: dict[str, bytes]) -> bytes:
+        """ Get the data of a struct, from its encoded fields, the other ones being zeroed
+        """
+        data = bytearray(self.blend_file.sdna.get_struct_length(struct_name))
+        for field_path, value in fields.items():
+            struct_field = self.blend_file.sdna.get_field(struct_name, field_path)
+            data[struct_field.offset:struct_field.offset + len(value)] = value
+        return bytes(data)
+
+    def _replace(self, offset: int, length: int, data: bytes):
+        # A range replaced twice keeps the last data
+        self.replacements = [
+            replacement for replacement in self.replacements
+            if (replacement.offset, replacement.length) != (offset, length) or length == 0
+        ]
+        if length == 0 or self.blend_file.read_range(offset, length) != data:
+            self.replacements.append(BlendReplacement(offset, length, data))
+
+    def set_field(self, block: BHead, struct_name: str, field_path: str, data: bytes, base_offset: int = 0):
+        """ Overwrite a field of a block with encoded data
+        """
+        struct_field = self.blend_file.sdna.get_field(struct_name, field_path)
+        if len(data) != struct_field.size:
+            raise BlendPatchUnsupported(f"Invalid data size for {struct_name}.{field_path}")
+        self._replace(block.offset + base_offset + struct_field.offset, struct_field.size, data)
+
+    def set_pointer(self, block: BHead, struct_name: str, field_path: str, pointer: int, base_offset: int = 0):
+        self.set_field(block, struct_name, field_path, self.encode_pointer(pointer), base_offset)
+
+    def set_int(self, block: BHead, struct_name: str, field_path: str, value: int, base_offset: int = 0):
+        self.set_field(block, struct_name, field_path, self.encode_int(struct_name, field_path, value), base_offset)
+
+    def set_char_array(self, block: BHead, struct_name: str, field_path: str, text: str, base_offset: int = 0):
+        self.set_field(
+            block, struct_name, field_path, self.encode_char_array(struct_name, field_path, text), base_offset
+        )
+
+    def replace_block(self, block: BHead, data: bytes):
+        """ Replace the data of a block, keeping its old pointer
+        """
+        data = _align_block_data(data)
+        bhead_size = self.blend_file.bhead_size
+        self._replace(
+            block.offset - bhead_size,
+            bhead_size + block.length,
+            self.blend_file.pack_block_header(block, len(data)) + data
+        )
+
+    def insert_block(self, previous_block: BHead, struct_name: str, data: bytes, pointer: int = None) -> int:
+        """ Insert a data block after another block of the same ID
+
+        Args:
+            previous_block (BHead): The block to insert after, the data blocks following an ID block belonging to it
+            struct_name (str): The block struct, None for raw data such as strings
+            data (bytes): The block data
+            pointer (int, optional): The block old pointer. Defaults to a new pointer.
+
+        Returns:
+            int: The old pointer of the inserted block
+        """
+        if pointer is None:
+            pointer = self.new_pointer()
+        data = _align_block_data(data)
+        sdna_index = self.blend_file.sdna.struct_index_by_name[struct_name] if struct_name else 0
+        block = BHead(
+            code=BLOCK_CODE_DATA,
+            length=len(data),
+            old_pointer=pointer,
+            sdna_index=sdna_index,
+            count=1,
+            offset=0,
+        )
+        self._replace(
+            previous_block.offset + previous_block.length,
+            0,
+            self.blend_file.pack_block_header(block, len(data)) + data
+        )
+        return pointer
+
+
+def _align_block_data(data: bytes) -> bytes:
+    """ Pad block data to 4 bytes, as Blender writes it
+    """
+    return data + b'\0' * (-len(data) % 4)
+
+
+def _get_buuid_data(catalog_id: str, byte_order: str) -> bytes:
+    """ Convert a UUID string to a bUUID struct (uint32, uint16, uint16, 8 bytes)
+    """
+    try:
+        uuid_bytes = uuid.UUID(catalog_id).bytes
+    except ValueError:
+        raise BlendPatchUnsupported(f"Invalid catalog id {catalog_id}")
+    time_low, time_mid, time_hi_and_version = struct.unpack_from('>IHH', uuid_bytes)
+    return struct.pack(f'{byte_order}IHH', time_low, time_mid, time_hi_and_version) + uuid_bytes[8:]
+
+
+def _iter_list_blocks(blend_file: BlendFile, first_pointer: int, struct_name: str):
+    pointer = first_pointer
+    while pointer:
+        block = blend_file.block_by_pointer.get(pointer)
+        if block is None:
+            return
+        yield block
+        pointer = blend_file.sdna.read_pointer(blend_file.read_block(block), struct_name, 'next')
+
+
+def _set_asset_name(patch: BlendPatch, id_block: BHead, asset_name: str, new_name: str, taken_names: set[str]):
+    if new_name == asset_name:
+        return
+    if new_name in taken_names:
+        raise BlendPatchUnsupported(f"Another ID is named {new_name}")
+    patch.set_char_array(id_block, 'ID', 'name', id_block.code[:2].decode('ascii') + new_name)
+    taken_names.discard(asset_name)
+    taken_names.add(new_name)
+
+
+def _set_asset_tags(patch: BlendPatch, asset_block: BHead, asset_data: bytes, tag_names: list[str]):
+    """ Set the tags of an asset, reusing the existing tag blocks and inserting the missing ones
+    """
+    blend_file = patch.blend_file
+    sdna = blend_file.sdna
+    if len(set(tag_names)) != len(tag_names):
+        raise BlendPatchUnsupported("Duplicated tags are renamed by Blender")
+
+    first_tag_pointer = sdna.read_pointer(asset_data, 'AssetMetaData', 'tags.first')
+    tag_blocks = list(_iter_list_blocks(blend_file, first_tag_pointer, 'AssetTag'))
+    # Removed tag blocks are left unreferenced, Blender skips them when reading the file
+    pointers = [
+        tag_blocks[index].old_pointer if index < len(tag_blocks) else patch.new_pointer()
+        for index in range(len(tag_names))
+    ]
+    for index, tag_name in enumerate(tag_names):
+        fields = {
+            'next': patch.encode_pointer(pointers[index + 1] if index + 1 < len(pointers) else 0),
+            'prev': patch.encode_pointer(pointers[index - 1] if index > 0 else 0),
+            'name': patch.encode_char_array('AssetTag', 'name', tag_name),
+        }
+        if index < len(tag_blocks):
+            for field_path, value in fields.items():
+                patch.set_field(tag_blocks[index], 'AssetTag', field_path, value)
+        else:
+            patch.insert_block(asset_block, 'AssetTag', patch.pack_struct('AssetTag', fields), pointers[index])
+
+    patch.set_pointer(asset_block, 'AssetMetaData', 'tags.first', pointers[0] if pointers else 0)
+    patch.set_pointer(asset_block, 'AssetMetaData', 'tags.last', pointers[-1] if pointers else 0)
+    patch.set_int(asset_block, 'AssetMetaData', 'tot_tags', len(tag_names))
+    active_tag = sdna.read_int(asset_data, 'AssetMetaData', 'active_tag')
+    patch.set_int(asset_block, 'AssetMetaData', 'active_tag', min(active_tag, max(len(tag_names) - 1, 0)))
+
+
+def _set_asset_string(patch: BlendPatch, asset_block: BHead, asset_data: bytes, field_name: str, value: str):
+    sdna = patch.blend_file.sdna
+    if not sdna.has_field('AssetMetaData', field_name):
+        raise BlendPatchUnsupported(f"Asset metadata has no {field_name} in this Blender version")
+    data = value.encode('utf-8') + b'\0'
+    string_block = patch.blend_file.block_by_pointer.get(sdna.read_pointer(asset_data, 'AssetMetaData', field_name))
+    if string_block is not None:
+        patch.replace_block(string_block, data)
+    else:
+        pointer = patch.insert_block(asset_block, None, data)
+        patch.set_pointer(asset_block, 'AssetMetaData', field_name, pointer)
+
+
+def _set_asset_custom_string(patch: BlendPatch, asset_data: bytes, property_name: str, value: str):
+    """ Set an existing custom string property of an asset, other properties being created by Blender
+    """
+    blend_file = patch.blend_file
+    sdna = blend_file.sdna
+    property_block = None
+    group_data = blend_file.read_pointed_block(sdna.read_pointer(asset_data, 'AssetMetaData', 'properties'))
+    if group_data is not None:
+        first_pointer = sdna.read_pointer(group_data, 'IDProperty', 'data.group.first')
+        property_block = next(
+            (
+                block for block in _iter_list_blocks(blend_file, first_pointer, 'IDProperty')
+                if sdna.read_char_array(blend_file.read_block(block), 'IDProperty', 'name') == property_name
+            ),
+            None
+        )
+    if property_block is None:
+        raise BlendPatchUnsupported(f"Custom property {property_name} doesn't exist")
+
+    property_data = blend_file.read_block(property_block)
+    string_block = blend_file.block_by_pointer.get(sdna.read_pointer(property_data, 'IDProperty', 'data.pointer'))
+    if (
+        sdna.read_int(property_data, 'IDProperty', 'type') != IDP_STRING
+        or sdna.read_int(property_data, 'IDProperty', 'subtype') == IDP_STRING_SUB_BYTE
+        or string_block is None
+    ):
+        raise BlendPatchUnsupported(f"Custom property {property_name} is not a string")
+
+    data = value.encode('utf-8') + b'\0'
+    patch.replace_block(string_block, data)
+    patch.set_int(property_block, 'IDProperty', 'len', len(data))
+    patch.set_int(property_block, 'IDProperty', 'totallen', len(data))
+
+
+def _patch_asset(
+        patch: BlendPatch,
+        asset_name: str,
+        id_type: str,
+        properties: list[tuple[str, str]],
+        taken_names: dict[bytes, set[str]]
+    ):
+    blend_file = patch.blend_file
+    id_code = ID_CODE_FROM_TYPE.get(id_type)
+    id_block = blend_file.find_id_block(id_code, asset_name) if id_code is not None else None
+    if id_block is None:
+        raise BlendPatchUnsupported(f"Asset {asset_name} not found in {blend_file.filepath}")
+    asset_block = blend_file.block_by_pointer.get(
+        blend_file.sdna.read_pointer(blend_file.read_block(id_block), 'ID', 'asset_data')
+    )
+    if asset_block is None:
+        raise BlendPatchUnsupported(f"{asset_name} is not an asset")
+    asset_data = blend_file.read_block(asset_block)
+
+    for property_path, property_value in properties:
+        custom_property = CUSTOM_PROPERTY_PATH.match(property_path)
+        if property_path == 'name':
+            _set_asset_name(patch, id_block, asset_name, property_value, taken_names[id_code])
+        elif property_path == 'asset_data.catalog_id':
+            catalog_data = _get_buuid_data(property_value, blend_file.byte_order)
+            patch.set_field(asset_block, 'AssetMetaData', 'catalog_id', catalog_data)
+        elif property_path == 'asset_data.tags':
+            tag_names = property_value.split(',') if property_value else []
+            _set_asset_tags(patch, asset_block, asset_data, tag_names)
+        elif property_path in ASSET_STRING_PROPERTIES:
+            _set_asset_string(patch, asset_block, asset_data, ASSET_STRING_PROPERTIES[property_path], property_value)
+        elif custom_property is not None:
+            _set_asset_custom_string(patch, asset_data, custom_property.group(2), property_value)
+        else:
+            raise BlendPatchUnsupported(f"Property {property_path} can't be patched")
+
+
+def _get_content_size(blend_file: BlendFile) -> int:
+    """ Get the uncompressed size of the file, up to the end of its ENDB block
+    """
+    end_block = blend_file.blocks[-1]
+    return end_block.offset + end_block.length
+
+
+def _apply_replacements(data: bytes, data_offset: int, replacements: list[BlendReplacement]) -> bytes:
+    chunks = []
+    position = data_offset
+    for replacement in replacements:
+        chunks.append(data[position - data_offset:replacement.offset - data_offset])
+        chunks.append(replacement.data)
+        position = replacement.offset + replacement.length
+    chunks.append(data[position - data_offset:])
+    return b''.join(chunks)
+
+
+def _copy_range(source, output, length: int):
+    while length > 0:
+        chunk = source.read(min(length, COPY_CHUNK_SIZE))
+        if not chunk:
+            raise BlendFileError(f"{source.name} is truncated")
+        output.write(chunk)
+        length -= len(chunk)
+
+
+def _read_zstd_seek_table(filepath: str) -> list[tuple[int, int]]:
+    """ Read the seek table Blender appends to the zstd files, as a skippable frame
+
+    Returns:
+        list[tuple[int, int]]: The compressed and uncompressed size of each frame
+    """
+    footer_size = struct.calcsize(ZSTD_SEEK_TABLE_FOOTER_FORMAT)
+    with open(filepath, 'rb') as file:
+        file_size = file.seek(0, os.SEEK_END)
+        if file_size < footer_size + 8:
+            raise BlendPatchUnsupported(f"{filepath} has no zstd seek table")
+        file.seek(file_size - footer_size)
+        frames_count, flags, magic = struct.unpack(ZSTD_SEEK_TABLE_FOOTER_FORMAT, file.read(footer_size))
+        if magic != ZSTD_SEEK_TABLE_MAGIC or flags & ZSTD_SEEK_TABLE_CHECKSUM_FLAG:
+            raise BlendPatchUnsupported(f"{filepath} has no zstd seek table")
+
+        table_size = 8 * frames_count + footer_size
+        file.seek(file_size - table_size - 8)
+        frame_magic, frame_size = struct.unpack('<II', file.read(8))
+        if frame_magic != ZSTD_SKIPPABLE_FRAME_MAGIC or frame_size != table_size:
+            raise BlendPatchUnsupported(f"{filepath} has an invalid zstd seek table")
+        entries = struct.unpack(f'<{2 * frames_count}I', file.read(8 * frames_count))
+        frames = list(zip(entries[::2], entries[1::2]))
+    if sum(compressed_size for compressed_size, _ in frames) != file_size - table_size - 8:
+        raise BlendPatchUnsupported(f"{filepath} zstd seek table doesn't match its frames")
+    return frames
+
+
+def _write_zstd_seek_table(output, frames: list[tuple[int, int]]):
+    entries = b''.join(struct.pack('<II', compressed_size, size) for compressed_size, size in frames)
+    table = entries + struct.pack(ZSTD_SEEK_TABLE_FOOTER_FORMAT, len(frames), 0, ZSTD_SEEK_TABLE_MAGIC)
+    output.write(struct.pack('<II', ZSTD_SKIPPABLE_FRAME_MAGIC, len(table)) + table)
+
+
+def _write_zstd_file(blend_file: BlendFile, replacements: list[BlendReplacement], output):
+    """ Write a patched zstd file, recompressing only the frames containing a replacement
+    """
+    frames = _read_zstd_seek_table(blend_file.filepath)
+    frame_starts = [0]
+    compressed_offsets = [0]
+    for compressed_size, size in frames:
+        frame_starts.append(frame_starts[-1] + size)
+        compressed_offsets.append(compressed_offsets[-1] + compressed_size)
+    if frame_starts[-1] != _get_content_size(blend_file):
+        raise BlendPatchUnsupported(f"{blend_file.filepath} zstd seek table doesn't match its content")
+
+    # Consecutive frames containing the replacements, a replacement across frames merging them in one frame
+    frame_groups: list[tuple[int, int, list[BlendReplacement]]] = []
+    for replacement in replacements:
+        last_offset = max(replacement.offset + replacement.length - 1, replacement.offset)
+        first_frame = bisect.bisect_right(frame_starts, replacement.offset) - 1
+        last_frame = bisect.bisect_right(frame_starts, last_offset) - 1
+        if frame_groups and first_frame <= frame_groups[-1][1]:
+            group_first_frame, group_last_frame, group_replacements = frame_groups[-1]
+            frame_groups[-1] = (group_first_frame, max(group_last_frame, last_frame), group_replacements)
+            group_replacements.append(replacement)
+        else:
+            frame_groups.append((first_frame, last_frame, [replacement]))
+
+    compressor = zstandard.ZstdCompressor(level=ZSTD_COMPRESSION_LEVEL)
+    new_frames = []
+    frame_index = 0
+    with open(blend_file.filepath, 'rb') as source:
+        for first_frame, last_frame, group_replacements in frame_groups + [(len(frames), None, None)]:
+            # Copy the unchanged frames as is
+            source.seek(compressed_offsets[frame_index])
+            _copy_range(source, output, compressed_offsets[first_frame] - compressed_offsets[frame_index])
+            new_frames.extend(frames[frame_index:first_frame])
+            if group_replacements is None:
+                break
+
+            group_start = frame_starts[first_frame]
+            group_data = blend_file.read_range(group_start, frame_starts[last_frame + 1] - group_start)
+            frame_data = _apply_replacements(group_data, group_start, group_replacements)
+            compressed_frame = compressor.compress(frame_data)
+            output.write(compressed_frame)
+            new_frames.append((len(compressed_frame), len(frame_data)))
+            frame_index = last_frame + 1
+    _write_zstd_seek_table(output, new_frames)
+
+
+def _write_patched_file(blend_file: BlendFile, replacements: list[BlendReplacement], output):
+    if blend_file.compression == 'ZSTD':
+        _write_zstd_file(blend_file, replacements, output)
+    elif blend_file.compression == 'GZIP':
+        data = _apply_replacements(blend_file.read_range(0, _get_content_size(blend_file)), 0, replacements)
+        output.write(gzip.compress(data, compresslevel=GZIP_COMPRESSION_LEVEL))
+    else:
+        with open(blend_file.filepath, 'rb') as source:
+            position = 0
+            for replacement in replacements:
+                _copy_range(source, output, replacement.offset - position)
+                output.write(replacement.data)
+                source.seek(replacement.length, os.SEEK_CUR)
+                position = replacement.offset + replacement.length
+            shutil.copyfileobj(source, output, COPY_CHUNK_SIZE)
+
+
+def patch_asset_file(asset_filepath: str, asset_edits: list[dict]) -> bool:
+    """ Set the properties of some assets of a file in place, without opening it in Blender
+
+    The file is written to a temporary file, checked, then renamed over the original file. No edit is applied if one
+    of them can't be patched.
+
+    Args:
+        asset_filepath (str): Asset filepath to edit
+        asset_edits (list[dict]): The edits of the file assets, with an "asset_name", an "id_type" and "properties"
+
+    Raises:
+        BlendPatchUnsupported: An edit changes the file structure, the file has to be edited with Blender
+        BlendFileError: The file can't be read
+
+    Returns:
+        bool: True if the file was rewritten, False if the assets already had these properties
+    """
+    with BlendFile(asset_filepath) as blend_file:
+        if blend_file.compression == 'ZSTD' and zstandard is None:
+            raise BlendPatchUnsupported("The zstandard module is required to patch zstd compressed files")
+        patch = BlendPatch(blend_file)
+        taken_names: dict[bytes, set[str]] = {}
+        for id_block in blend_file.iter_id_blocks():
+            taken_names.setdefault(id_block.code[:2], set()).add(blend_file.read_id_name(id_block))
+        for asset_edit in asset_edits:
+            properties = asset_edit["properties"]
+            if isinstance(properties, dict):
+                properties = list(properties.items())
+            _patch_asset(patch, asset_edit["asset_name"], asset_edit.get("id_type", "ACTION"), properties, taken_names)
+        if not patch.replacements:
+            return False
+
+        replacements = sorted(
+            patch.replacements,
+            # Insertions go before the range replaced at the same offset, in insertion order
+            key=lambda replacement: (replacement.offset, replacement.length > 0)
+        )
+        for replacement, next_replacement in zip(replacements, replacements[1:]):
+            if replacement.offset + replacement.length > next_replacement.offset:
+                raise BlendPatchUnsupported("Overlapping edits")
+
+        temp_file_descriptor, temp_filepath = tempfile.mkstemp(
+            prefix=f"{os.path.basename(asset_filepath)}.",
+            suffix=".patch",
+            dir=os.path.dirname(asset_filepath)
+        )
+        try:
+            with os.fdopen(temp_file_descriptor, 'wb') as output:
+                _write_patched_file(blend_file, replacements, output)
+                output.flush()
+                os.fsync(output.fileno())
+        except Exception:
+            os.remove(temp_filepath)
+            raise
+
+    try:
+        # Check the patched file can be read back before replacing the original one
+        with BlendFile(temp_filepath) as patched_file:
+            for id_block in patched_file.iter_id_blocks():
+                patched_file.read_asset_metadata(id_block)
+        shutil.copymode(asset_filepath, temp_filepath)
+        os.replace(temp_filepath, asset_filepath)
+    except Exception:
+        os.remove(temp_filepath)
+        raise
+    return True
+
+
+def patch_asset_properties(
+        asset_filepath: str,
+        asset_name: str,
+        id_type: str,
+        properties: list[tuple[str, str]]
+    ) -> bool:
+    """ Set the properties of an asset in place, see patch_asset_file
+
+    Args:
+        asset_filepath (str): Asset filepath to edit
+        asset_name (str): Asset name to edit within the blender file
+        id_type (str): Asset type to edit within the blender file
+        properties (list[tuple[str, str]]): Asset properties to edit within the blender file
+
+    Returns:
+        bool: True if the file was rewritten, False if the asset already had these properties
+    """
+    return patch_asset_file(
+        asset_filepath,
+        [{"asset_name": asset_name, "id_type": id_type, "properties": properties}]
+    )
@@ -0,0 +1,633 @@
+""" Read the asset metadata of .blend files from plain Python, without Blender.
+
+    The reader indexes the file blocks, parses the file structure description (SDNA), then reads the ID blocks and the
+    asset metadata blocks they point to. Other blocks are skipped. Compressed files are decompressed in memory first:
+    gzip with the standard library, zstd (files written with compress=True since Blender 3.0) with the optional
+    `zstandard` module.
+
+        python blend_reader.py /path/to/library
+
+    This module only depends on the standard library, so it can be used by tooling outside of Blender.
+"""
+import argparse
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import struct
+import sys
+import uuid
+from dataclasses import asdict, dataclass, field
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+BLEND_MAGIC = b'BLENDER'
+# Header of the files written since Blender 5.0, "BLENDER17-01v0500", followed by large block headers
+LARGE_BHEAD_HEADER_SIZE = 17
+LEGACY_HEADER_SIZE = 12
+
+BLOCK_CODE_DATA = b'DATA'
+BLOCK_CODE_DNA = b'DNA1'
+BLOCK_CODE_END = b'ENDB'
+
+# ID types of the assets, by ID code
+ID_TYPE_FROM_CODE = {
+    b'AC': 'ACTION',
+    b'OB': 'OBJECT',
+    b'MA': 'MATERIAL',
+    b'WO': 'WORLD',
+    b'GR': 'COLLECTION',
+    b'NT': 'NODETREE',
+    b'BR': 'BRUSH',
+    b'SC': 'SCENE',
+}
+
+# IDProperty types, see DNA_ID.h
+IDP_STRING = 0
+IDP_INT = 1
+IDP_FLOAT = 2
+IDP_ARRAY = 5
+IDP_GROUP = 6
+IDP_DOUBLE = 8
+IDP_IDPARRAY = 9
+IDP_BOOLEAN = 10
+IDP_STRING_SUB_BYTE = 1
+
+
+class BlendFileError(Exception):
+    pass
+
+
+@dataclass
+class BHead:
+    """Dataclass to store a block header of a .blend file.
+    """
+    code: bytes
+    length: int
+    old_pointer: int
+    sdna_index: int
+    count: int
+    # Offset of the block data in the uncompressed file
+    offset: int
+
+
+@dataclass
+class BlendAssetMetadata:
+    """Dataclass to store the metadata of an asset of a .blend file.
+    """
+    name: str
+    id_type: str
+    catalog_id: str
+    catalog_simple_name: str
+    author: str
+    description: str
+    copyright: str = ""
+    license: str = ""
+    tags: list[str] = field(default_factory=list)
+    # Custom properties of the asset metadata, e.g. "armature"
+    properties: dict = field(default_factory=dict)
+
+
+@dataclass
+class SDNAField:
+    """Dataclass to store a field of a struct described by the SDNA.
+    """
+    name: str
+    type_name: str
+    offset: int
+    size: int
+    is_pointer: bool
+    array_length: int
+
+
+class SDNA:
+    """ Description of the structs of a .blend file, used to read the struct fields at their offset
+
+    Args:
+        data (bytes): The DNA1 block data
+        byte_order (str): The struct module byte order of the file, "<" or ">"
+        pointer_size (int): The pointer size of the file, 4 or 8
+    """
+    def __init__(self, data: bytes, byte_order: str, pointer_size: int):
+        self.byte_order = byte_order
+        self.pointer_size = pointer_size
+        self.names: list[str] = []
+        self.types: list[str] = []
+        self.type_lengths: list[int] = []
+        # Struct type index and fields (type index, name index), by struct index
+        self.structs: list[tuple[int, list[tuple[int, int]]]] = []
+        self.struct_index_by_name: dict[str, int] = {}
+        self._fields_cache: dict[str, dict[str, SDNAField]] = {}
+        self._parse(data)
+
+    def _parse(self, data: bytes):
+        if data[:4] != b'SDNA':
+            raise BlendFileError("Invalid SDNA block")
+        offset = 4
+
+        def read_section(identifier: bytes) -> int:
+            nonlocal offset
+            # Sections are aligned on 4 bytes
+            offset = (offset + 3) & ~3
+            if data[offset:offset + 4] != identifier:
+                raise BlendFileError(f"Invalid SDNA block, {identifier} expected")
+            count, = struct.unpack_from(f'{self.byte_order}i', data, offset + 4)
+            offset += 8
+            return count
+
+        def read_strings(count: int) -> list[str]:
+            nonlocal offset
+            strings = []
+            for _ in range(count):
+                end = data.index(b'\0', offset)
+                strings.append(data[offset:end].decode('utf-8', errors='replace'))
+                offset = end + 1
+            return strings
+
+        self.names = read_strings(read_section(b'NAME'))
+        self.types = read_strings(read_section(b'TYPE'))
+        types_count = read_section(b'TLEN')
+        self.type_lengths = list(struct.unpack_from(f'{self.byte_order}{types_count}h', data, offset))
+        offset += 2 * types_count
+
+        for struct_index in range(read_section(b'STRC')):
+            type_index, fields_count = struct.unpack_from(f'{self.byte_order}hh', data, offset)
+            fields = struct.unpack_from(f'{self.byte_order}{2 * fields_count}h', data, offset + 4)
+            offset += 4 + 4 * fields_count
+            self.structs.append((type_index, list(zip(fields[::2], fields[1::2]))))
+            self.struct_index_by_name[self.types[type_index]] = struct_index
+
+    def get_struct_name(self, struct_index: int) -> str:
+        return self.types[self.structs[struct_index][0]]
+
+    def get_struct_length(self, struct_name: str) -> int:
+        struct_index = self.struct_index_by_name.get(struct_name)
+        if struct_index is None:
+            raise BlendFileError(f"Struct {struct_name} not found in the file SDNA")
+        return self.type_lengths[self.structs[struct_index][0]]
+
+    def get_fields(self, struct_name: str) -> dict[str, SDNAField]:
+        """ Get the fields of a struct, by name without pointer and array decorations
+
+        Args:
+            struct_name (str): The struct name, e.g. "AssetMetaData"
+
+        Returns:
+            dict[str, SDNAField]: The struct fields, by name
+        """
+        fields = self._fields_cache.get(struct_name)
+        if fields is not None:
+            return fields
+
+        struct_index = self.struct_index_by_name.get(struct_name)
+        if struct_index is None:
+            raise BlendFileError(f"Struct {struct_name} not found in the file SDNA")
+        fields = {}
+        offset = 0
+        for type_index, name_index in self.structs[struct_index][1]:
+            full_name = self.names[name_index]
+            is_pointer = full_name.startswith('*') or full_name.startswith('(')
+            array_length = 1
+            for dimension in re.findall(r'\[(\d+)\]', full_name):
+                array_length *= int(dimension)
+            item_size = self.pointer_size if is_pointer else self.type_lengths[type_index]
+            name = re.match(r'[(*]*(\w+)', full_name).group(1)
+            fields[name] = SDNAField(
+                name=name,
+                type_name=self.types[type_index],
+                offset=offset,
+                size=item_size * array_length,
+                is_pointer=is_pointer,
+                array_length=array_length,
+            )
+            offset += item_size * array_length
+        self._fields_cache[struct_name] = fields
+        return fields
+
+    def get_field(self, struct_name: str, field_path: str) -> SDNAField:
+        """ Get a field of a struct, nested struct fields being separated by dots, e.g. "data.val"
+
+        Returns:
+            SDNAField: The field, its offset being relative to the outer struct
+        """
+        offset = 0
+        for name in field_path.split('.'):
+            struct_field = self.get_fields(struct_name).get(name)
+            if struct_field is None:
+                raise BlendFileError(f"Field {field_path} not found in {struct_name}")
+            offset += struct_field.offset
+            struct_name = struct_field.type_name
+        return SDNAField(
+            name=struct_field.name,
+            type_name=struct_field.type_name,
+            offset=offset,
+            size=struct_field.size,
+            is_pointer=struct_field.is_pointer,
+            array_length=struct_field.array_length,
+        )
+
+    def has_field(self, struct_name: str, field_path: str) -> bool:
+        try:
+            self.get_field(struct_name, field_path)
+        except BlendFileError:
+            return False
+        return True
+
+    def read_pointer(self, data: bytes, struct_name: str, field_path: str, base_offset: int = 0) -> int:
+        struct_field = self.get_field(struct_name, field_path)
+        pointer_format = 'Q' if self.pointer_size == 8 else 'I'
+        return struct.unpack_from(f'{self.byte_order}{pointer_format}', data, base_offset + struct_field.offset)[0]
+
+    def read_int(self, data: bytes, struct_name: str, field_path: str, base_offset: int = 0) -> int:
+        struct_field = self.get_field(struct_name, field_path)
+        int_format = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}[struct_field.size]
+        if struct_field.type_name in ('uchar', 'ushort', 'uint', 'uint8_t', 'uint16_t', 'uint32_t', 'uint64_t'):
+            int_format = int_format.upper()
+        return struct.unpack_from(f'{self.byte_order}{int_format}', data, base_offset + struct_field.offset)[0]
+
+    def read_bytes(self, data: bytes, struct_name: str, field_path: str, base_offset: int = 0) -> bytes:
+        struct_field = self.get_field(struct_name, field_path)
+        start = base_offset + struct_field.offset
+        return data[start:start + struct_field.size]
+
+    def read_char_array(self, data: bytes, struct_name: str, field_path: str, base_offset: int = 0) -> str:
+        return _decode_c_string(self.read_bytes(data, struct_name, field_path, base_offset))
+
+
+def _decode_c_string(data: bytes) -> str:
+    return data.split(b'\0', 1)[0].decode('utf-8', errors='replace')
+
+
+def _get_compression(filepath: str) -> str:
+    with open(filepath, 'rb') as file:
+        magic = file.read(len(BLEND_MAGIC))
+    if magic.startswith(BLEND_MAGIC):
+        return 'NONE'
+    if magic.startswith(GZIP_MAGIC):
+        return 'GZIP'
+    if magic.startswith(ZSTD_MAGIC):
+        return 'ZSTD'
+    raise BlendFileError(f"{filepath} is not a .blend file")
+
+
+def decompress_blend_file(filepath: str, compression: str) -> bytes:
+    """ Decompress a compressed .blend file in memory
+
+    Args:
+        filepath (str): The .blend file path
+        compression (str): The file compression, "GZIP" or "ZSTD"
+
+    Returns:
+        bytes: The uncompressed file content
+    """
+    if compression == 'GZIP':
+        with gzip.open(filepath, 'rb') as file:
+            return file.read()
+    if zstandard is None:
+        raise BlendFileError(f"{filepath} is zstd compressed, the zstandard module is required to read it")
+    with open(filepath, 'rb') as file:
+        with zstandard.ZstdDecompressor().stream_reader(file, read_across_frames=True) as reader:
+            return reader.read()
+
+
+class BlendFile:
+    """ Block index and structure description of a .blend file, reading the block data on demand
+
+        Uncompressed files are read with seeks, only the read blocks are loaded. Must be closed after use (or used as a
+        context manager).
+
+    Args:
+        filepath (str): The .blend file path
+    """
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.compression = _get_compression(filepath)
+        if self.compression == 'NONE':
+            self._file = open(filepath, 'rb')
+        else:
+            self._file = io.BytesIO(decompress_blend_file(filepath, self.compression))
+        try:
+            self._read_header()
+            self.blocks: list[BHead] = []
+            self.block_by_pointer: dict[int, BHead] = {}
+            self._read_block_headers()
+            dna_block = next((block for block in self.blocks if block.code == BLOCK_CODE_DNA), None)
+            if dna_block is None:
+                raise BlendFileError(f"{filepath} has no DNA1 block")
+            self.sdna = SDNA(self.read_block(dna_block), self.byte_order, self.pointer_size)
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def _read_header(self):
+        header = self._file.read(LARGE_BHEAD_HEADER_SIZE)
+        if not header.startswith(BLEND_MAGIC):
+            raise BlendFileError(f"{self.filepath} is not a .blend file")
+        if header[7:9].isdigit():
+            # "BLENDER17-01v0500": header size, pointer size (always 8), format version, endianness, version
+            self.header_size = int(header[7:9])
+            self.pointer_size = 8
+            self.byte_order = '<' if header[12:13] == b'v' else '>'
+            self.version = int(header[13:17])
+            self._bhead_format = f'{self.byte_order}4siQqq'
+            self._bhead_fields = ('code', 'sdna_index', 'old_pointer', 'length', 'count')
+        else:
+            self.header_size = LEGACY_HEADER_SIZE
+            self.pointer_size = 8 if header[7:8] == b'-' else 4
+            self.byte_order = '<' if header[8:9] == b'v' else '>'
+            self.version = int(header[9:12])
+            pointer_format = 'Q' if self.pointer_size == 8 else 'I'
+            self._bhead_format = f'{self.byte_order}4si{pointer_format}ii'
+            self._bhead_fields = ('code', 'length', 'old_pointer', 'sdna_index', 'count')
+        self.bhead_size = struct.calcsize(self._bhead_format)
+
+    def _read_block_headers(self):
+        offset = self.header_size
+        self._file.seek(offset)
+        while True:
+            bhead_data = self._file.read(self.bhead_size)
+            if len(bhead_data) < self.bhead_size:
+                raise BlendFileError(f"{self.filepath} is truncated")
+            values = dict(zip(self._bhead_fields, struct.unpack(self._bhead_format, bhead_data)))
+            offset += self.bhead_size
+            block = BHead(offset=offset, **values)
+            self.blocks.append(block)
+            if block.code == BLOCK_CODE_END:
+                return
+            self.block_by_pointer[block.old_pointer] = block
+            offset += block.length
+            self._file.seek(offset)
+
+    def read_block(self, block: BHead) -> bytes:
+        return self.read_range(block.offset, block.length)
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """ Read bytes of the uncompressed file
+        """
+        self._file.seek(offset)
+        return self._file.read(length)
+
+    def pack_block_header(self, block: BHead, length: int) -> bytes:
+        """ Get the header of a block, with another data length
+        """
+        values = dict(
+            code=block.code,
+            length=length,
+            old_pointer=block.old_pointer,
+            sdna_index=block.sdna_index,
+            count=block.count,
+        )
+        return struct.pack(self._bhead_format, *(values[name] for name in self._bhead_fields))
+
+    def find_id_block(self, id_code: bytes, name: str) -> BHead:
+        """ Find the block of an ID, by ID code and name
+
+        Returns:
+            BHead: The ID block, None if not found
+        """
+        for id_block in self.iter_id_blocks():
+            if id_block.code[:2] == id_code and self.read_id_name(id_block) == name:
+                return id_block
+        return None
+
+    def read_id_name(self, id_block: BHead) -> str:
+        """ Read the name of an ID, without its 2 characters code
+        """
+        name_field = self.sdna.get_field('ID', 'name')
+        return _decode_c_string(self.read_range(id_block.offset + name_field.offset, name_field.size))[2:]
+
+    def read_pointed_block(self, pointer: int) -> bytes:
+        """ Get the data of the block a pointer of the file points to
+
+        Returns:
+            bytes: The block data, None for a null or unknown pointer
+        """
+        block = self.block_by_pointer.get(pointer) if pointer else None
+        if block is None:
+            return None
+        return self.read_block(block)
+
+    def read_string(self, pointer: int) -> str:
+        data = self.read_pointed_block(pointer)
+        return _decode_c_string(data) if data is not None else ""
+
+    def iter_id_blocks(self):
+        """ Iterate over the blocks of the ID datablocks, their 2 characters code being followed by null bytes
+        """
+        for block in self.blocks:
+            if block.code[2:] == b'\0\0' and block.code[:2] != b'\0\0':
+                yield block
+
+    def read_id_property(self, data: bytes, base_offset: int = 0):
+        """ Read the value of an IDProperty struct
+
+        Returns:
+            The property value, None for the unsupported property types
+        """
+        sdna = self.sdna
+        property_type = sdna.read_int(data, 'IDProperty', 'type', base_offset)
+        subtype = sdna.read_int(data, 'IDProperty', 'subtype', base_offset)
+        length = sdna.read_int(data, 'IDProperty', 'len', base_offset)
+        value = sdna.read_int(data, 'IDProperty', 'data.val', base_offset)
+        value2 = sdna.read_int(data, 'IDProperty', 'data.val2', base_offset)
+        int_values = struct.pack(f'{self.byte_order}ii', value, value2)
+
+        if property_type == IDP_STRING:
+            string_data = self.read_pointed_block(sdna.read_pointer(data, 'IDProperty', 'data.pointer', base_offset))
+            if string_data is None:
+                return None
+            if subtype == IDP_STRING_SUB_BYTE:
+                return string_data[:length]
+            return _decode_c_string(string_data[:length])
+        if property_type == IDP_INT:
+            return value
+        if property_type == IDP_BOOLEAN:
+            return bool(value)
+        if property_type == IDP_FLOAT:
+            return struct.unpack(f'{self.byte_order}f', int_values[:4])[0]
+        if property_type == IDP_DOUBLE:
+            return struct.unpack(f'{self.byte_order}d', int_values)[0]
+        if property_type == IDP_GROUP:
+            return self.read_id_property_group(sdna.read_pointer(data, 'IDProperty', 'data.group.first', base_offset))
+        if property_type == IDP_ARRAY:
+            array_data = self.read_pointed_block(sdna.read_pointer(data, 'IDProperty', 'data.pointer', base_offset))
+            item_format = {IDP_INT: 'i', IDP_FLOAT: 'f', IDP_DOUBLE: 'd', IDP_BOOLEAN: 'b'}.get(subtype)
+            if array_data is None or item_format is None:
+                return None
+            values = list(struct.unpack_from(f'{self.byte_order}{length}{item_format}', array_data))
+            return [bool(value) for value in values] if subtype == IDP_BOOLEAN else values
+        if property_type == IDP_IDPARRAY:
+            # Array of IDProperty structs, e.g. the items of a CollectionProperty
+            items_data = self.read_pointed_block(sdna.read_pointer(data, 'IDProperty', 'data.pointer', base_offset))
+            if items_data is None:
+                return []
+            item_size = sdna.get_struct_length('IDProperty')
+            return [self.read_id_property(items_data, index * item_size) for index in range(length)]
+        return None
+
+    def read_id_property_group(self, first_pointer: int) -> dict:
+        """ Read the properties of an IDProperty group, from its first property
+
+        Returns:
+            dict: The property values, by name
+        """
+        properties = {}
+        pointer = first_pointer
+        while pointer:
+            data = self.read_pointed_block(pointer)
+            if data is None:
+                break
+            name = self.sdna.read_char_array(data, 'IDProperty', 'name')
+            properties[name] = self.read_id_property(data)
+            pointer = self.sdna.read_pointer(data, 'IDProperty', 'next')
+        return properties
+
+    def read_id_properties(self, id_block: BHead) -> dict:
+        """ Read the custom properties of an ID, including the ones of the properties registered by add-ons
+
+        Returns:
+            dict: The property values, by name
+        """
+        sdna = self.sdna
+        id_data = self.read_block(id_block)
+        properties_data = self.read_pointed_block(sdna.read_pointer(id_data, 'ID', 'properties'))
+        if properties_data is None:
+            return {}
+        return self.read_id_property_group(sdna.read_pointer(properties_data, 'IDProperty', 'data.group.first'))
+
+    def is_asset(self, id_block: BHead) -> bool:
+        id_data = self.read_block(id_block)
+        return self.sdna.read_pointer(id_data, 'ID', 'asset_data') != 0
+
+    def read_asset_metadata(self, id_block: BHead) -> BlendAssetMetadata:
+        """ Read the asset metadata of an ID block
+
+        Returns:
+            BlendAssetMetadata: The asset metadata, None if the ID is not an asset
+        """
+        sdna = self.sdna
+        id_data = self.read_block(id_block)
+        asset_data = self.read_pointed_block(sdna.read_pointer(id_data, 'ID', 'asset_data'))
+        if asset_data is None:
+            return None
+
+        def read_string_field(field_name: str) -> str:
+            if not sdna.has_field('AssetMetaData', field_name):
+                return ""
+            return self.read_string(sdna.read_pointer(asset_data, 'AssetMetaData', field_name))
+
+        tags = []
+        tag_pointer = sdna.read_pointer(asset_data, 'AssetMetaData', 'tags.first')
+        while tag_pointer:
+            tag_data = self.read_pointed_block(tag_pointer)
+            if tag_data is None:
+                break
+            tags.append(sdna.read_char_array(tag_data, 'AssetTag', 'name'))
+            tag_pointer = sdna.read_pointer(tag_data, 'AssetTag', 'next')
+
+        properties = {}
+        properties_data = self.read_pointed_block(sdna.read_pointer(asset_data, 'AssetMetaData', 'properties'))
+        if properties_data is not None:
+            properties = self.read_id_property_group(
+                sdna.read_pointer(properties_data, 'IDProperty', 'data.group.first')
+            )
+
+        id_name = sdna.read_char_array(id_data, 'ID', 'name')
+        return BlendAssetMetadata(
+            name=id_name[2:],
+            id_type=ID_TYPE_FROM_CODE.get(id_block.code[:2], id_block.code[:2].decode('ascii', errors='replace')),
+            catalog_id=str(uuid.UUID(bytes=_get_uuid_bytes(
+                sdna.read_bytes(asset_data, 'AssetMetaData', 'catalog_id'),
+                self.byte_order
+            ))),
+            catalog_simple_name=sdna.read_char_array(asset_data, 'AssetMetaData', 'catalog_simple_name'),
+            author=read_string_field('author'),
+            description=read_string_field('description'),
+            copyright=read_string_field('copyright'),
+            license=read_string_field('license'),
+            tags=tags,
+            properties=properties,
+        )
+
+
+def _get_uuid_bytes(uuid_data: bytes, byte_order: str) -> bytes:
+    """ Convert a bUUID struct (uint32, uint16, uint16, 8 bytes) to the big endian bytes of its string form
+    """
+    time_low, time_mid, time_hi_and_version = struct.unpack_from(f'{byte_order}IHH', uuid_data)
+    return struct.pack('>IHH', time_low, time_mid, time_hi_and_version) + uuid_data[8:16]
+
+
+def read_asset_metadata(filepath: str) -> list[BlendAssetMetadata]:
+    """ Read the metadata of the assets of a .blend file, without Blender
+
+    Args:
+        filepath (str): The .blend file path
+
+    Returns:
+        list[BlendAssetMetadata]: The metadata of each asset of the file
+    """
+    with BlendFile(filepath) as blend_file:
+        assets = []
+        for id_block in blend_file.iter_id_blocks():
+            asset_metadata = blend_file.read_asset_metadata(id_block)
+            if asset_metadata is not None:
+                assets.append(asset_metadata)
+        return assets
+
+
+def _get_blend_filepaths(paths: list[str]) -> list[str]:
+    filepaths = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, filenames in os.walk(path):
+                filepaths.extend(os.path.join(root, filename) for filename in filenames if filename.endswith('.blend'))
+        else:
+            filepaths.append(path)
+    return sorted(filepaths)
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Print the asset metadata of .blend files as JSON")
+    parser.add_argument(
+        "paths",
+        help=".blend files, or directories to scan recursively",
+        nargs="+",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    files_metadata = []
+    failed_files = 0
+    for filepath in _get_blend_filepaths(args.paths):
+        try:
+            assets = [asdict(asset_metadata) for asset_metadata in read_asset_metadata(filepath)]
+        except (OSError, BlendFileError) as e:
+            logging.error(f"Can't read {filepath}: {e}")
+            failed_files += 1
+            continue
+        files_metadata.append({"filepath": filepath, "assets": assets})
+    # Byte string properties are printed as hexadecimal
+    json.dump(files_metadata, sys.stdout, indent=4, default=lambda value: value.hex())
+    return 1 if failed_files else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import bpy
+
+from . import asset_editor, blend_patcher
+from .blend_reader import BlendFileError
+
+# Delay (in seconds) between two checks of the running edits
+EDIT_QUEUE_POLL_INTERVAL = 0.2
+
+
+@dataclass
+class AssetEditJob:
+    """Dataclass to store an asset edit running in background.
+    """
+    description: str
+    future: Future = None
+    errors: list[str] = field(default_factory=list)
+
+
+def _get_edit_errors(response: dict) -> list[str]:
+    if response["status"] == "ok":
+        return []
+    return [response.get("error") or "Unknown error"]
+
+
+def _get_batch_edit_errors(results: list[dict]) -> list[str]:
+    return [f"{result['filepath']}: {result['error']}" for result in results if result["status"] != "ok"]
+
+
+def _edit_shared_asset(
+        asset_filepath: str,
+        asset_name: str,
+        id_type: str,
+        properties: list[tuple[str, str]]
+    ) -> dict:
+    """ Patch a shared asset file in place, or edit it with the Blender worker when the edit changes its structure
+
+    Returns:
+        dict: The edit response, with a "status" ("ok" or "failed") and an "error" if failed
+    """
+    try:
+        blend_patcher.patch_asset_properties(asset_filepath, asset_name, id_type, properties)
+        logging.info(f"Patched {asset_name} in {asset_filepath}")
+        return {"status": "ok"}
+    except blend_patcher.BlendPatchUnsupported as e:
+        logging.info(f"Can't patch {asset_name} in place, editing it with Blender: {e}")
+    except (OSError, BlendFileError) as e:
+        logging.warning(f"Can't patch {asset_filepath}, editing it with Blender: {e}")
+    return asset_editor.set_shared_asset_properties(asset_filepath, asset_name, id_type, properties)
+
+
+def _run_batch_edit(jobs: list[dict]) -> list[dict]:
+    """ Patch the edited files in place, the files whose edits change their structure being edited by the Blender
+        workers, see asset_editor.run_batch_edit
+    """
+    jobs_by_file: dict[str, list[dict]] = {}
+    for job in jobs:
+        jobs_by_file.setdefault(job["filepath"], []).append(job)
+
+    results = []
+    blender_jobs = []
+    for asset_filepath, file_jobs in jobs_by_file.items():
+        try:
+            blend_patcher.patch_asset_file(asset_filepath, file_jobs)
+        except blend_patcher.BlendPatchUnsupported as e:
+            logging.info(f"Can't patch {asset_filepath} in place, editing it with Blender: {e}")
+            blender_jobs.extend(file_jobs)
+            continue
+        except (OSError, BlendFileError) as e:
+            logging.warning(f"Can't patch {asset_filepath}, editing it with Blender: {e}")
+            blender_jobs.extend(file_jobs)
+            continue
+        results.append({
+            "filepath": asset_filepath,
+            "status": "ok",
+            "error": None,
+            "assets": [{"asset_name": job["asset_name"], "status": "ok"} for job in file_jobs],
+        })
+    logging.info(f"Patched {len(results)} files in place")
+
+    if blender_jobs:
+        results.extend(asset_editor.run_batch_edit(blender_jobs))
+    return results
+
+
+def _refresh_asset_browsers():
+    """ Refresh the asset libraries displayed in the asset browsers, and redraw them
+    """
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.ui_type != 'ASSETS':
+                continue
+            region = next((region for region in area.regions if region.type == 'WINDOW'), None)
+            with bpy.context.temp_override(window=window, area=area, region=region):
+                bpy.ops.asset.library_refresh()
+            area.tag_redraw()
+
+
+def _redraw_asset_browsers():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.ui_type == 'ASSETS':
+                area.tag_redraw()
+
+
+class AssetEditQueue:
+    """ Queue of the shared asset edits, saved in background while the user keeps browsing.
+
+        The edits run one after another in a thread. Metadata edits are patched in the asset files directly, the
+        structural ones waiting for the asset editor workers. A timer polls them
+        while some are pending, and refreshes the asset browsers when an edit completes.
+    """
+    def __init__(self):
+        self._executor: ThreadPoolExecutor = None
+        self.pending_jobs: list[AssetEditJob] = []
+        # Errors of the last failed edit, displayed until the next edit is submitted
+        self.last_errors: list[str] = []
+        # Keep a single bound method, timers are identified by function
+        self._timer = self._poll_jobs
+
+    def _submit(self, description: str, function, result_errors, *args) -> AssetEditJob:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asset_edit_queue")
+        job = AssetEditJob(description=description)
+        job.future = self._executor.submit(lambda: result_errors(function(*args)))
+        self.pending_jobs.append(job)
+        self.last_errors = []
+        logging.info(f"Queued edit: {description}")
+        if not bpy.app.timers.is_registered(self._timer):
+            bpy.app.timers.register(self._timer, first_interval=EDIT_QUEUE_POLL_INTERVAL)
+        _redraw_asset_browsers()
+        return job
+
+    def submit_edit(
+            self,
+            asset_filepath: str,
+            asset_name: str,
+            id_type: str,
+            properties: list[tuple[str, str]]
+        ) -> AssetEditJob:
+        """ Queue the edit of a shared asset
+
+        Args:
+            asset_filepath (str): Asset filepath to edit
+            asset_name (str): Asset name to edit within the blender file
+            id_type (str): Asset type to edit within the blender file
+            properties (list[tuple[str, str]]): Asset properties to edit within the blender file
+
+        Returns:
+            AssetEditJob: The queued edit
+        """
+        return self._submit(
+            f"Edit {asset_name}",
+            _edit_shared_asset,
+            _get_edit_errors,
+            asset_filepath, asset_name, id_type, properties
+        )
+
+    def submit_batch_edit(self, jobs: list[dict]) -> AssetEditJob:
+        """ Queue a batch edit of shared assets, the files being patched in place when possible, see
+            asset_editor.run_batch_edit
+
+        Args:
+            jobs (list[dict]): The asset edits, with a "filepath", an "asset_name", an "id_type" and "properties"
+
+        Returns:
+            AssetEditJob: The queued edit
+        """
+        return self._submit(
+            f"Edit {len(jobs)} assets",
+            _run_batch_edit,
+            _get_batch_edit_errors,
+            jobs
+        )
+
+    def _poll_jobs(self):
+        """ Collect the completed edits, and refresh the asset browsers if some completed
+        """
+        completed_jobs = [job for job in self.pending_jobs if job.future.done()]
+        for job in completed_jobs:
+            self.pending_jobs.remove(job)
+            try:
+                job.errors = job.future.result()
+            except Exception as e:
+                job.errors = [str(e)]
+            if job.errors:
+                logging.error(f"{job.description} failed: {'; '.join(job.errors)}")
+                self.last_errors = job.errors
+            else:
+                logging.info(f"{job.description} saved")
+
+        if completed_jobs:
+            try:
+                _refresh_asset_browsers()
+            except Exception as e:
+                logging.error(f"Can't refresh the asset browsers: {e}")
+        return EDIT_QUEUE_POLL_INTERVAL if self.pending_jobs else None
+
+    def shutdown(self):
+        """ Wait for the pending edits, so none is lost, and stop polling them
+        """
+        if bpy.app.timers.is_registered(self._timer):
+            bpy.app.timers.unregister(self._timer)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.pending_jobs.clear()
+
+
+# Edit queue of the add-on session
+asset_edit_queue = AssetEditQueue()
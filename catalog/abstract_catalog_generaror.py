@@ -1,5 +1,3 @@
-
-
 from abc import abstractmethod
 
 
@@ -8,4 +6,9 @@ class AbstractCatalogGenerator():
     def generate_entry_path(self)->str:
         """ Generate a path for a new entry
         """
-        raise NotImplementedError()
\ No newline at end of file
+        raise NotImplementedError()
+
+    def prefetch(self):
+        """ Prepare the entry path of the open file in the background, called when a file is opened
+        """
+        pass
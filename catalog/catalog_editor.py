@@ -1,55 +1,201 @@
+import contextlib
 import os
+import socket
+import time
 from uuid import NAMESPACE_URL, uuid4
 
-BLENDER_ASSET_CATALOGS_FILE_NAME = "blender_assets.cats.txt"
-
-def _parse_catalog_file(file_path: str) -> list:
-    catalogs = []
-    if not os.path.exists(file_path):
-        return []
-    with open(file_path, 'r') as file:
-        for line in file:
-            line = line.strip()  # Remove leading/trailing whitespace
-            # Ignore empty lines and comments
-            if not line or line.startswith('#'):
-                continue
-            if line.startswith('VERSION'):
+from .catalog_model import get_catalog_model
+
+# Delay (in seconds) to wait for the catalog lock, and age after which a lock left by a crashed session is broken
+CATALOG_LOCK_TIMEOUT = 10.0
+CATALOG_LOCK_STALE_DELAY = 60.0
+CATALOG_LOCK_RETRY_INTERVAL = 0.05
+CATALOG_FILE_HEADER = "VERSION 1\n"
+
+
+def _read_lock_owner(lock_file_path: str) -> str:
+    try:
+        with open(lock_file_path, 'r') as lock_file:
+            return lock_file.read()
+    except FileNotFoundError:
+        return None
+
+
+def _break_stale_lock(lock_file_path: str) -> bool:
+    """ Remove a lock left by a crashed session, only one of the sessions seeing it stale succeeding
+
+    The lock is renamed to a unique name before being removed, the rename failing for the other sessions.
+
+    Returns:
+        bool: True if the stale lock was removed
+    """
+    try:
+        if time.time() - os.path.getmtime(lock_file_path) <= CATALOG_LOCK_STALE_DELAY:
+            return False
+        broken_lock_file_path = f"{lock_file_path}.{uuid4().hex}.stale"
+        os.rename(lock_file_path, broken_lock_file_path)
+    except FileNotFoundError:
+        # Released or broken by another session in the meantime
+        return False
+
+    try:
+        # The lock may have been broken and taken again between the age check and the rename, give it back
+        if time.time() - os.path.getmtime(broken_lock_file_path) <= CATALOG_LOCK_STALE_DELAY:
+            with contextlib.suppress(OSError):
+                os.link(broken_lock_file_path, lock_file_path)
+            return False
+        return True
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(broken_lock_file_path)
+
+
+@contextlib.contextmanager
+def catalog_lock(catalog_file_path: str, timeout: float = CATALOG_LOCK_TIMEOUT):
+    """Take the advisory lock of a catalogs file, shared by every session writing in the library.
+
+    The lock is a file created next to the catalogs file, its exclusive creation fails while another session holds it.
+    It holds the host, process and a token of its owner, it is only removed by its owner.
+
+    Args:
+        catalog_file_path (str): The catalogs file path
+        timeout (float, optional): Delay (in seconds) to wait for the lock. Defaults to CATALOG_LOCK_TIMEOUT.
+
+    Raises:
+        TimeoutError: If the lock could not be taken in time
+    """
+    lock_file_path = f"{catalog_file_path}.lock"
+    lock_owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex}"
+    os.makedirs(os.path.dirname(lock_file_path), exist_ok=True)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            lock_file = os.open(lock_file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if _break_stale_lock(lock_file_path):
                 continue
-            # Extract catalog data
-            uuid, path, simple_name = line.split(':')
-            catalogs.append({
-                'uuid': uuid,
-                'path': path,
-                'simple_name': simple_name,
-            })
-    return catalogs
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Catalog file {catalog_file_path} is locked by another session")
+            time.sleep(CATALOG_LOCK_RETRY_INTERVAL)
 
-def add_entry(catalog_path, catalog_file_path):
-    simple_name = catalog_path.replace("/","-")
-    # Get the path to the catalog file
-    catalog_file_path = catalog_file_path+"\\"+BLENDER_ASSET_CATALOGS_FILE_NAME
-
-    # Parse the catalog file
-    catalogs = _parse_catalog_file(catalog_file_path)
-
-    # check if the catalog already exists
-    for catalog in catalogs:
-        if catalog_path == catalog["path"]:
-            catalog_uuid = catalog["uuid"]
-            return catalog_uuid
-        
-    # Create a new catalog entry
-    uuid = str(uuid4())
-
-    # Check if the catalog file exists
+    try:
+        os.write(lock_file, lock_owner.encode())
+        os.close(lock_file)
+        yield
+    finally:
+        # The lock may have been broken as stale and taken by another session, leave it to its owner
+        if _read_lock_owner(lock_file_path) == lock_owner:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(lock_file_path)
+
+
+def _append_lines(catalog_file_path: str, lines: list[str]):
+    """Append lines to a catalogs file, creating it if needed. Must be called under the catalog lock.
+    """
     if not os.path.exists(catalog_file_path):
-        os.makedirs(os.path.dirname(catalog_file_path), exist_ok=True)
+        lines = [CATALOG_FILE_HEADER] + lines
+    else:
+        # Make sure the appended lines don't continue an unterminated last line
+        with open(catalog_file_path, 'rb') as file:
+            file.seek(0, os.SEEK_END)
+            if file.tell() > 0:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b'\n':
+                    lines = ['\n'] + lines
+    with open(catalog_file_path, 'a') as file:
+        file.write(''.join(lines))
+        file.flush()
+        os.fsync(file.fileno())
+
 
-    # Write the updated catalog file
-    with open(catalog_file_path, 'w') as file:
-        file.write(f'VERSION 1\n')
-        for catalog in catalogs:
-            file.write(f'{catalog["uuid"]}:{catalog["path"]}:{catalog["simple_name"]}\n')     
-        file.write(f'{uuid}:{catalog_path}:{simple_name}\n')
+def _get_catalog_paths_with_ancestors(catalog_paths: list[str]) -> list[str]:
+    """ Get catalog paths preceded by all their ancestor paths, without duplicates
+    """
+    paths = {}
+    for catalog_path in catalog_paths:
+        segments = catalog_path.split('/')
+        for index in range(1, len(segments)):
+            ancestor_path = '/'.join(segments[:index])
+            if ancestor_path:
+                paths[ancestor_path] = None
+        paths[catalog_path] = None
+    return list(paths)
+
+
+def ensure_entries(catalog_paths: list[str], library_path: str) -> dict[str, str]:
+    """ Make sure catalogs and all their ancestors exist in a library, creating the missing ones at once
+
+    The catalogs file is read once, and only locked and appended to if some catalogs are missing.
+
+    Args:
+        catalog_paths (list[str]): The catalog paths
+        library_path (str): The library path
+
+    Returns:
+        dict[str, str]: The catalog uuids, by path, for the given paths and their ancestors
+    """
+    catalog_model = get_catalog_model(library_path)
+    paths = _get_catalog_paths_with_ancestors(catalog_paths)
+
+    # Check if the catalogs already exist
+    if all(path in catalog_model.uuid_by_path for path in paths):
+        return {path: catalog_model.uuid_by_path[path] for path in paths}
+
+    with catalog_lock(catalog_model.catalog_file_path):
+        # Catalogs may have been added by another session before the lock was taken
+        catalog_model.refresh()
+        new_lines = []
+        for path in paths:
+            if path not in catalog_model.uuid_by_path:
+                simple_name = path.replace("/","-")
+                new_lines.append(f'{uuid4()}:{path}:{simple_name}\n')
+
+        # Append all the new catalog entries in a single write
+        if new_lines:
+            _append_lines(catalog_model.catalog_file_path, new_lines)
+            catalog_model.refresh()
+
+    return {path: catalog_model.uuid_by_path[path] for path in paths}
+
+
+def add_entry(catalog_path, catalog_file_path):
+    return ensure_entries([catalog_path], catalog_file_path)[catalog_path]
+
+
+def compact_catalog(library_path: str) -> int:
+    """Rewrite the catalogs file of a library, without duplicated entries, comments and empty lines.
+
+    Entries are only appended when added, the file is rewritten only by this explicit compaction.
+
+    Args:
+        library_path (str): The library path
+
+    Returns:
+        int: The number of duplicated entries removed
+    """
+    catalog_model = get_catalog_model(library_path)
+    catalog_file_path = catalog_model.catalog_file_path
+    with catalog_lock(catalog_file_path):
+        catalog_model.refresh()
+        # Keep the first entry of each path and uuid
+        seen_paths = set()
+        seen_uuids = set()
+        lines = [CATALOG_FILE_HEADER]
+        for catalog in catalog_model.entries:
+            if catalog.path in seen_paths or catalog.uuid in seen_uuids:
+                continue
+            seen_paths.add(catalog.path)
+            seen_uuids.add(catalog.uuid)
+            lines.append(f'{catalog.uuid}:{catalog.path}:{catalog.simple_name}\n')
 
-    return uuid
+        # Write the compacted file next to the catalogs file, then replace it
+        temp_file_path = f"{catalog_file_path}.tmp"
+        with open(temp_file_path, 'w') as file:
+            file.write(''.join(lines))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file_path, catalog_file_path)
+        removed_entries = len(catalog_model.entries) - (len(lines) - 1)
+        catalog_model.refresh()
+    return removed_entries
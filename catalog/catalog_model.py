@@ -0,0 +1,143 @@
+import os
+from dataclasses import dataclass
+
+from .catalog_search import CatalogSearchIndex
+
+BLENDER_ASSET_CATALOGS_FILE_NAME = "blender_assets.cats.txt"
+
+
+@dataclass
+class CatalogEntry:
+    """Dataclass to store a catalog entry of a library catalogs file.
+    """
+    uuid: str
+    path: str
+    simple_name: str
+
+    def as_dict(self) -> dict:
+        return {
+            'uuid': self.uuid,
+            'path': self.path,
+            'simple_name': self.simple_name,
+        }
+
+
+def get_catalog_file_path(library_path: str) -> str:
+    """ Get the path of the catalogs file of a library
+
+    Args:
+        library_path (str): The library path
+
+    Returns:
+        str: The catalogs file path
+    """
+    return os.path.join(library_path, BLENDER_ASSET_CATALOGS_FILE_NAME)
+
+
+def _parse_catalog_file(file_path: str) -> list[CatalogEntry]:
+    catalogs = []
+    if not os.path.exists(file_path):
+        return []
+    with open(file_path, 'r') as file:
+        for line in file:
+            line = line.strip()  # Remove leading/trailing whitespace
+            # Ignore empty lines and comments
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('VERSION'):
+                continue
+            # Extract catalog data
+            uuid, path, simple_name = line.split(':')
+            catalogs.append(CatalogEntry(uuid=uuid, path=path, simple_name=simple_name))
+    return catalogs
+
+
+class CatalogModel:
+    """ In memory model of a library catalogs file, indexed by uuid and by path
+
+        The file is parsed again only when its modification time or size changed.
+    """
+    def __init__(self, catalog_file_path: str):
+        self.catalog_file_path = catalog_file_path
+        self.entries: list[CatalogEntry] = []
+        self.path_by_uuid: dict[str, str] = {}
+        self.uuid_by_path: dict[str, str] = {}
+        self._search_index: CatalogSearchIndex = None
+        # Modification time and size of the parsed file, None when it doesn't exist, () when not parsed yet
+        self._file_signature = ()
+
+    def _get_file_signature(self) -> tuple[int, int]:
+        try:
+            file_stat = os.stat(self.catalog_file_path)
+        except FileNotFoundError:
+            return None
+        return (file_stat.st_mtime_ns, file_stat.st_size)
+
+    def refresh(self) -> bool:
+        """ Parse the catalogs file again if it changed since it was last parsed
+
+        Returns:
+            bool: True if the file was parsed again
+        """
+        file_signature = self._get_file_signature()
+        if file_signature == self._file_signature:
+            return False
+        self._file_signature = file_signature
+        self.entries = _parse_catalog_file(self.catalog_file_path) if file_signature is not None else []
+        # Keep the first entry of a duplicated path or uuid, as the compaction of the file does
+        self.path_by_uuid = {}
+        self.uuid_by_path = {}
+        for entry in self.entries:
+            if entry.uuid in self.path_by_uuid or entry.path in self.uuid_by_path:
+                continue
+            self.path_by_uuid[entry.uuid] = entry.path
+            self.uuid_by_path[entry.path] = entry.uuid
+        self._search_index = None
+        return True
+
+    @property
+    def paths(self) -> list[str]:
+        return [entry.path for entry in self.entries]
+
+    def get_catalog_tree_uuids(self, uuid: str) -> set[str]:
+        """ Get the uuids of a catalog and of its descendant catalogs, whose assets the asset browser lists with it
+
+        Args:
+            uuid (str): The catalog uuid
+
+        Returns:
+            set[str]: The catalog uuid and the uuids of its descendants
+        """
+        path = self.path_by_uuid.get(uuid)
+        if path is None:
+            return {uuid}
+        return {uuid} | {entry.uuid for entry in self.entries if entry.path.startswith(f"{path}/")}
+
+    @property
+    def search_index(self) -> CatalogSearchIndex:
+        """ The search index of the catalog paths, built on first use after each parse
+        """
+        if self._search_index is None:
+            self._search_index = CatalogSearchIndex(self.paths)
+        return self._search_index
+
+
+# Catalog models, by catalogs file path
+_catalog_models: dict[str, CatalogModel] = {}
+
+
+def get_catalog_model(library_path: str) -> CatalogModel:
+    """ Get the up to date catalog model of a library
+
+    Args:
+        library_path (str): The library path
+
+    Returns:
+        CatalogModel: The library catalog model
+    """
+    catalog_file_path = get_catalog_file_path(library_path)
+    catalog_model = _catalog_models.get(catalog_file_path)
+    if catalog_model is None:
+        catalog_model = _catalog_models[catalog_file_path] = CatalogModel(catalog_file_path)
+    catalog_model.refresh()
+    return catalog_model
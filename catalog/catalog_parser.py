@@ -1,28 +1,4 @@
-import os
-
-
-BLENDER_ASSET_CATALOGS_FILE_NAME = "blender_assets.cats.txt"
-
-def _parse_catalog_file(file_path: str) -> list:
-    catalogs = []
-    if not os.path.exists(file_path):
-        return []
-    with open(file_path, 'r') as file:
-        for line in file:
-            line = line.strip()  # Remove leading/trailing whitespace
-            # Ignore empty lines and comments
-            if not line or line.startswith('#'):
-                continue
-            if line.startswith('VERSION'):
-                continue
-            # Extract catalog data
-            uuid, path, simple_name = line.split(':')
-            catalogs.append({
-                'uuid': uuid,
-                'path': path,
-                'simple_name': simple_name,
-            })
-    return catalogs
+from .catalog_model import get_catalog_model
 
 
 def parse_library_catalogs(library_path: str):
@@ -35,9 +11,7 @@ def parse_library_catalogs(library_path: str):
         list[dict]: A list of dictionaries containing the catalog entries {'uuid': ... , 'path': ... , 'simple_name': ...}
     
     """
-    catalog_file_path = library_path + "\\" + BLENDER_ASSET_CATALOGS_FILE_NAME
-    catalogs = _parse_catalog_file(catalog_file_path)
-    return catalogs
+    return [entry.as_dict() for entry in get_catalog_model(library_path).entries]
 
 
 def get_path_from_uuid(library_path: str, uuid: str):
@@ -51,8 +25,18 @@ def get_path_from_uuid(library_path: str, uuid: str):
         str: The path associated with the given uuid
     
     """
-    catalogs = parse_library_catalogs(library_path)
-    for catalog in catalogs:
-        if catalog['uuid'] == uuid:
-            return catalog['path']
-    return None
+    return get_catalog_model(library_path).path_by_uuid.get(uuid)
+
+
+def search_catalog_paths(library_path: str, text: str):
+    """ Search the library catalog paths matching a text, by path prefix or by path segment prefix
+
+    Args:
+        library_path (str): Library path to parse the catalogs file from
+        text (str): The searched text, case insensitive
+
+    Returns:
+        list[str]: The matching catalog paths, best matches first
+
+    """
+    return get_catalog_model(library_path).search_index.search(text)
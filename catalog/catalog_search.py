@@ -0,0 +1,66 @@
+from bisect import bisect_left
+
+# Maximum number of catalog paths returned by a search
+CATALOG_SEARCH_LIMIT = 200
+# Character sorted after any catalog path character, bounding the keys starting with a prefix
+_KEY_UPPER_BOUND = "\U0010ffff"
+
+
+class CatalogSearchIndex:
+    """ Sorted index of catalog paths, searched by path prefix and by path segment prefix
+
+        Every path is indexed by its lowercase full path, and by each of its lowercase suffixes starting at a segment,
+        so typing a shot name matches this shot in every sequence. A search is two binary searches, its cost doesn't
+        depend on the number of catalogs.
+    """
+    def __init__(self, paths: list[str]):
+        path_entries = sorted((path.lower(), path) for path in set(paths))
+        segment_entries = sorted(
+            (suffix, path)
+            for path in set(paths)
+            for suffix in _get_segment_suffixes(path.lower())
+        )
+        self._path_keys = [key for key, _ in path_entries]
+        self._path_values = [path for _, path in path_entries]
+        self._segment_keys = [key for key, _ in segment_entries]
+        self._segment_values = [path for _, path in segment_entries]
+
+    def search(self, text: str, limit: int = CATALOG_SEARCH_LIMIT) -> list[str]:
+        """ Search the catalog paths matching a text
+
+        Args:
+            text (str): The searched text, case insensitive
+            limit (int, optional): Maximum number of paths to return. Defaults to CATALOG_SEARCH_LIMIT.
+
+        Returns:
+            list[str]: The matching paths, full path prefix matches first, then segment prefix matches, each sorted
+                alphabetically (so an exact match comes first)
+        """
+        prefix = text.strip().strip('/').lower()
+        results = []
+        found_paths = set()
+        searched_indexes = [(self._path_keys, self._path_values)]
+        if prefix:
+            # Every path already matches an empty text by its full path
+            searched_indexes.append((self._segment_keys, self._segment_values))
+        for keys, values in searched_indexes:
+            index = bisect_left(keys, prefix)
+            end_index = bisect_left(keys, prefix + _KEY_UPPER_BOUND, index)
+            while index < end_index and len(results) < limit:
+                path = values[index]
+                if path not in found_paths:
+                    found_paths.add(path)
+                    results.append(path)
+                index += 1
+        return results
+
+
+def _get_segment_suffixes(path: str) -> list[str]:
+    """ Get the suffixes of a path starting at each of its segments, except the first one
+    """
+    suffixes = []
+    index = path.find('/')
+    while index != -1:
+        suffixes.append(path[index + 1:])
+        index = path.find('/', index + 1)
+    return suffixes
@@ -1,57 +1,177 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import bpy
 import gazu
 import ronaldreglages
 from shot import shot_info_getter
 
+from .abstract_catalog_generaror import AbstractCatalogGenerator
+
+# Delay (in seconds) during which the entry path resolved for an open file is reused
+ENTRY_PATH_CACHE_TTL = 600.0
+# Environment variables overriding the project Zou credentials, e.g. to use the stand-in server offline
+KITSU_HOST_ENV = "ANIMATION_LIBRARY_KITSU_HOST"
+KITSU_USER_ENV = "ANIMATION_LIBRARY_KITSU_USER"
+KITSU_PASSWORD_ENV = "ANIMATION_LIBRARY_KITSU_PASSWORD"
+
+# Authenticated Zou clients of the session, by host and user
+_kitsu_clients: dict[tuple[str, str], gazu.client.KitsuClient] = {}
+# Serializes the Zou requests of the main thread and of the prefetch thread
+_kitsu_lock = threading.Lock()
+
+
+def _get_kitsu_credentials(project_name):
+    host = os.environ.get(KITSU_HOST_ENV)
+    if host:
+        return host, os.environ.get(KITSU_USER_ENV, ""), os.environ.get(KITSU_PASSWORD_ENV, "")
 
-def _connect_to_kitsu(project_name):
     credentials = ronaldreglages.api.get_config(project_name, section='kitsu', config_name="project_config")
     if credentials is None:
         raise ValueError(f"Can't found Zou credentials for '{project_name}'.")
-    host = credentials.get("host")
-    pseudo = credentials.get('user')
-    password = credentials.get('pwd')
+    return credentials.get("host"), credentials.get('user'), credentials.get('pwd')
+
+
+def _connect_to_kitsu(project_name, reconnect=False):
+    """ Get the authenticated Zou client of the project, logged in once per session
+
+    Args:
+        project_name (str): The project name, to get the Zou credentials from
+        reconnect (bool, optional): Log in again, when the session expired. Defaults to False.
+
+    Returns:
+        gazu.client.KitsuClient: The authenticated client
+    """
+    host, pseudo, password = _get_kitsu_credentials(project_name)
+    client = _kitsu_clients.get((host, pseudo))
+    if client is not None and not reconnect:
+        return client
+
     try:
-        client = gazu.client.set_host(host)
-        gazu.log_in(pseudo, password)
+        client = gazu.client.create_client(host)
+        gazu.log_in(pseudo, password, client=client)
     except gazu.exception.RouteNotFoundException:
         raise ConnectionError(f"The URL {host} is not a valid Zou instance API.")
     except gazu.exception.AuthFailedException:
         raise ConnectionError(f"Invalid credentials for target {host}.")
+    _kitsu_clients[(host, pseudo)] = client
     return client
 
 
-class KitsuCatalogGenerator():
+def _fetch_entry_path(shot_info, client):
+    project_name = shot_info["project_name"]
+    episode_name = shot_info["episode_name"]
+    sequence_name = shot_info["sequence_name"]
+    shot_name = shot_info["shot_name"]
+
+    # Retrieve production tracker information
+    project = gazu.project.get_project_by_name(project_name, client=client)
+    episode = gazu.shot.get_episode_by_name(project, episode_name, client=client)
+    sequence = gazu.shot.get_sequence_by_name(project, sequence_name, episode, client=client)
+    shot = gazu.shot.get_shot_by_name(sequence, shot_name, client=client) if sequence is not None else None
+    if shot is None:
+        raise ValueError(f"Can't found shot '{sequence_name}/{shot_name}' of '{project_name}' in Zou.")
+
+    sequence_description = ''
+
+    # Try to get first the description from the shot_data
+    # TODO: Ask the production to stop using the shot description in the shot_data
+    shot_data = shot.get('data')
+    if shot_data is not None and 'description' in shot_data:
+        shot_description = shot_data.get('description')
+    elif shot.get('description'):
+        shot_description = shot.get('description', '')
+    else:
+        shot_description = shot_name
+
+    sequence_description = sequence.get('description') or ''
+    if sequence_description == '':
+        sequence_description = sequence_name
+
+    return f"{sequence_description}/{shot_description}"
+
+
+def resolve_entry_path(shot_info):
+    """ Get the catalog path of a shot from Zou, reconnecting once if the session expired
+
+    Args:
+        shot_info (dict): The shot scene info, with the project, episode, sequence and shot names
+
+    Returns:
+        str: The catalog path, "sequence/shot"
+    """
+    with _kitsu_lock:
+        client = _connect_to_kitsu(shot_info["project_name"])
+        try:
+            return _fetch_entry_path(shot_info, client)
+        except gazu.exception.NotAuthenticatedException:
+            client = _connect_to_kitsu(shot_info["project_name"], reconnect=True)
+            return _fetch_entry_path(shot_info, client)
+
+
+class KitsuCatalogGenerator(AbstractCatalogGenerator):
+    """ Generate the catalog path of the open shot from Zou
+
+        The entry path of an open file is resolved once, then reused for ENTRY_PATH_CACHE_TTL seconds. It is resolved
+        in the background when the file is opened, so creating assets doesn't wait for Zou.
+    """
+    def __init__(self):
+        # Resolution time and entry path, by open file path
+        self._entry_paths: dict[str, tuple[float, str]] = {}
+        # Background resolution of the open file entry path
+        self._prefetches: dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kitsu_catalog_prefetch")
+
+    def _get_cached_entry_path(self, file_key):
+        cached_entry_path = self._entry_paths.get(file_key)
+        if cached_entry_path is None:
+            return None
+        resolution_time, entry_path = cached_entry_path
+        if time.monotonic() - resolution_time > ENTRY_PATH_CACHE_TTL:
+            return None
+        return entry_path
+
+    def _resolve_entry_path(self, file_key, shot_info):
+        entry_path = resolve_entry_path(shot_info)
+        self._entry_paths[file_key] = (time.monotonic(), entry_path)
+        return entry_path
+
     def generate_entry_path(self)->str:
         """ Generate a path for a new entry
         """
-        shot_info = shot_info_getter.get_shot_scene_info()
-        project_name = shot_info["project_name"]
-        episode_name = shot_info["episode_name"]
-        sequence_name = shot_info["sequence_name"]
-        shot_name = shot_info["shot_name"]
-
-        _connect_to_kitsu(project_name=shot_info["project_name"])
-
-        # Retrieve production tracker information
-        project = gazu.project.get_project_by_name(project_name)
-        episode = gazu.shot.get_episode_by_name(project, episode_name)
-        sequence = gazu.shot.get_sequence_by_name(project, sequence_name, episode) 
-        shot = gazu.shot.get_shot_by_name(sequence, shot_name)
-
-        sequence_description = ''
-
-        # Try to get first the description from the shot_data
-        # TODO: Ask the production to stop using the shot description in the shot_data
-        shot_data = shot.get('data')
-        if shot_data is not None and 'description' in shot_data:
-            shot_description = shot_data.get('description')
-        elif shot['description'] != '': 
-            shot_description = shot.get('description', '')
-        else:
-            shot_description = shot_name
-
-        sequence_description = sequence.get('description', '')
-        if sequence_description == '':
-            sequence_description = sequence_name
-
-        return f"{sequence_description}/{shot_description}"
\ No newline at end of file
+        file_key = bpy.data.filepath
+        entry_path = self._get_cached_entry_path(file_key)
+        if entry_path is not None:
+            return entry_path
+
+        # Wait for the prefetch of the open file, if any
+        prefetch = self._prefetches.pop(file_key, None)
+        if prefetch is not None:
+            try:
+                return prefetch.result()
+            except Exception as e:
+                logging.warning(f"Catalog path prefetch failed, retrying: {e}")
+
+        return self._resolve_entry_path(file_key, shot_info_getter.get_shot_scene_info())
+
+    def prefetch(self):
+        """ Resolve the entry path of the open file in the background
+        """
+        file_key = bpy.data.filepath
+        if not file_key or self._get_cached_entry_path(file_key) is not None:
+            return
+        prefetch = self._prefetches.get(file_key)
+        if prefetch is not None and not prefetch.done():
+            return
+
+        # The shot info is read from the open file, in the main thread
+        try:
+            shot_info = shot_info_getter.get_shot_scene_info()
+        except Exception as e:
+            logging.warning(f"Can't prefetch the catalog path of {file_key}: {e}")
+            return
+        # Only the open file prefetch is kept
+        self._prefetches = {file_key: self._executor.submit(self._resolve_entry_path, file_key, shot_info)}
@@ -0,0 +1,205 @@
+""" Local stand-in for the Zou API routes used by the Kitsu catalog generator, served from a JSON file.
+
+    Used to create assets offline, or to test the catalog generation without a production tracker:
+
+        python kitsu_standin_server.py --data production.json --port 8380
+
+    Then point the add-on to it before starting Blender:
+
+        ANIMATION_LIBRARY_KITSU_HOST=http://localhost:8380/api
+
+    The JSON file lists the production entities, parents being referenced by their ids:
+
+        {
+            "users": [{"email": "animator@studio.com", "password": "secret"}],
+            "projects": [{"id": "p1", "name": "Project"}],
+            "episodes": [{"id": "e1", "project_id": "p1", "name": "E01"}],
+            "sequences": [{"id": "s1", "project_id": "p1", "parent_id": "e1", "name": "SQ010", "description": ""}],
+            "shots": [{"id": "h1", "project_id": "p1", "parent_id": "s1", "name": "SH0010", "description": ""}]
+        }
+
+    Without users, any credentials are accepted.
+"""
+import argparse
+import json
+import logging
+import secrets
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+logging.basicConfig(level=logging.INFO)
+
+API_PREFIX = "/api/"
+# Data routes, by collection of the JSON file
+DATA_ROUTES = {
+    "data/projects": "projects",
+    "data/episodes": "episodes",
+    "data/sequences": "sequences",
+    "data/shots": "shots",
+    "data/shots/all": "shots",
+}
+# Query filters naming the parent entity, stored as parent_id
+PARENT_FILTERS = ("episode_id", "sequence_id")
+
+
+def _filter_entities(entities: list[dict], filters: dict) -> list[dict]:
+    """ Get the entities matching every query filter, compared as strings
+    """
+    matching_entities = []
+    for entity in entities:
+        for key, value in filters.items():
+            if key in PARENT_FILTERS and key not in entity:
+                key = "parent_id"
+            if str(entity.get(key)) != value:
+                break
+        else:
+            matching_entities.append(entity)
+    return matching_entities
+
+
+class KitsuStandInRequestHandler(BaseHTTPRequestHandler):
+    """ Serve the production data of the server, to the clients logged in
+    """
+    server: "KitsuStandInServer"
+
+    def _send_json(self, status: int, content):
+        body = json.dumps(content).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _get_route(self) -> tuple[str, dict]:
+        url = urlsplit(self.path)
+        if not url.path.startswith(API_PREFIX):
+            return None, {}
+        return url.path[len(API_PREFIX):].strip("/"), dict(parse_qsl(url.query))
+
+    def _is_authenticated(self) -> bool:
+        authorization = self.headers.get("Authorization", "")
+        return authorization.startswith("Bearer ") and authorization[len("Bearer "):] in self.server.tokens
+
+    def do_POST(self):
+        route, _ = self._get_route()
+        if route != "auth/login":
+            self._send_json(404, {"message": f"Route {self.path} not found"})
+            return
+
+        content_length = int(self.headers.get("Content-Length", 0))
+        credentials = json.loads(self.rfile.read(content_length) or b"{}")
+        if not self.server.check_credentials(credentials.get("email"), credentials.get("password")):
+            self._send_json(401, {"login": False})
+            return
+
+        token = secrets.token_hex(16)
+        self.server.tokens.add(token)
+        self._send_json(200, {
+            "login": True,
+            "user": {"email": credentials.get("email")},
+            "access_token": token,
+            "refresh_token": token,
+        })
+
+    def do_GET(self):
+        route, filters = self._get_route()
+        if route == "auth/authenticated":
+            if self._is_authenticated():
+                self._send_json(200, {"authenticated": True})
+            else:
+                self._send_json(401, {"authenticated": False})
+            return
+
+        collection = DATA_ROUTES.get(route)
+        if collection is None:
+            # Single entity routes, e.g. data/shots/<id>
+            collection_route, _, entity_id = route.rpartition("/")
+            collection = DATA_ROUTES.get(collection_route)
+            filters = {"id": entity_id}
+            if collection is None:
+                self._send_json(404, {"message": f"Route {self.path} not found"})
+                return
+        if not self._is_authenticated():
+            self._send_json(401, {"message": "Missing or invalid access token"})
+            return
+
+        entities = _filter_entities(self.server.data.get(collection, []), filters)
+        if "id" in filters and route not in DATA_ROUTES:
+            if not entities:
+                self._send_json(404, {"message": f"Entity {filters['id']} not found"})
+            else:
+                self._send_json(200, entities[0])
+            return
+        self._send_json(200, entities)
+
+    def log_message(self, format, *args):
+        logging.debug(format % args)
+
+
+class KitsuStandInServer(ThreadingHTTPServer):
+    """ HTTP server answering the Zou routes from production data
+
+    Args:
+        data (dict): The production data, by collection
+        address (tuple[str, int]): The server host and port, port 0 picking a free port
+    """
+    daemon_threads = True
+
+    def __init__(self, data: dict, address: tuple[str, int] = ("localhost", 0)):
+        super().__init__(address, KitsuStandInRequestHandler)
+        self.data = data
+        self.tokens = set()
+
+    @property
+    def url(self) -> str:
+        """ The API url to give to the Zou client
+        """
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def check_credentials(self, email: str, password: str) -> bool:
+        users = self.data.get("users")
+        if not users:
+            return True
+        return any(user.get("email") == email and user.get("password") == password for user in users)
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Serve production data with the Zou API routes used by the add-on")
+    parser.add_argument(
+        "--data",
+        help="JSON file containing the production users, projects, episodes, sequences and shots",
+        type=str,
+        required=True
+    )
+    parser.add_argument(
+        "--host",
+        help="Host to listen on",
+        type=str,
+        default="localhost"
+    )
+    parser.add_argument(
+        "--port",
+        help="Port to listen on",
+        type=int,
+        default=8380
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    with open(args.data, "r", encoding="utf-8") as data_file:
+        data = json.load(data_file)
+    with KitsuStandInServer(data, (args.host, args.port)) as server:
+        logging.info(f"Zou stand-in server listening on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -89,6 +89,112 @@ def thumbnail_settings(context: bpy.types.Context):
         space3d.overlay.show_overlays = True
 
 
+def get_object_dependencies(objects: list[bpy.types.Object]) -> set[bpy.types.Object]:
+    """Get the objects needed to evaluate and draw the given objects.
+
+    Includes the objects themselves, their parent chains, and the targets of their constraints, bone constraints,
+    modifiers and drivers. Children, and objects deformed through a modifier, are only included for the given objects
+    and the objects they own that way (such as the meshes deformed by an armature): the other children of a shared
+    parent, such as a set root, aren't needed.
+
+    Args:
+        objects (list[bpy.types.Object]): The objects to get the dependencies of
+
+    Returns:
+        set[bpy.types.Object]: The objects and their dependencies
+    """
+    # Objects deformed by other objects, such as meshes with an armature modifier
+    deformed_objects = {}
+    for scene_object in bpy.context.scene.objects:
+        for modifier in scene_object.modifiers:
+            if getattr(modifier, "object", None) is not None:
+                deformed_objects.setdefault(modifier.object, []).append(scene_object)
+
+    dependencies = set()
+    # Objects whose children and deformed objects have been added
+    owner_objects = set()
+    # Objects to add, with whether their children and deformed objects are added too
+    pending = [(obj, True) for obj in objects]
+    while pending:
+        obj, add_owned = pending.pop()
+        if obj is None or obj in owner_objects or (obj in dependencies and not add_owned):
+            continue
+        if add_owned:
+            owner_objects.add(obj)
+            pending.extend((child, True) for child in obj.children)
+            pending.extend((deformed_object, True) for deformed_object in deformed_objects.get(obj, []))
+        if obj in dependencies:
+            continue
+        dependencies.add(obj)
+        pending.append((obj.parent, False))
+        pending.extend((getattr(constraint, "target", None), False) for constraint in obj.constraints)
+        pending.extend((getattr(modifier, "object", None), False) for modifier in obj.modifiers)
+        if obj.pose is not None:
+            for pose_bone in obj.pose.bones:
+                pending.extend((getattr(constraint, "target", None), False) for constraint in pose_bone.constraints)
+        if obj.animation_data is not None:
+            for driver in obj.animation_data.drivers:
+                for variable in driver.driver.variables:
+                    pending.extend(
+                        (target.id, False) for target in variable.targets if isinstance(target.id, bpy.types.Object)
+                    )
+    return dependencies
+
+
+@contextlib.contextmanager
+def isolated_capture_settings(context: bpy.types.Context, objects: list[bpy.types.Object]):
+    """Temporarily evaluate and draw only the given objects and their dependencies, with simplified settings.
+
+    The objects are linked to a temporary collection, the only one included in a temporary view layer. The objects
+    of the view layer outside of the dependencies, such as the ones linked to the scene collection, are hidden in it,
+    and the dependencies keep their visibility of the original view layer. The scene is simplified and the viewport
+    drawn with the solid shading.
+
+    Args:
+        context (bpy.types.Context): Context of the 3D viewport to capture
+        objects (list[bpy.types.Object]): The objects to capture
+    """
+    scene = context.scene
+    window = context.window
+    space3d = context.space_data
+    render = scene.render
+    original_view_layer = window.view_layer
+    original_shading_type = space3d.shading.type
+    original_simplify = (render.use_simplify, render.simplify_subdivision, render.simplify_child_particles)
+
+    dependencies = get_object_dependencies(objects)
+    capture_collection = bpy.data.collections.new("AssetCaptureCollection")
+    scene.collection.children.link(capture_collection)
+    for obj in dependencies:
+        capture_collection.objects.link(obj)
+    capture_view_layer = scene.view_layers.new("AssetCaptureViewLayer")
+
+    try:
+        for layer_collection in capture_view_layer.layer_collection.children:
+            layer_collection.exclude = layer_collection.collection != capture_collection
+        # Objects of the scene collection can't be excluded, and a new view layer shows every object
+        original_hidden_objects = {
+            obj for obj in original_view_layer.objects
+            if obj in dependencies and obj.hide_get(view_layer=original_view_layer)
+        }
+        for obj in capture_view_layer.objects:
+            obj.hide_set(obj not in dependencies or obj in original_hidden_objects, view_layer=capture_view_layer)
+        window.view_layer = capture_view_layer
+        render.use_simplify = True
+        render.simplify_subdivision = min(render.simplify_subdivision, 1)
+        render.simplify_child_particles = 0.0
+        space3d.shading.type = 'SOLID'
+
+        yield
+
+    finally:
+        space3d.shading.type = original_shading_type
+        render.use_simplify, render.simplify_subdivision, render.simplify_child_particles = original_simplify
+        window.view_layer = original_view_layer
+        scene.view_layers.remove(capture_view_layer)
+        bpy.data.collections.remove(capture_collection)
+
+
 @contextlib.contextmanager
 def active_asset(action):
     areas = [area for window in bpy.context.window_manager.windows for area in window.screen.areas if area.ui_type == 'ASSETS']
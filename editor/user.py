@@ -2,63 +2,141 @@ import bpy
 from copy import copy
 import getpass
 import json
+import logging
 import os
+import time
 
 FILE_NAME = "users_rights.json"
+# Delay (in seconds) during which the rights of a library are used without checking if the rights file changed
+USERS_RIGHTS_REVALIDATION_DELAY = 5.0
 
 def _get_users_rights_file():
     added_libaries = [library.name for library in bpy.context.preferences.filepaths.asset_libraries]
     asset_library_ref = bpy.context.area.spaces.active.params.asset_library_ref
-    if asset_library_ref not in added_libaries: 
+    if asset_library_ref not in added_libaries:
         return ""
     library_path = copy(bpy.context.preferences.filepaths.asset_libraries.get(asset_library_ref).path).replace('\\', '/')
     return f"{library_path}/{FILE_NAME}"
 
-def _load_rights_config():
-    users_rights_file = _get_users_rights_file()
-    if not os.path.exists(users_rights_file):
-        return {}
-    with open(users_rights_file, 'r') as file:
-        data = json.load(file)
-        return data
-
-def _get_config_field (key: str) -> list:
-    data = _load_rights_config().get(key)
-    if not data:
-        return []
-    else:
-        return data
-
-def _get_super_usernames() -> list:
-    return _get_config_field('super_users')
-    
-def _get_creators() -> list:
-    return _get_config_field('creators')
+
+class UsersRightsModel:
+    """ In memory model of a library rights file, with the lowercase usernames of each role
+
+        The file modification time and size are checked at most every USERS_RIGHTS_REVALIDATION_DELAY seconds, the
+        file being parsed again only when they changed.
+    """
+    def __init__(self, users_rights_file: str):
+        self.users_rights_file = users_rights_file
+        self.super_users: frozenset[str] = frozenset()
+        self.creators: frozenset[str] = frozenset()
+        # Modification time and size of the parsed file, None when it doesn't exist, () when not parsed yet
+        self._file_signature = ()
+        self._revalidation_time = None
+
+    @property
+    def exists(self) -> bool:
+        return self._file_signature is not None
+
+    def _get_file_signature(self) -> tuple[int, int]:
+        try:
+            file_stat = os.stat(self.users_rights_file)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return (file_stat.st_mtime_ns, file_stat.st_size)
+
+    def _parse(self):
+        data = {}
+        if self._file_signature is not None:
+            try:
+                with open(self.users_rights_file, 'r') as file:
+                    data = json.load(file)
+            except (OSError, ValueError) as e:
+                logging.error(f"Can't read the rights file {self.users_rights_file}: {e}")
+                # Read it again on the next revalidation
+                self._file_signature = ()
+                return
+        self.super_users = frozenset(username.lower() for username in data.get('super_users') or [])
+        self.creators = frozenset(username.lower() for username in data.get('creators') or [])
+
+    def refresh(self, force: bool = False) -> bool:
+        """ Parse the rights file again if it changed, checked at most every USERS_RIGHTS_REVALIDATION_DELAY seconds
+
+        Args:
+            force (bool, optional): Check the file even if it was checked recently. Defaults to False.
+
+        Returns:
+            bool: True if the file was parsed again
+        """
+        now = time.monotonic()
+        if (
+            not force
+            and self._revalidation_time is not None
+            and now - self._revalidation_time < USERS_RIGHTS_REVALIDATION_DELAY
+        ):
+            return False
+        self._revalidation_time = now
+
+        file_signature = self._get_file_signature()
+        if file_signature == self._file_signature:
+            return False
+        self._file_signature = file_signature
+        self._parse()
+        return True
+
+
+# Users rights models, by rights file path
+_users_rights_models: dict[str, UsersRightsModel] = {}
+
+
+def get_users_rights_model(users_rights_file: str = None) -> UsersRightsModel:
+    """ Get the up to date rights model of a library
+
+    Args:
+        users_rights_file (str, optional): The rights file path. Defaults to the one of the active library.
+
+    Returns:
+        UsersRightsModel: The library rights model
+    """
+    if users_rights_file is None:
+        users_rights_file = _get_users_rights_file()
+    users_rights_model = _users_rights_models.get(users_rights_file)
+    if users_rights_model is None:
+        users_rights_model = _users_rights_models[users_rights_file] = UsersRightsModel(users_rights_file)
+    users_rights_model.refresh()
+    return users_rights_model
+
+
+def _get_current_username() -> str:
+    return getpass.getuser().lower()
 
 def is_super_user() -> bool:
-    return getpass.getuser().lower() in _get_super_usernames()
+    return _get_current_username() in get_users_rights_model().super_users
 
 def author_is_current_user(author: str) -> bool:
-    return author.lower() == getpass.getuser().lower()
+    return author.lower() == _get_current_username()
 
 def is_creator() -> bool:
-    return getpass.getuser().lower() in _get_creators()
+    return _get_current_username() in get_users_rights_model().creators
 
 def can_edit(author: str) -> bool:
-    return (is_super_user() or author_is_current_user(author)) or not rights_file_exists()
+    users_rights_model = get_users_rights_model()
+    if not users_rights_model.exists:
+        return True
+    return _get_current_username() in users_rights_model.super_users or author_is_current_user(author)
 
 def can_create() -> bool:
-    return (is_super_user() or is_creator()) or not rights_file_exists()
+    users_rights_model = get_users_rights_model()
+    if not users_rights_model.exists:
+        return True
+    username = _get_current_username()
+    return username in users_rights_model.super_users or username in users_rights_model.creators
 
 def rights_file_exists() -> bool:
-    users_rights_file = _get_users_rights_file()
-    if not os.path.exists(users_rights_file):
-        return False
-    return True
-    
+    return get_users_rights_model().exists
+
 def rights_file_not_found_warning():
     added_libaries = [library.name for library in bpy.context.preferences.filepaths.asset_libraries]
     asset_library_ref = bpy.context.area.spaces.active.params.asset_library_ref
-    if asset_library_ref not in added_libaries: 
+    if asset_library_ref not in added_libaries:
         return f"{asset_library_ref} selected (please selected a bank)"
-    return f"Rights file not found: {_get_users_rights_file()}"
\ No newline at end of file
+    return f"Rights file not found: {_get_users_rights_file()}"
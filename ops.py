@@ -1,3 +1,4 @@
+import contextlib
 import getpass
 import logging
 import os
@@ -9,12 +10,14 @@ import bpy
 from .asset import asset_editor
 from .asset.asset_metadata import AssetMetadata, update_asset_metadata
 from .asset.asset_type import AssetType, get_asset_type
+from .asset.edit_queue import asset_edit_queue
 from .catalog import catalog_editor
 from .catalog.catalog_parser import get_path_from_uuid
 from .context import (active_asset, bones_selected, get_viewport_context,
-                      local_asset_library_context, thumbnail_settings)
-from .editor.user import (can_create, can_edit, rights_file_exists,
-                          rights_file_not_found_warning)
+                      isolated_capture_settings, local_asset_library_context,
+                      thumbnail_settings)
+from .editor.user import (can_create, can_edit, is_super_user,
+                          rights_file_exists, rights_file_not_found_warning)
 from .importer.action_importer import blend_action
 from .prefs import get_preferences
 from .preview import overlay, thumbnail
@@ -204,6 +207,26 @@ def apply_multi_selection_asset(context, apply_method):
                 apply_single_asset(context, apply_method, applied_action)
 
 
+# Time (in seconds) spent capturing preview frames per timer event, and interval between the timer events
+CAPTURE_TICK_BUDGET = 0.05
+CAPTURE_TICK_INTERVAL = 0.01
+# Events passed to Blender during the capture, to navigate in the viewports. The other events are blocked, so the
+# created assets, their rigs and the capture scene can't be edited, deleted or undone while they are captured
+CAPTURE_NAVIGATION_EVENTS = {
+    'MOUSEMOVE',
+    'INBETWEEN_MOUSEMOVE',
+    'WHEELUPMOUSE',
+    'WHEELDOWNMOUSE',
+    'MIDDLEMOUSE',
+    'TRACKPADPAN',
+    'TRACKPADZOOM',
+    'MOUSEROTATE',
+    'MOUSESMARTZOOM',
+    'NDOF_MOTION',
+    'WINDOW_DEACTIVATE',
+}
+
+
 class ASSETLIB_OP_CreateAsset(bpy.types.Operator):
     bl_idname = "object.create_asset"
     bl_label = "Create asset"
@@ -262,18 +285,104 @@ class ASSETLIB_OP_CreateAsset(bpy.types.Operator):
                     return False
         return True
 
+    def invoke(self, context, event):
+        if not self.begin_creation(context):
+            return {'CANCELLED'}
+        if self._preview_capture is None:
+            return self.finish_creation()
+
+        # Capture the preview frames on timer events, the UI stays responsive between them
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(CAPTURE_TICK_INTERVAL, window=context.window)
+        wm.progress_begin(0, self._preview_capture.frames_total)
+        wm.modal_handler_add(self)
+        self._workspace = context.workspace
+        self.update_progress()
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.cancel(context)
+            self.report({'WARNING'}, "Asset creation cancelled")
+            return {'CANCELLED'}
+        if event.type in CAPTURE_NAVIGATION_EVENTS:
+            return {'PASS_THROUGH'}
+        if event.type != 'TIMER':
+            return {'RUNNING_MODAL'}
+
+        if not self.new_assets_are_valid():
+            self.cancel(context)
+            self.report({'ERROR'}, "Created assets were removed during the preview capture, asset not created")
+            return {'CANCELLED'}
+        try:
+            is_captured = self.capture_preview_frames(CAPTURE_TICK_BUDGET)
+        except Exception as e:
+            logging.error(f"Preview capture failed: {e}")
+            self.cancel(context)
+            self.report({'ERROR'}, "Preview capture failed, asset not created")
+            return {'CANCELLED'}
+        if not is_captured:
+            self.update_progress()
+            return {'RUNNING_MODAL'}
+
+        self.end_progress(context)
+        return self.finish_creation()
+
     def execute(self, context):
+        if not self.begin_creation(context):
+            return {'CANCELLED'}
+        try:
+            self.capture_preview_frames()
+        except Exception:
+            self.cancel(context)
+            raise
+        return self.finish_creation()
+
+    def cancel(self, context):
+        self.end_progress(context)
+        if self._preview_capture is not None:
+            self._preview_capture.free()
+        if self.new_assets_are_valid():
+            for new_asset in self._new_assets.values():
+                bpy.data.actions.remove(new_asset)
+        self._new_assets = {}
+        self._exit_stack.close()
+
+    def new_assets_are_valid(self) -> bool:
+        """ Check the created assets still are the actions of the file, and were not freed
+        """
+        for new_asset in self._new_assets.values():
+            try:
+                if bpy.data.actions.get(new_asset.name) != new_asset:
+                    return False
+            except ReferenceError:
+                return False
+        return True
+
+    def begin_creation(self, context) -> bool:
+        """ Create the assets in the current file and start capturing their previews.
+
+            The capture settings are kept in an exit stack until the creation is finished or cancelled.
+
+        Returns:
+            bool: False if the assets could not be created
+        """
         asset_metadata = bpy.context.window_manager.new_asset_metadata
-        library_path = None
         asset_library_ref = context.area.spaces.active.params.asset_library_ref
-        library_path = copy(context.preferences.filepaths.asset_libraries.get(asset_library_ref).path)
-        asset_file_path = None
+        self._library_path = copy(context.preferences.filepaths.asset_libraries.get(asset_library_ref).path)
+        self._new_assets = {}
+        self._preview_capture = None
+        self._timer = None
         window, screen, area3d, region3d, space3d = get_viewport_context()
-        with (
-            local_asset_library_context(),
-            bpy.context.temp_override(window=window,screen=screen,area=area3d,region=region3d,space_data=space3d),
-            thumbnail_settings(context)
-            ):
+        self._viewport_override = dict(window=window, screen=screen, area=area3d, region=region3d, space_data=space3d)
+
+        self._exit_stack = contextlib.ExitStack()
+        self._exit_stack.enter_context(local_asset_library_context())
+        with bpy.context.temp_override(**self._viewport_override):
+            self._exit_stack.enter_context(thumbnail_settings(bpy.context))
+            # The preview capture changes the current frame, restore it once done
+            scene = context.scene
+            self._exit_stack.callback(setattr, scene, "frame_current", scene.frame_current)
             range_start=asset_metadata.range_start if asset_metadata.range_start != -1 else context.scene.frame_start
             range_end=asset_metadata.range_end if asset_metadata.range_end != -1 else context.scene.frame_end
             match asset_metadata.export_type:
@@ -287,23 +396,59 @@ class ASSETLIB_OP_CreateAsset(bpy.types.Operator):
                         range_end, 
                         -asset_metadata.range_start)
                 case _:
-                    return {'CANCELLED'}
-            
-            for key, value in new_assets.items():
-                if value is None:
-                    self.report({'ERROR'}, f"Asset {value} not created")
-                    return {'CANCELLED'}
+                    new_assets = None
+
+            if not isinstance(new_assets, dict):
+                self._exit_stack.close()
+                return False
+            self._new_assets = {key: value for key, value in new_assets.items() if value is not None}
+            if len(self._new_assets) != len(new_assets):
+                self.report({'ERROR'}, f"Assets {[key for key, value in new_assets.items() if value is None]} not created")
+                self.cancel(context)
+                return False
+
+            self.start_capture(bpy.context, range_start, range_end)
+        return True
+
+    def capture_preview_frames(self, time_budget: float = None) -> bool:
+        """ Capture the next animation preview frames
+
+        Args:
+            time_budget (float, optional): The time (in seconds) after which no new frame is captured.
+                Defaults to None, capturing every remaining frame.
+
+        Returns:
+            bool: True if every frame has been captured
+        """
+        if self._preview_capture is None:
+            return True
+        with bpy.context.temp_override(**self._viewport_override):
+            return self._preview_capture.capture(bpy.context, time_budget)
+
+    def finish_creation(self):
+        """ Store the captured previews in the created assets and publish them in the asset library
+        """
+        asset_metadata = bpy.context.window_manager.new_asset_metadata
+        library_path = self._library_path
+        with self._exit_stack, bpy.context.temp_override(**self._viewport_override):
+            # The viewport is captured once, the previews are shared by all the created assets
+            if self._preview_capture is not None:
+                # The last captured frame of the animation is reused as the still preview
+                animation_preview, still_pixels = self._preview_capture.finish()
+            else:
+                animation_preview, still_pixels = None, thumbnail.capture_preview(bpy.context)
+
+            # Create the asset catalog and its parents, shared by all the created assets
+            catalog_uuid = None
+            prefs = get_preferences()
+            if prefs.catalog_generator:
+                entry_path = prefs.catalog_generator.generate_entry_path()
+                catalog_uuid = catalog_editor.ensure_entries([entry_path], library_path)[entry_path]
+
+            for key, value in self._new_assets.items():
                 # Generate the asset preview
-                self.generate_thumbnail(context,value,range_start,range_end)
+                self.generate_thumbnail(bpy.context, value, animation_preview, still_pixels)
                 
-                # Create the asset catalog
-                catalog_uuid = None
-                prefs = get_preferences()
-                if prefs.catalog_generator:
-                    entry_path = prefs.catalog_generator.generate_entry_path()
-                    catalog_parent_path = entry_path.split('/')[0]
-                    catalog_editor.add_entry(catalog_parent_path, library_path)
-                    catalog_uuid = catalog_editor.add_entry(entry_path, library_path)
                 asset_file_path = f'{library_path}\\{key}.blend'
                 armature = value.asset_data["armature"]
                 
@@ -322,11 +467,44 @@ class ASSETLIB_OP_CreateAsset(bpy.types.Operator):
                 
                 # clean up
                 bpy.data.actions.remove(value)
+            self._new_assets = {}
 
         # Refresh the asset library
         bpy.ops.asset.library_refresh()
         return {'FINISHED'}
 
+    def start_capture(self, context, range_start, range_end):
+        """ Start capturing the animation preview of the created assets, if enabled
+        """
+        asset_metadata = bpy.context.window_manager.new_asset_metadata
+        if not asset_metadata.generate_preview or asset_metadata.export_type != "ANIMATION":
+            return
+        armatures = [obj for obj in context.selected_objects if obj.type == 'ARMATURE']
+        if asset_metadata.isolate_preview and armatures:
+            self._exit_stack.enter_context(isolated_capture_settings(context, armatures))
+        self._preview_capture = thumbnail.AnimationPreviewCapture(
+            frame_range=(range_start, range_end),
+            encoding=get_preferences().preview_encoding
+        )
+
+    def update_progress(self):
+        frames_captured = self._preview_capture.frames_captured
+        frames_total = self._preview_capture.frames_total
+        bpy.context.window_manager.progress_update(frames_captured)
+        self._workspace.status_text_set(
+            f"Capturing animation preview: frame {frames_captured}/{frames_total}, "
+            "editing is disabled until done (Esc to cancel)"
+        )
+
+    def end_progress(self, context):
+        if self._timer is None:
+            return
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        self._workspace.status_text_set(None)
+        self._timer = None
+
     @property
     def asset_metadata():
         return bpy.context.window_manager.new_asset_metadata
@@ -339,19 +517,15 @@ class ASSETLIB_OP_CreateAsset(bpy.types.Operator):
                 controllers.add(match.group(1))
         return len(controllers)
     
-    def generate_thumbnail(self,context,asset,range_start,range_end):
+    def generate_thumbnail(self, context, asset, animation_preview, still_pixels):
         asset_metadata = bpy.context.window_manager.new_asset_metadata
-        if asset_metadata.generate_preview and asset_metadata.export_type == "ANIMATION":
-            # Generate the asset preview
-            thumbnail.asset_generate_animation_preview(
-                asset,
-                context,
-                frame_range=(range_start, range_end)
-            )
+        if animation_preview is not None:
+            thumbnail.store_animation_preview(asset, animation_preview)
 
         thumbnail.asset_generate_preview(
             asset,
-            context
+            context,
+            preview_pixels=still_pixels
         )
 
         # Add overlay
@@ -576,6 +750,31 @@ def remove_asset_validation():
     bpy.context.window_manager.popup_menu(draw, title="Remove Asset", icon='INFO')
 
 
+class ASSETLIB_OP_CompactCatalog(bpy.types.Operator):
+    """Rewrite the catalogs file of the library without its duplicated entries"""
+    bl_idname = "assetlib.compact_catalog"
+    bl_label = "Compact catalogs"
+
+    @classmethod
+    def poll(cls, context):
+        if context.area is None or context.area.ui_type != 'ASSETS':
+            return False
+        if context.area.spaces.active.params.asset_library_ref in ASSET_LIBRARIES_TO_IGNORE:
+            return False
+        return is_super_user()
+
+    def execute(self, context):
+        try:
+            removed_entries = catalog_editor.compact_catalog(_get_active_library_path(context))
+        except (OSError, TimeoutError) as e:
+            logging.error(f"Can't compact the catalogs file: {e}")
+            self.report({'ERROR'}, f"Can't compact the catalogs file: {e}")
+            return {'CANCELLED'}
+        bpy.ops.asset.library_refresh()
+        self.report({'INFO'}, f"Catalogs file compacted, {removed_entries} duplicated entries removed")
+        return {'FINISHED'}
+
+
 class ASSETLIB_OP_EditActiveAssetMetadata(bpy.types.Operator):
     bl_idname = "assetlib.edit_active_asset"
     bl_label = "Edit asset"
@@ -634,7 +833,7 @@ class ASSETLIB_OP_EditActiveAssetMetadata(bpy.types.Operator):
                     if datapath == 'asset_data.tags':
                         field_value = ",".join([item.name for item in field_value])
                     if datapath == 'asset_data.catalog_id':
-                        field_value = catalog_editor.add_entry(field_value, library_path)
+                        field_value = catalog_editor.ensure_entries([field_value], library_path)[field_value]
                     fields_to_commit.append((datapath, field_value))                    
 
                 if asset.local_id is not None:
@@ -644,8 +843,9 @@ class ASSETLIB_OP_EditActiveAssetMetadata(bpy.types.Operator):
                         fields_to_commit
                     )
                 else:
+                    # The file is saved in background, the asset browser is refreshed once saved
                     asset_filepath = bpy.types.AssetHandle.get_full_library_path(asset_file_handle=asset)
-                    asset_editor.set_shared_asset_properties(
+                    asset_edit_queue.submit_edit(
                         asset_filepath,
                         asset.name,
                         asset.id_type,
@@ -683,6 +883,76 @@ class ASSETLIB_OP_EditActiveAssetMetadata(bpy.types.Operator):
         cls._handler = None
 
 
+def _split_tags(tags: str) -> list[str]:
+    return [tag.strip() for tag in tags.split(',') if tag.strip()]
+
+
+class ASSETLIB_OP_BatchEditAssetsMetadata(bpy.types.Operator):
+    """Edit the catalog and the tags of the selected assets"""
+    bl_idname = "assetlib.batch_edit_assets"
+    bl_label = "Edit selected assets"
+
+    @classmethod
+    def poll(cls, context):
+        selected_assets = context.selected_asset_files
+        if not selected_assets or context.area.ui_type != 'ASSETS':
+            return False
+        return all(can_edit(asset.asset_data.author) for asset in selected_assets)
+
+    def invoke(self, context, event):
+        batch_fields = context.window_manager.batch_edited_asset_metadata
+        batch_fields.catalog = ""
+        batch_fields.add_tags = ""
+        batch_fields.remove_tags = ""
+        return context.window_manager.invoke_props_dialog(self)
+
+    def draw(self, context):
+        batch_fields = context.window_manager.batch_edited_asset_metadata
+        layout = self.layout
+        layout.label(text=f"{len(context.selected_asset_files)} selected assets")
+        layout.prop(batch_fields, "catalog")
+        layout.prop(batch_fields, "add_tags")
+        layout.prop(batch_fields, "remove_tags")
+
+    def execute(self, context):
+        batch_fields = context.window_manager.batch_edited_asset_metadata
+        library_path = _get_active_library_path(context)
+        added_tags = _split_tags(batch_fields.add_tags)
+        removed_tags = set(_split_tags(batch_fields.remove_tags))
+
+        catalog_uuid = None
+        if batch_fields.catalog:
+            catalog_uuid = catalog_editor.ensure_entries([batch_fields.catalog], library_path)[batch_fields.catalog]
+
+        jobs = []
+        for asset in context.selected_asset_files:
+            properties = []
+            if catalog_uuid is not None:
+                properties.append(('asset_data.catalog_id', catalog_uuid))
+            if added_tags or removed_tags:
+                tags = [tag.name for tag in asset.asset_data.tags if tag.name not in removed_tags]
+                tags.extend(tag for tag in added_tags if tag not in tags)
+                properties.append(('asset_data.tags', ",".join(tags)))
+            if not properties:
+                continue
+
+            if asset.local_id is not None:
+                asset_editor.set_local_asset_properties(asset.name, asset.id_type, properties)
+            else:
+                jobs.append({
+                    "filepath": bpy.types.AssetHandle.get_full_library_path(asset_file_handle=asset),
+                    "asset_name": asset.name,
+                    "id_type": asset.id_type,
+                    "properties": properties,
+                })
+
+        # Shared assets are edited in background by workers, each file being saved once
+        if jobs:
+            asset_edit_queue.submit_batch_edit(jobs)
+            self.report({'INFO'}, f"Saving {len(jobs)} assets in background")
+        return {'FINISHED'}
+
+
 classes = (
     Cancel,
     ASSETLIB_OP_RemoveAssetValidation,
@@ -693,7 +963,9 @@ classes = (
     ASSETLIB_OP_ApplyAsset,
     ASSETLIB_OP_BlendAsset,
     ASSETLIB_OP_ApplyAnimationAsset,
-    ASSETLIB_OP_EditActiveAssetMetadata
+    ASSETLIB_OP_EditActiveAssetMetadata,
+    ASSETLIB_OP_BatchEditAssetsMetadata,
+    ASSETLIB_OP_CompactCatalog
 )
 
 
@@ -705,3 +977,6 @@ def register():
 def unregister():
     for cls in classes:
         bpy.utils.unregister_class(cls)
+
+    asset_edit_queue.shutdown()
+    asset_editor.stop_worker()
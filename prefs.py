@@ -1,6 +1,7 @@
 import importlib
 
 import bpy
+from bpy.app.handlers import persistent
 
 from .catalog.abstract_catalog_generaror import AbstractCatalogGenerator
 from .configuration.abstract_configuration_provider import \
@@ -91,18 +92,34 @@ class AnimationLibraryPreferences(bpy.types.AddonPreferences):
         update=_update_config_provider,
     ) # type: ignore
     configuration_provider: AbstractConfigurationProvider = _get_default_configuration_provider()
+    preview_encoding: bpy.props.EnumProperty(
+        name="Animation preview encoding",
+        items=[
+            ("RAW", "Raw", "Store every frame of the animation previews"),
+            ("DELTA", "Delta", "Only store the changes between frames, smaller for mostly static animations"),
+        ],
+        default="RAW",
+    ) # type: ignore
 
 
     def draw(self, context):
         layout = self.layout
         layout.row().prop(self, "catalog_path_generator_method", text="Automatic catalog creation")
         layout.row().prop(self, "configuration_provider_name", text="Configuration provider")
+        layout.row().prop(self, "preview_encoding")
 
 
 def get_preferences():
     return bpy.context.preferences.addons[__package__].preferences
 
 
+@persistent
+def prefetch_catalog_path(dummy):
+    catalog_generator = get_preferences().catalog_generator
+    if catalog_generator is not None:
+        catalog_generator.prefetch()
+
+
 CLASSES = [
     AnimationLibraryPreferences
 ]
@@ -112,7 +129,10 @@ def register():
     for cls in CLASSES:
         bpy.utils.register_class(cls)
 
+    bpy.app.handlers.load_post.append(prefetch_catalog_path)
+
 
 def unregister():
+    bpy.app.handlers.load_post.remove(prefetch_catalog_path)
     for cls in reversed(CLASSES):
         bpy.utils.unregister_class(cls)
\ No newline at end of file
@@ -0,0 +1,349 @@
+""" Regenerate the missing or outdated animation previews of an asset library.
+
+    The coordinator runs with any Python interpreter, it distributes the library .blend files to a pool of
+    `blender --background` workers running this same script:
+
+        python backfill.py --library /path/to/library --scene-file /path/to/rigs.blend --workers 4
+
+    Workers open the scene file, which holds the rigs and the camera the previews are rendered with, and render the
+    previews with Cycles on the CPU. Updated .blend files are written next to the originals, then moved over them.
+    The progress is saved in a JSON file, a stopped backfill resumes where it stopped.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+logging.basicConfig(level=logging.INFO)
+
+# Root directory of the add-on package, imported by the workers
+ADDON_PATH = Path(__file__).resolve().parents[1]
+# Prefix of the worker stdout lines reporting a file result
+RESULT_MARKER = "ASSET_PREVIEW_BACKFILL:"
+PROGRESS_FILENAME = ".preview_backfill.json"
+# Suffix of the updated files, written before replacing the original ones
+TEMP_FILE_SUFFIX = ".backfill.blend"
+# Files given to a worker at once, the scene file is loaded once per batch
+WORKER_BATCH_SIZE = 8
+# Statuses of the files that don't need to be processed again, while unchanged
+DONE_STATUSES = ("updated", "skipped")
+
+
+def _get_extra_args():
+    """ Get Blender extra args
+
+    Returns:
+        Given the sys.argv as a list of strings, this method returns the
+        sublist right after the '--' element (if present, otherwise returns
+        the arguments after the script path).
+
+    """
+    try:
+        return sys.argv[sys.argv.index('--') + 1:]
+    except ValueError as e:
+        return sys.argv[1:]
+
+
+def _parse_args():
+    """ Parse the backfill arguments
+
+    Returns:
+        Returns the backfill arguments, for the coordinator or for a worker
+    """
+    parser = argparse.ArgumentParser(description="Regenerate the missing or outdated animation previews of a library")
+
+    parser.add_argument(
+        "--library",
+        help="Asset library directory to backfill",
+        type=str,
+    )
+
+    parser.add_argument(
+        "--scene-file",
+        help="Blender file containing the rigs (named after the assets armature field) and the preview camera",
+        type=str,
+        required=True
+    )
+
+    parser.add_argument(
+        "--blender",
+        help="Blender executable used by the workers",
+        type=str,
+        default="blender"
+    )
+
+    parser.add_argument(
+        "--workers",
+        help="Number of Blender background workers",
+        type=int,
+        default=max(1, (os.cpu_count() or 2) // 2)
+    )
+
+    parser.add_argument(
+        "--encoding",
+        help="Encoding of the regenerated previews",
+        type=str,
+        choices=("RAW", "DELTA"),
+        default="RAW"
+    )
+
+    parser.add_argument(
+        "--force",
+        help="Regenerate every animation preview, even the up to date ones",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--progress-file",
+        help=f"Progress file path. Defaults to {PROGRESS_FILENAME} in the library directory",
+        type=str,
+    )
+
+    parser.add_argument(
+        "--worker",
+        help="Run as a worker, inside Blender, on the given files",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "files",
+        help="Asset files processed by a worker",
+        nargs="*",
+    )
+    args = parser.parse_args(_get_extra_args())
+    if not args.worker and args.library is None:
+        parser.error("--library is required")
+    return args
+
+
+# Coordinator
+
+def _load_progress(progress_path: Path) -> dict:
+    if not progress_path.exists():
+        return {"files": {}}
+    with open(progress_path, "r", encoding="utf-8") as progress_file:
+        return json.load(progress_file)
+
+
+def _save_progress(progress_path: Path, progress: dict):
+    """ Save the progress file atomically, an interrupted backfill never leaves a truncated file
+    """
+    temp_path = progress_path.with_name(f"{progress_path.name}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as progress_file:
+        json.dump(progress, progress_file, indent=4)
+    os.replace(temp_path, progress_path)
+
+
+def _get_pending_files(library_path: Path, progress: dict) -> list[str]:
+    """ Get the library files not processed yet, or changed since they were processed
+    """
+    pending_files = []
+    for filepath in sorted(library_path.rglob("*.blend")):
+        if filepath.name.endswith(TEMP_FILE_SUFFIX):
+            continue
+        file_progress = progress["files"].get(filepath.as_posix())
+        if (
+            file_progress is not None
+            and file_progress["status"] in DONE_STATUSES
+            and file_progress["mtime"] == filepath.stat().st_mtime
+        ):
+            continue
+        pending_files.append(filepath.as_posix())
+    return pending_files
+
+
+def _run_worker_process(args, files: list[str]) -> list[dict]:
+    """ Process files in a Blender background worker
+
+    Returns:
+        list[dict]: The result of each file
+    """
+    command = [
+        args.blender,
+        args.scene_file,
+        "--background",
+        "--factory-startup",
+        "--python", f"{__file__}",
+        "--",
+        "--worker",
+        "--scene-file", args.scene_file,
+        "--encoding", args.encoding,
+    ]
+    if args.force:
+        command.append("--force")
+    command.extend(files)
+
+    process = subprocess.run(command, capture_output=True, text=True)
+    results = {}
+    for line in process.stdout.splitlines():
+        if line.startswith(RESULT_MARKER):
+            result = json.loads(line[len(RESULT_MARKER):])
+            results[result["filepath"]] = result
+    for filepath in files:
+        # Files without result were not reached, the worker crashed
+        results.setdefault(filepath, {
+            "filepath": filepath,
+            "status": "failed",
+            "error": f"Worker exited with code {process.returncode}: {process.stderr[-500:]}",
+        })
+    return list(results.values())
+
+
+def run_backfill(args):
+    """ Distribute the pending library files to the workers and record their results
+    """
+    library_path = Path(args.library)
+    progress_path = Path(args.progress_file) if args.progress_file else library_path / PROGRESS_FILENAME
+    progress = _load_progress(progress_path)
+    pending_files = _get_pending_files(library_path, progress)
+    batches = [
+        pending_files[index:index + WORKER_BATCH_SIZE]
+        for index in range(0, len(pending_files), WORKER_BATCH_SIZE)
+    ]
+    logging.info(f"Backfilling {len(pending_files)} files with {args.workers} workers")
+
+    processed_files = 0
+    start_time = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(_run_worker_process, args, batch) for batch in batches]
+        for future in as_completed(futures):
+            for result in future.result():
+                filepath = Path(result["filepath"])
+                progress["files"][filepath.as_posix()] = {
+                    "status": result["status"],
+                    "mtime": filepath.stat().st_mtime if filepath.exists() else None,
+                    "error": result.get("error"),
+                }
+                if result["status"] == "failed":
+                    logging.error(f"{filepath}: {result['error']}")
+                processed_files += 1
+            _save_progress(progress_path, progress)
+            logging.info(
+                f"{processed_files}/{len(pending_files)} files processed in {time.monotonic() - start_time:.0f}s"
+            )
+
+    failed_files = [path for path, file_progress in progress["files"].items() if file_progress["status"] == "failed"]
+    if failed_files:
+        logging.warning(f"{len(failed_files)} files failed, run the backfill again to retry them")
+    return 1 if failed_files else 0
+
+
+# Worker
+
+def _import_addon_modules():
+    """ Import the add-on modules in the worker Blender session and register the asset properties
+    """
+    sys.path.insert(0, str(ADDON_PATH.parent))
+    props = importlib.import_module(f"{ADDON_PATH.name}.props")
+    props.register()
+    thumbnail = importlib.import_module(f"{ADDON_PATH.name}.preview.thumbnail")
+    capture = importlib.import_module(f"{ADDON_PATH.name}.preview.capture")
+    overlay = importlib.import_module(f"{ADDON_PATH.name}.preview.overlay")
+    asset_type = importlib.import_module(f"{ADDON_PATH.name}.asset.asset_type")
+    return thumbnail, capture, overlay, asset_type
+
+
+def _is_preview_outdated(animation_preview, encoding: str) -> bool:
+    """ Check if an animation preview is missing, or stored in an outdated format
+    """
+    return (
+        animation_preview.preview_buffer_size == 0
+        or animation_preview.pixel_format != 'RGBA8'
+        or len(animation_preview.levels) == 0
+        or animation_preview.encoding != encoding
+    )
+
+
+def _backfill_asset_file(filepath: str, args, thumbnail, capture, overlay, asset_type) -> str:
+    """ Regenerate the outdated animation previews of an asset file
+
+    Returns:
+        str: The file status, "updated" or "skipped"
+    """
+    # The coordinator runs without Blender, bpy is only available in the workers
+    import bpy
+
+    with bpy.data.libraries.load(filepath, link=False) as (data_from, data_to):
+        # Keep the asset names, the scene actions with the same names are renamed
+        for action_name in data_from.actions:
+            scene_action = bpy.data.actions.get(action_name)
+            if scene_action is not None:
+                scene_action.name = f"{action_name}_backfill_scene"
+        data_to.actions = list(data_from.actions)
+    actions = [action for action in data_to.actions if action is not None]
+
+    try:
+        # Pose assets have no animation preview, only the animation assets are captured
+        outdated_assets = [
+            action for action in actions
+            if action.asset_data is not None
+            and asset_type.get_asset_type(action) == asset_type.AssetType.ANIMATION
+            and (args.force or _is_preview_outdated(action.animation_preview, args.encoding))
+        ]
+        if not outdated_assets:
+            return "skipped"
+
+        for action in outdated_assets:
+            armature_name = action.asset_data.get("armature")
+            armature = bpy.data.objects.get(armature_name) if armature_name else None
+            if armature is None or armature.type != 'ARMATURE':
+                raise ValueError(f"Rig {armature_name} of {action.name} not found in {args.scene_file}")
+
+            animation_data = armature.animation_data or armature.animation_data_create()
+            original_action = animation_data.action
+            animation_data.action = action
+            try:
+                frame_start, frame_end = action.frame_range
+                preview_capture = thumbnail.AnimationPreviewCapture(
+                    frame_range=(int(frame_start), int(frame_end)),
+                    encoding=args.encoding,
+                    frame_capture=capture.RenderCapture(thumbnail.THUMBNAIL_SIZE),
+                )
+                try:
+                    preview_capture.capture(bpy.context)
+                finally:
+                    preview_capture.free()
+                animation_preview, still_pixels = preview_capture.finish()
+            finally:
+                animation_data.action = original_action
+            thumbnail.store_animation_preview(action, animation_preview)
+            if still_pixels is not None:
+                thumbnail.asset_generate_preview(action, bpy.context, preview_pixels=still_pixels)
+                overlay.generate(overlay.AVAIABLE_OVERLAYS[asset_type.get_asset_type(action).value], action)
+
+        # Write the updated file next to the original one, then replace it
+        temp_filepath = f"{os.path.splitext(filepath)[0]}{TEMP_FILE_SUFFIX}"
+        bpy.data.libraries.write(temp_filepath, set(actions), compress=True, fake_user=True)
+        os.replace(temp_filepath, filepath)
+        return "updated"
+    finally:
+        for action in actions:
+            bpy.data.actions.remove(action)
+
+
+def run_worker(args):
+    """ Process the given files, reporting a result line for each one
+    """
+    thumbnail, capture, overlay, asset_type = _import_addon_modules()
+    for filepath in args.files:
+        result = {"filepath": filepath}
+        try:
+            result["status"] = _backfill_asset_file(filepath, args, thumbnail, capture, overlay, asset_type)
+        except Exception as e:
+            logging.error(f"Can't backfill {filepath}: {e}")
+            result.update(status="failed", error=str(e))
+        print(f"{RESULT_MARKER}{json.dumps(result)}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    backfill_args = _parse_args()
+    if backfill_args.worker:
+        sys.exit(run_worker(backfill_args))
+    sys.exit(run_backfill(backfill_args))
@@ -0,0 +1,173 @@
+from collections import OrderedDict
+from typing import Hashable
+
+import gpu
+
+from .thumbnail import AnimationPreviewMetadata
+
+# Bytes budgets of the preview caches, decoded buffers and uploaded textures are tracked separately
+PREVIEW_CPU_CACHE_BUDGET = 256 * 1024 * 1024
+PREVIEW_GPU_CACHE_BUDGET = 128 * 1024 * 1024
+# Uploaded textures are RGBA8: one byte per channel
+TEXTURE_BYTES_PER_PIXEL = 4
+
+
+def get_preview_key(asset_name: str, library_path: str) -> tuple[str, str]:
+    """ Build the cache key identifying an asset preview
+
+    Args:
+        asset_name (str): Name of the asset datablock
+        library_path (str): Full path of the .blend file containing the asset
+
+    Returns:
+        tuple[str, str]: The asset identity used as cache key
+    """
+    return (str(library_path).replace('\\', '/'), asset_name)
+
+
+class _LRUBytesStore:
+    """ Least recently used store bounded by the total bytes size of its items
+    """
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.used = 0
+        self._items = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def keys(self):
+        return self._items.keys()
+
+    def get(self, key: Hashable):
+        if key not in self._items:
+            return None
+        self._items.move_to_end(key)
+        return self._items[key][0]
+
+    def put(self, key: Hashable, value, size: int, low_priority: bool = False):
+        self.pop(key)
+        if low_priority:
+            # Low priority items never evict other items, and are the first ones to be evicted
+            if self.used + size > self.budget:
+                return
+            self._items[key] = (value, size)
+            self._items.move_to_end(key, last=False)
+            self.used += size
+            return
+
+        self._items[key] = (value, size)
+        self.used += size
+        # Always keep the last inserted item, even if it exceeds the budget by itself
+        while self.used > self.budget and len(self._items) > 1:
+            _, (_, evicted_size) = self._items.popitem(last=False)
+            self.used -= evicted_size
+
+    def pop(self, key: Hashable):
+        if key not in self._items:
+            return None
+        value, size = self._items.pop(key)
+        self.used -= size
+        return value
+
+    def clear(self):
+        self._items.clear()
+        self.used = 0
+
+
+class PreviewCache:
+    """ LRU cache of the decoded animation previews and their uploaded GPU textures
+
+        Decoded buffers (CPU) and textures (GPU) are evicted independently, each one within its own bytes budget.
+    """
+    def __init__(
+            self,
+            cpu_budget: int = PREVIEW_CPU_CACHE_BUDGET,
+            gpu_budget: int = PREVIEW_GPU_CACHE_BUDGET):
+        self._previews = _LRUBytesStore(cpu_budget)
+        self._textures = _LRUBytesStore(gpu_budget)
+
+    @property
+    def cpu_bytes_used(self) -> int:
+        return self._previews.used
+
+    @property
+    def gpu_bytes_used(self) -> int:
+        return self._textures.used
+
+    def keys(self) -> set[Hashable]:
+        return set(self._previews.keys()) | set(self._textures.keys())
+
+    def has_preview(self, key: Hashable) -> bool:
+        return key in self._previews or key in self._textures
+
+    def get_preview(self, key: Hashable) -> AnimationPreviewMetadata:
+        return self._previews.get(key)
+
+    def put_preview(self, key: Hashable, preview: AnimationPreviewMetadata, low_priority: bool = False):
+        """ Store a decoded preview
+
+        Args:
+            key (Hashable): The preview key
+            preview (AnimationPreviewMetadata): The decoded preview
+            low_priority (bool, optional): Store the preview only within the remaining budget, used for prefetching.
+                Defaults to False.
+        """
+        self._previews.put(key, preview, preview.nbytes, low_priority=low_priority)
+        # The uploaded texture may be of a previous resolution level
+        cached_texture = self._textures.get(key)
+        if cached_texture is not None and cached_texture[0] is not preview:
+            self._textures.pop(key)
+
+    def get_texture(self, key: Hashable) -> tuple[AnimationPreviewMetadata, gpu.types.GPUTexture]:
+        """ Get the uploaded texture of a preview, uploading its decoded buffer if needed
+
+        Args:
+            key (Hashable): The preview key
+
+        Returns:
+            tuple[AnimationPreviewMetadata, gpu.types.GPUTexture]: The preview and its texture, (None, None) if not cached
+        """
+        cached_texture = self._textures.get(key)
+        if cached_texture is not None:
+            return cached_texture
+
+        preview = self._previews.get(key)
+        if preview is None:
+            return None, None
+
+        texture = _upload_preview(preview)
+        self._textures.put(
+            key,
+            (preview, texture),
+            preview.image_width * preview.image_width * TEXTURE_BYTES_PER_PIXEL
+        )
+        return preview, texture
+
+    def clear(self):
+        self._previews.clear()
+        self._textures.clear()
+
+
+def _upload_preview(preview: AnimationPreviewMetadata) -> gpu.types.GPUTexture:
+    """ Upload a decoded RGBA8 preview to the GPU
+
+    Args:
+        preview (AnimationPreviewMetadata): The decoded preview
+
+    Returns:
+        gpu.types.GPUTexture: The RGBA8 texture of the preview spritesheet
+    """
+    # GPUTexture only accepts float buffers, the staging buffer is released right after upload
+    staging_pixels = preview.buffer.astype('float32') / 255.0
+    staging_buffer = gpu.types.Buffer('FLOAT', staging_pixels.size, staging_pixels.ravel())
+    return gpu.types.GPUTexture(
+        (preview.image_width, preview.image_width),
+        layers=0,
+        is_cubemap=False,
+        format='RGBA8',
+        data=staging_buffer,
+    )
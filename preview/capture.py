@@ -0,0 +1,225 @@
+import os
+import shutil
+import tempfile
+
+import bpy
+import gpu
+import numpy
+from mathutils import Matrix
+
+# Captures are rendered at CAPTURE_SUPERSAMPLING times their size, then box filtered down on the CPU
+CAPTURE_SUPERSAMPLING = 2
+CAPTURE_CLEAR_COLOR = (1.0, 0.0, 0.0, 1.0)
+# Cycles samples of the render captures, previews are small enough to be denoised by downscaling
+RENDER_CAPTURE_SAMPLES = 16
+
+
+def get_square_crop_matrix(width: int, height: int) -> Matrix:
+    """ Get the matrix restricting a projection to its centered square
+
+    Args:
+        width (int): The width of the projected image
+        height (int): The height of the projected image
+
+    Returns:
+        Matrix: The matrix to apply after the projection matrix
+    """
+    if width >= height:
+        return Matrix.Diagonal((width / height, 1.0, 1.0, 1.0))
+    return Matrix.Diagonal((1.0, height / width, 1.0, 1.0))
+
+
+def get_centered_border(resolution: int, size: int) -> tuple[float, float]:
+    """ Get the render border edges of the centered pixels of a render dimension
+
+    Blender truncates the border edges multiplied by the resolution to get the cropped pixels, the edges are set in
+    the middle of their pixel so float errors can't truncate them to the previous one.
+
+    Args:
+        resolution (int): The render resolution in the dimension
+        size (int): The number of centered pixels to render
+
+    Returns:
+        tuple[float, float]: The min and max border edges
+    """
+    first_pixel = (resolution - size) // 2
+    return (first_pixel + 0.5) / resolution, min(1.0, (first_pixel + size + 0.5) / resolution)
+
+
+def fit_frame(pixels: numpy.ndarray, size: int) -> numpy.ndarray:
+    """ Crop or pad (repeating the edge pixels) rendered pixels to a square frame
+
+    Args:
+        pixels (numpy.ndarray): The pixels, shaped (height, width, 4)
+        size (int): The frame size
+
+    Returns:
+        numpy.ndarray: The pixels, shaped (size, size, 4)
+    """
+    pixels = pixels[:size, :size]
+    missing_rows, missing_columns = size - pixels.shape[0], size - pixels.shape[1]
+    if missing_rows or missing_columns:
+        pixels = numpy.pad(pixels, ((0, missing_rows), (0, missing_columns), (0, 0)), mode='edge')
+    return pixels
+
+
+class ViewportCapture:
+    """ Capture the centered square of the scene camera view, at a preview size.
+
+        The camera view is rendered straight at the capture size, the offscreen buffer being reused across captures.
+        Must be used from a 3D viewport context, and freed after use (or used as a context manager).
+    """
+    def __init__(self, size: int, supersampling: int = CAPTURE_SUPERSAMPLING):
+        self.size = size
+        self.supersampling = supersampling
+        self._offscreen: gpu.types.GPUOffScreen = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.free()
+
+    def capture(self, context: bpy.types.Context) -> numpy.ndarray:
+        """ Capture the current frame
+
+        Args:
+            context (bpy.types.Context): The 3D viewport context to capture the scene camera view from
+
+        Returns:
+            numpy.ndarray: The captured pixels as floats, shaped (size, size, 4), from the bottom row
+        """
+        render_size = self.size * self.supersampling
+        if self._offscreen is None:
+            self._offscreen = gpu.types.GPUOffScreen(render_size, render_size)
+
+        scene = context.scene
+        render_width = scene.render.resolution_x
+        render_height = scene.render.resolution_y
+        view_matrix = scene.camera.matrix_world.inverted()
+        projection_matrix = get_square_crop_matrix(render_width, render_height) @ scene.camera.calc_matrix_camera(
+            context.evaluated_depsgraph_get(),
+            x=render_width,
+            y=render_height,
+            scale_x=1.0,
+            scale_y=1.0
+        )
+
+        with self._offscreen.bind():
+            fb = gpu.state.active_framebuffer_get()
+            fb.clear(color=CAPTURE_CLEAR_COLOR)
+            self._offscreen.draw_view3d(
+                scene,
+                context.view_layer,
+                context.space_data,
+                context.region,
+                view_matrix,
+                projection_matrix,
+                do_color_management=True,
+                draw_background=True)
+            pixel_buffer = fb.read_color(0, 0, render_size, render_size, 4, 0, 'FLOAT')
+
+        pixel_buffer.dimensions = render_size * render_size * 4
+        pixels = numpy.asarray(pixel_buffer, dtype=numpy.float32)
+        return pixels.reshape(self.size, self.supersampling, self.size, self.supersampling, 4).mean(axis=(1, 3))
+
+    def free(self):
+        if self._offscreen is not None:
+            self._offscreen.free()
+            self._offscreen = None
+
+
+class RenderCapture:
+    """ Capture the centered square of the scene camera view with a Cycles CPU render.
+
+        Used by background sessions, which have no GPU context to draw the viewport in. The render settings are changed
+        on the first capture and restored when the capture is freed (or used as a context manager).
+    """
+    def __init__(self, size: int, samples: int = RENDER_CAPTURE_SAMPLES):
+        self.size = size
+        self.samples = samples
+        self._render_filepath: str = None
+        self._original_settings: dict = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.free()
+
+    def _setup_render(self, scene: bpy.types.Scene):
+        render = scene.render
+        self._original_settings = {
+            (render, "engine"): render.engine,
+            (render, "resolution_x"): render.resolution_x,
+            (render, "resolution_y"): render.resolution_y,
+            (render, "resolution_percentage"): render.resolution_percentage,
+            (render, "use_border"): render.use_border,
+            (render, "use_crop_to_border"): render.use_crop_to_border,
+            (render, "border_min_x"): render.border_min_x,
+            (render, "border_max_x"): render.border_max_x,
+            (render, "border_min_y"): render.border_min_y,
+            (render, "border_max_y"): render.border_max_y,
+            (render, "filepath"): render.filepath,
+            (render.image_settings, "file_format"): render.image_settings.file_format,
+            (render.image_settings, "color_mode"): render.image_settings.color_mode,
+        }
+        render_width, render_height = render.resolution_x, render.resolution_y
+        render.engine = 'CYCLES'
+        self._original_settings.update({
+            (scene.cycles, "device"): scene.cycles.device,
+            (scene.cycles, "samples"): scene.cycles.samples,
+        })
+        scene.cycles.device = 'CPU'
+        scene.cycles.samples = self.samples
+
+        # Render the centered square of the camera view, at the capture size
+        if render_width >= render_height:
+            render.resolution_x = round(self.size * render_width / render_height)
+            render.resolution_y = self.size
+            render.border_min_x, render.border_max_x = get_centered_border(render.resolution_x, self.size)
+            render.border_min_y, render.border_max_y = 0.0, 1.0
+        else:
+            render.resolution_x = self.size
+            render.resolution_y = round(self.size * render_height / render_width)
+            render.border_min_x, render.border_max_x = 0.0, 1.0
+            render.border_min_y, render.border_max_y = get_centered_border(render.resolution_y, self.size)
+        render.resolution_percentage = 100
+        render.use_border = True
+        render.use_crop_to_border = True
+        render.image_settings.file_format = 'PNG'
+        render.image_settings.color_mode = 'RGBA'
+        self._render_filepath = os.path.join(tempfile.mkdtemp(prefix="asset_preview_capture_"), "frame.png")
+        render.filepath = self._render_filepath
+
+    def capture(self, context: bpy.types.Context) -> numpy.ndarray:
+        """ Render the current frame
+
+        Args:
+            context (bpy.types.Context): The context of the scene to render
+
+        Returns:
+            numpy.ndarray: The rendered pixels as floats, shaped (size, size, 4), from the bottom row
+        """
+        if self._original_settings is None:
+            self._setup_render(context.scene)
+        bpy.ops.render.render(write_still=True)
+
+        rendered_image = bpy.data.images.load(self._render_filepath)
+        try:
+            width, height = rendered_image.size
+            pixels = numpy.empty(width * height * 4, dtype=numpy.float32)
+            rendered_image.pixels.foreach_get(pixels)
+        finally:
+            bpy.data.images.remove(rendered_image)
+        # Guard against a border cropped to another size than the capture one
+        return fit_frame(pixels.reshape(height, width, 4), self.size)
+
+    def free(self):
+        if self._original_settings is None:
+            return
+        for (settings, attribute), value in self._original_settings.items():
+            setattr(settings, attribute, value)
+        shutil.rmtree(os.path.dirname(self._render_filepath), ignore_errors=True)
+        self._original_settings = None
+        self._render_filepath = None
@@ -0,0 +1,147 @@
+import math
+import struct
+
+import numpy
+
+# Size of the square tiles compared between consecutive preview frames
+DELTA_TILE_SIZE = 16
+
+_DELTA_MAGIC = b'APDT'
+# Magic, frames total, frames rows, frame size, tile size, unique frames count, stored tiles count
+_DELTA_HEADER = struct.Struct('<4sIIIIII')
+
+
+def split_frames(pixels: numpy.ndarray, frames_rows: int, frame_size: int) -> numpy.ndarray:
+    """ Split a spritesheet in frames, frame `i` being at column `i // frames_rows` and row `i % frames_rows`
+    """
+    sheet = pixels.reshape(frames_rows, frame_size, frames_rows, frame_size, 4)
+    return sheet.transpose(2, 0, 1, 3, 4).reshape(frames_rows * frames_rows, frame_size, frame_size, 4)
+
+
+def join_frames(frames: numpy.ndarray, frames_rows: int, frame_size: int) -> numpy.ndarray:
+    """ Assemble frames in a spritesheet, the inverse of `split_frames`
+    """
+    sheet = frames.reshape(frames_rows, frames_rows, frame_size, frame_size, 4)
+    return sheet.transpose(1, 2, 0, 3, 4).reshape(frames_rows * frame_size, frames_rows * frame_size, 4)
+
+
+def _split_tiles(frames: numpy.ndarray, tile_size: int) -> numpy.ndarray:
+    """ Split frames in tiles, shaped (frames, tiles, tile_size, tile_size, 4)
+    """
+    frames_count, frame_size = frames.shape[:2]
+    tiles_per_row = frame_size // tile_size
+    tiles = frames.reshape(frames_count, tiles_per_row, tile_size, tiles_per_row, tile_size, 4)
+    return tiles.transpose(0, 1, 3, 2, 4, 5).reshape(frames_count, tiles_per_row ** 2, tile_size, tile_size, 4)
+
+
+def _join_tiles(tiles: numpy.ndarray, frame_size: int) -> numpy.ndarray:
+    """ Assemble tiles in frames, the inverse of `_split_tiles`
+    """
+    frames_count, tiles_count, tile_size = tiles.shape[:3]
+    tiles_per_row = frame_size // tile_size
+    frames = tiles.reshape(frames_count, tiles_per_row, tiles_per_row, tile_size, tile_size, 4)
+    return frames.transpose(0, 1, 3, 2, 4, 5).reshape(frames_count, frame_size, frame_size, 4)
+
+
+def encode_delta_spritesheet(
+        pixels: numpy.ndarray,
+        frames_total: int,
+        frames_rows: int,
+        frame_size: int,
+        tile_size: int = DELTA_TILE_SIZE) -> bytes:
+    """ Encode a RGBA8 spritesheet as a keyframe followed by the tiles changed in each frame.
+
+        Frames identical to a previous frame are stored as a reference to it, the changed tiles of the other frames
+        are computed against the previous distinct frame.
+
+    Args:
+        pixels (numpy.ndarray): The spritesheet pixels, as uint8
+        frames_total (int): The number of frames in the spritesheet
+        frames_rows (int): The number of frames per row of the spritesheet
+        frame_size (int): The frame size, in pixels
+        tile_size (int, optional): The size of the compared tiles. Defaults to DELTA_TILE_SIZE.
+
+    Returns:
+        bytes: The encoded spritesheet
+    """
+    tile_size = math.gcd(tile_size, frame_size)
+    frames = split_frames(numpy.asarray(pixels, dtype=numpy.uint8), frames_rows, frame_size)[:frames_total]
+
+    # Deduplicate the identical frames
+    unique_frames_by_content = {}
+    unique_frame_indices = []
+    frame_to_unique = numpy.empty(frames_total, dtype=numpy.uint32)
+    for frame_index, frame in enumerate(frames):
+        unique_index = unique_frames_by_content.setdefault(frame.tobytes(), len(unique_frame_indices))
+        if unique_index == len(unique_frame_indices):
+            unique_frame_indices.append(frame_index)
+        frame_to_unique[frame_index] = unique_index
+
+    tiles = _split_tiles(frames[unique_frame_indices], tile_size)
+    # The first frame is a keyframe, the other ones only store their tiles changed since the previous frame
+    changed_tiles = numpy.ones(tiles.shape[:2], dtype=bool)
+    changed_tiles[1:] = numpy.any(tiles[1:] != tiles[:-1], axis=(2, 3, 4))
+    tile_frames, tile_indices = numpy.nonzero(changed_tiles)
+
+    header = _DELTA_HEADER.pack(
+        _DELTA_MAGIC,
+        frames_total,
+        frames_rows,
+        frame_size,
+        tile_size,
+        len(unique_frame_indices),
+        len(tile_frames),
+    )
+    return b''.join((
+        header,
+        frame_to_unique.tobytes(),
+        tile_frames.astype(numpy.uint32).tobytes(),
+        tile_indices.astype(numpy.uint32).tobytes(),
+        tiles[changed_tiles].tobytes(),
+    ))
+
+
+def decode_delta_spritesheet(data: bytes) -> numpy.ndarray:
+    """ Decode a spritesheet encoded by `encode_delta_spritesheet`, without any per tile or per frame loop
+
+    Args:
+        data (bytes): The encoded spritesheet
+
+    Returns:
+        numpy.ndarray: The flat RGBA8 spritesheet pixels
+    """
+    (
+        magic,
+        frames_total,
+        frames_rows,
+        frame_size,
+        tile_size,
+        unique_frames_count,
+        stored_tiles_count,
+    ) = _DELTA_HEADER.unpack_from(data)
+    if magic != _DELTA_MAGIC:
+        raise ValueError("Invalid delta encoded animation preview")
+
+    offset = _DELTA_HEADER.size
+    frame_to_unique = numpy.frombuffer(data, dtype=numpy.uint32, count=frames_total, offset=offset)
+    offset += frame_to_unique.nbytes
+    tile_frames = numpy.frombuffer(data, dtype=numpy.uint32, count=stored_tiles_count, offset=offset)
+    offset += tile_frames.nbytes
+    tile_indices = numpy.frombuffer(data, dtype=numpy.uint32, count=stored_tiles_count, offset=offset)
+    offset += tile_indices.nbytes
+    stored_tiles = numpy.frombuffer(
+        data,
+        dtype=numpy.uint8,
+        count=stored_tiles_count * tile_size * tile_size * 4,
+        offset=offset
+    ).reshape(stored_tiles_count, tile_size, tile_size, 4)
+
+    # Stored tiles are sorted by frame: the latest stored tile up to a frame is the running maximum of their indices
+    tiles_count = (frame_size // tile_size) ** 2
+    tile_table = numpy.full((unique_frames_count, tiles_count), -1, dtype=numpy.int64)
+    tile_table[tile_frames, tile_indices] = numpy.arange(stored_tiles_count)
+    tile_table = numpy.maximum.accumulate(tile_table, axis=0)
+
+    frames = numpy.zeros((frames_rows * frames_rows, frame_size, frame_size, 4), dtype=numpy.uint8)
+    frames[:frames_total] = _join_tiles(stored_tiles[tile_table], frame_size)[frame_to_unique]
+    return join_frames(frames, frames_rows, frame_size).ravel()
@@ -0,0 +1,272 @@
+import itertools
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from queue import Queue
+from typing import Callable, Hashable
+
+from . import thumbnail
+from .cache import get_preview_key
+
+# Number of threads decoding the previews
+PREVIEW_LOADER_WORKERS = 2
+# Delay (in seconds) without new request before the active request is loaded
+PREVIEW_LOAD_DEBOUNCE_DELAY = 0.15
+
+
+@dataclass
+class PreviewLoadRequest:
+    """Dataclass to store a preview load request.
+    """
+    request_id: int
+    key: Hashable
+    asset_name: str
+    library_path: str
+    requested_time: float = field(default_factory=time.monotonic)
+    future: Future = None
+    cancelled: bool = False
+    # Set when the file can't be read without Blender, the preview is then read from the main thread
+    needs_blender_read: bool = False
+
+
+@dataclass
+class PreviewLoadResult:
+    """Dataclass to store the result of a preview load request.
+    """
+    request_id: int
+    key: Hashable
+    preview: thumbnail.AnimationPreviewMetadata
+    prefetched: bool = False
+
+
+class PreviewLoader:
+    """ Debounced and cancellable loader of animation previews
+
+        A new request supersedes the previous one: superseded requests are cancelled, or their results discarded
+        if already running. Requests are started in `update`, once they have not been superseded for `debounce_delay`
+        seconds. The asset files are then read and their previews decoded by a bounded thread pool, from their lowest
+        to their highest resolution level, and a result is delivered for each level. Only the requested files that
+        can't be read without Blender are read from the main thread.
+        Prefetch requests have a lower priority: they are started one at a time, when no request is waiting.
+    """
+    def __init__(
+            self,
+            max_workers: int = PREVIEW_LOADER_WORKERS,
+            debounce_delay: float = PREVIEW_LOAD_DEBOUNCE_DELAY):
+        self.max_workers = max_workers
+        self.debounce_delay = debounce_delay
+        self.results = Queue()
+        self._executor = None
+        self._request_ids = itertools.count(1)
+        self._pending_request: PreviewLoadRequest = None
+        self._running_request: PreviewLoadRequest = None
+        self._prefetch_requests: list[PreviewLoadRequest] = []
+        self._running_prefetch: PreviewLoadRequest = None
+        # Resolution of the files to prefetch, running in the thread pool
+        self._prefetch_resolution: Future = None
+        # Files already prefetched since the last cancellation
+        self._prefetched_filepaths = set()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="AnimationPreviewLoader"
+            )
+        return self._executor
+
+    def request(self, key: Hashable, asset_name: str, library_path: str) -> int:
+        """ Request the loading of a preview, superseding any previous request
+
+        Args:
+            key (Hashable): The preview cache key
+            asset_name (str): The name of the asset action
+            library_path (str): The path of the .blend file containing the asset
+
+        Returns:
+            int: The request id
+        """
+        self.cancel()
+        self._pending_request = PreviewLoadRequest(
+            request_id=next(self._request_ids),
+            key=key,
+            asset_name=asset_name,
+            library_path=library_path,
+        )
+        return self._pending_request.request_id
+
+    def prefetch(self, asset_filepaths: list[str]):
+        """ Replace the prefetch requests, the first files are loaded first.
+            Files are prefetched only once until the loader is cancelled.
+
+        Args:
+            asset_filepaths (list[str]): The paths of the .blend files to prefetch the previews from
+        """
+        asset_filepaths = [filepath for filepath in asset_filepaths if filepath not in self._prefetched_filepaths]
+        # Keep the queued requests, and their debounce time, when nothing changed
+        if [request.library_path for request in self._prefetch_requests] == asset_filepaths:
+            return
+        self._prefetch_requests = [
+            PreviewLoadRequest(
+                request_id=next(self._request_ids),
+                key=None,
+                asset_name=None,
+                library_path=asset_filepath,
+            )
+            for asset_filepath in asset_filepaths
+        ]
+
+    def prefetch_later(self, get_asset_filepaths: Callable[[], list[str]]):
+        """ Resolve the files to prefetch in the thread pool, then replace the prefetch requests with them
+
+        Args:
+            get_asset_filepaths (Callable[[], list[str]]): Get the paths of the .blend files to prefetch the previews
+                from, must not use Blender data
+        """
+        if self._prefetch_resolution is not None:
+            self._prefetch_resolution.cancel()
+        self._prefetch_resolution = self._get_executor().submit(get_asset_filepaths)
+
+    def cancel(self):
+        """ Cancel the pending, running and prefetch requests
+        """
+        self._pending_request = None
+        self._prefetch_requests = []
+        if self._prefetch_resolution is not None:
+            self._prefetch_resolution.cancel()
+            self._prefetch_resolution = None
+        self._prefetched_filepaths.clear()
+        for request in (self._running_request, self._running_prefetch):
+            if request is not None:
+                request.cancelled = True
+                request.future.cancel()
+        self._running_request = None
+        self._running_prefetch = None
+
+    def is_current(self, request_id: int) -> bool:
+        for request in (self._pending_request, self._running_request, self._running_prefetch):
+            if request is not None and request.request_id == request_id:
+                return True
+        return False
+
+    def is_idle(self) -> bool:
+        """ Whether the loader has no request to process nor result to deliver
+        """
+        return (
+            self._pending_request is None
+            and self._running_request is None
+            and self._running_prefetch is None
+            and self._prefetch_resolution is None
+            and not self._prefetch_requests
+            and self.results.empty()
+        )
+
+    def update(self):
+        """ Start the pending request once debounced, or the next prefetch request if idle.
+            Must be called from the main thread.
+        """
+        if self._running_request is not None and self._running_request.future.done():
+            request = self._running_request
+            self._running_request = None
+            if request.needs_blender_read and not request.cancelled:
+                self._running_request = self._start_blender_read(request)
+        if self._running_prefetch is not None and self._running_prefetch.future.done():
+            self._running_prefetch = None
+        if self._prefetch_resolution is not None and self._prefetch_resolution.done():
+            prefetch_resolution = self._prefetch_resolution
+            self._prefetch_resolution = None
+            if prefetch_resolution.exception() is not None:
+                logging.error(f"Can't resolve the previews to prefetch: {prefetch_resolution.exception()}")
+            else:
+                self.prefetch(prefetch_resolution.result())
+
+        request = self._pending_request
+        if request is not None:
+            if time.monotonic() - request.requested_time < self.debounce_delay:
+                return
+            self._pending_request = None
+            self._running_request = self._start(request)
+        elif self._running_request is None and self._running_prefetch is None and self._prefetch_requests:
+            if time.monotonic() - self._prefetch_requests[0].requested_time < self.debounce_delay:
+                return
+            prefetch_request = self._prefetch_requests.pop(0)
+            self._prefetched_filepaths.add(prefetch_request.library_path)
+            self._running_prefetch = self._start(prefetch_request, prefetched=True)
+
+    def _start(self, request: PreviewLoadRequest, prefetched: bool = False) -> PreviewLoadRequest:
+        """ Submit the reading and decoding of a requested preview
+
+        Args:
+            request (PreviewLoadRequest): The request to start
+            prefetched (bool, optional): Whether the request is a prefetch request. Defaults to False.
+
+        Returns:
+            PreviewLoadRequest: The started request
+        """
+        request.future = self._get_executor().submit(self._load, request, prefetched)
+        request.future.add_done_callback(lambda future: self._on_request_done(request, future))
+        return request
+
+    def _start_blender_read(self, request: PreviewLoadRequest) -> PreviewLoadRequest:
+        """ Read a requested preview through Blender, from the main thread, and submit its decoding
+
+        Returns:
+            PreviewLoadRequest: The started request, None if there is no preview to decode
+        """
+        request.needs_blender_read = False
+        try:
+            stored_preview = thumbnail.read_animation_preview(request.asset_name, request.library_path)
+        except Exception as e:
+            logging.error(f"Can't read animation preview from {request.library_path}: {e}")
+            return None
+        if stored_preview is None:
+            return None
+
+        request.future = self._get_executor().submit(self._decode, request, stored_preview, False)
+        request.future.add_done_callback(lambda future: self._on_request_done(request, future))
+        return request
+
+    def _load(self, request: PreviewLoadRequest, prefetched: bool):
+        """ Read a preview from its asset file and decode it. Runs in the thread pool.
+        """
+        try:
+            stored_preview = thumbnail.read_animation_preview_file(request.asset_name, request.library_path)
+        except Exception as e:
+            if prefetched:
+                logging.error(f"Can't read animation preview from {request.library_path}: {e}")
+            else:
+                request.needs_blender_read = True
+            return
+        if stored_preview is None or request.cancelled:
+            return
+        if request.key is None:
+            request.key = get_preview_key(stored_preview.asset_name, stored_preview.library_path)
+        self._decode(request, stored_preview, prefetched)
+
+    def _decode(self, request: PreviewLoadRequest, stored_preview: thumbnail.StoredAnimationPreview, prefetched: bool):
+        """ Decode a preview level by level, delivering a result for each one. Runs in the thread pool.
+        """
+        for preview in thumbnail.decode_animation_preview(stored_preview):
+            if request.cancelled:
+                return
+            self.results.put(
+                PreviewLoadResult(
+                    request_id=request.request_id,
+                    key=request.key,
+                    preview=preview,
+                    prefetched=prefetched,
+                ),
+                block=False
+            )
+
+    def _on_request_done(self, request: PreviewLoadRequest, future: Future):
+        if future.cancelled() or future.exception() is None:
+            return
+        logging.error(f"Can't decode animation preview from {request.library_path}: {future.exception()}")
+
+    def shutdown(self):
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
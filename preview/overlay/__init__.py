@@ -1,66 +1,93 @@
-import uuid
 from pathlib import Path
 import bpy
-import gpu
-from gpu_extras.batch import batch_for_shader
-from mathutils import Matrix
-from pathlib import Path
+import numpy
 
 AVAIABLE_OVERLAYS = {
     'POSE': Path(__file__).parent.joinpath('pose_overlay.png'),
     'ANIMATION': Path(__file__).parent.joinpath('animation_overlay.png'),
 }
 
+# Decoded overlay images, by path, loaded once per session
+_overlay_pixels_cache: dict[Path, numpy.ndarray] = {}
+
+
+def get_overlay_pixels(overlay_image_path: Path) -> numpy.ndarray:
+    """Get the pixels of an overlay image, decoded on first use
+
+    Args:
+        overlay_image_path (Path): The path to the overlay image
+
+    Returns:
+        numpy.ndarray: The overlay float pixels, shaped (height, width, 4), from the bottom row
+    """
+    overlay_pixels = _overlay_pixels_cache.get(overlay_image_path)
+    if overlay_pixels is None:
+        overlay_image = bpy.data.images.load(str(overlay_image_path))
+        try:
+            width, height = overlay_image.size
+            overlay_pixels = numpy.empty(width * height * 4, dtype=numpy.float32)
+            overlay_image.pixels.foreach_get(overlay_pixels)
+        finally:
+            bpy.data.images.remove(overlay_image)
+        overlay_pixels = overlay_pixels.reshape(height, width, 4)
+        _overlay_pixels_cache[overlay_image_path] = overlay_pixels
+    return overlay_pixels
+
+
+def alpha_over(pixels: numpy.ndarray, overlay_pixels: numpy.ndarray) -> numpy.ndarray:
+    """Composite overlay pixels over image pixels, with straight alpha
+
+    The composited colors are unpremultiplied by the composited alpha, so translucent image pixels keep their color.
+    Fully transparent composited pixels are black.
+
+    Args:
+        pixels (numpy.ndarray): The image float pixels, shaped (height, width, 4)
+        overlay_pixels (numpy.ndarray): The overlay float pixels, resampled to the image size if needed
+
+    Returns:
+        numpy.ndarray: The composited float pixels
+    """
+    height, width = pixels.shape[:2]
+    if overlay_pixels.shape[:2] != (height, width):
+        # Nearest neighbour resampling
+        rows = numpy.arange(height) * overlay_pixels.shape[0] // height
+        columns = numpy.arange(width) * overlay_pixels.shape[1] // width
+        overlay_pixels = overlay_pixels[rows[:, None], columns[None, :]]
+
+    overlay_alpha = overlay_pixels[..., 3:]
+    # Image alpha seen through the overlay
+    image_alpha = pixels[..., 3:] * (1.0 - overlay_alpha)
+    composited_alpha = overlay_alpha + image_alpha
+    composited_pixels = numpy.zeros_like(pixels)
+    numpy.divide(
+        overlay_pixels[..., :3] * overlay_alpha + pixels[..., :3] * image_alpha,
+        composited_alpha,
+        out=composited_pixels[..., :3],
+        where=composited_alpha > 0.0
+    )
+    composited_pixels[..., 3:] = composited_alpha
+    return composited_pixels
+
 
 def generate(overlay_image_path: Path, datablock: bpy.types.ID):
     """Draw an overlay on the datablock preview image
 
+    The overlay is composited on the CPU, it doesn't need a GPU context and works in background sessions.
+
     Args:
         overlay_image (Path): The path to the overlay image
         datablock (bpy.types.ID): The datablock to draw the overlay on
     """
     preview = datablock.preview_ensure()
-    
     preview_with = preview.image_size[0]
     preview_height = preview.image_size[1]
-    buffer_dimensions = preview_with * preview_height * 4
-    preview_overlay_render = gpu.types.GPUOffScreen(preview_with, preview_height)
-
-
-    # Load the preview image to the GPU
-    preview_buffer = gpu.types.Buffer('FLOAT', buffer_dimensions, preview.image_pixels_float[:])
-    preview_texture = gpu.types.GPUTexture((preview_with, preview_height), data=preview_buffer)
-
-    # Load the overlay image to the GPU
-    overlay_image = bpy.data.images.load(str(overlay_image_path))
-    overlay_texture = gpu.texture.from_image(overlay_image)
-
-    with preview_overlay_render.bind():
-        fb = gpu.state.active_framebuffer_get()
-        gpu.matrix.load_matrix(Matrix.Identity(4))
-        gpu.matrix.load_projection_matrix(Matrix.Identity(4))
-        shader = gpu.shader.from_builtin('IMAGE')
-        # gpu.state.depth_mask_set(False)
-        gpu.state.blend_set('ALPHA')
-        batch = batch_for_shader(
-            shader, 'TRI_FAN',
-            {
-                "pos": ((-1, -1), (1, -1), (1, 1), (-1, 1)),
-                "texCoord": ((0, 0), (1, 0), (1, 1), (0, 1)),
-            },
-        )
-        shader.uniform_sampler("image", preview_texture)
-        batch.draw(shader)
-        # Draw the overlay on the top of the preview
-        shader.uniform_sampler("image", overlay_texture)
-        batch.draw(shader)
-
-        # Read the pixels from the render buffer
-        pixelBuffer = fb.read_color(0, 0, preview_with, preview_height, 4, 0, 'FLOAT')
-        pixelBuffer.dimensions = buffer_dimensions
-        
-        # Save the image buffer back to the ID preview
-        preview.image_pixels_float.foreach_set(pixelBuffer)
-
-    preview_overlay_render.free()
-    bpy.data.images.remove(overlay_image)
+
+    preview_pixels = numpy.empty(preview_with * preview_height * 4, dtype=numpy.float32)
+    preview.image_pixels_float.foreach_get(preview_pixels)
+    composited_pixels = alpha_over(
+        preview_pixels.reshape(preview_height, preview_with, 4),
+        get_overlay_pixels(overlay_image_path)
+    )
+
+    # Save the image buffer back to the ID preview
+    preview.image_pixels_float.foreach_set(composited_pixels.ravel())
@@ -1,117 +1,154 @@
 import logging
-import threading
+import time
 from ..asset.asset_type import AssetType, get_asset_type
+from ..catalog.catalog_model import get_catalog_model
 import bpy
 import gpu
-from gpu_extras.batch import batch_for_shader
-from queue import Queue, Empty
+from queue import Empty
 
 from . import thumbnail
+from .cache import PreviewCache, get_preview_key
+from .loader import PreviewLoader
+from .prefetch import get_neighbour_asset_files
+from .shader import create_quad_batch, draw_spritesheet_frame, get_spritesheet_shader
 
 THUMBNAIL_FRAME_RATE = 24
-
-
-def _get_assetbrowser_panel_elements():
-    """ Retrieve assetbrowser panels elements
-
-        Returns:
-            List[Tuple(Area, Tool Props Region)]: List of assetbrowser's elements as tuples (Area, Tool Props Region) 
-    """
-    assetbrowser_ui = []
-    for window in bpy.data.window_managers[0].windows:
-        for area in window.screen.areas:
-            if area.type == 'FILE_BROWSER' and area.spaces[0].browse_mode == 'ASSETS':
-                assetbrowser_ui.append((area, area.regions[4]))
-    return assetbrowser_ui
+# Interval (in seconds) of the timer while previews are being loaded
+LOADER_UPDATE_INTERVAL = 1/THUMBNAIL_FRAME_RATE
+# Delay (in seconds) without preview drawing after which the playback timer stops
+PLAYBACK_IDLE_DELAY = 1.0
+PLAYER_MARGIN = 10
 
 
 class ASSET_AnimationPreviewPlayer:
     def __init__(self):
-        self.player_position = [10,10]
-        self.active_frame_uvs = ((0, 0), (.1, 0), (.1, .1), (0, .1))
         self.active_thumbnail: thumbnail.AnimationPreviewMetadata = None
         self.active_preview_texture: gpu.types.GPUTexture = None
-        self.thumbnail_frame_current = 0
+        self.playback_start_time = 0.0
         self.active_selection = None
-        self.shader = gpu.shader.from_builtin('IMAGE')
-        self.loaded_preview_queue = Queue()
+        self.active_preview_key = None
+        self.active_request_id = None
+        self.preview_cache = PreviewCache()
+        self.preview_loader = PreviewLoader()
+        self.batch = None
+        self._last_draw_time = 0.0
+        # Areas the preview is drawn in, by area pointer
+        self._drawing_areas = {}
+        # Keep a single bound method, timers are identified by function
+        self._timer = self._update_thumbnail_frame
 
     def register(self):
         self._draw_handler = bpy.types.SpaceFileBrowser.draw_handler_add(self._draw_animation_preview, (), 'TOOL_PROPS', 'POST_PIXEL')
-        self._timer = bpy.app.timers.register(self._update_thumbnail_frame)
 
     def unregister(self):
         bpy.types.SpaceFileBrowser.draw_handler_remove(self._draw_handler, 'TOOL_PROPS')
         if bpy.app.timers.is_registered(self._timer):
             bpy.app.timers.unregister(self._timer)
+        self.preview_loader.shutdown()
+        self._clear_thumbnail_cache()
+        self.preview_cache.clear()
+        self._drawing_areas.clear()
 
     @property
     def active_animation_length(self)->str:
         if self.active_thumbnail is not None:
-            return self.active_thumbnail.frames_total
+            return self.active_thumbnail.frames_total * self.active_thumbnail.frame_stride
         return 0
 
+    def _ensure_timer(self):
+        if not bpy.app.timers.is_registered(self._timer):
+            bpy.app.timers.register(self._timer)
+
+    def _get_frame_interval(self) -> float:
+        return self.active_thumbnail.frame_stride / THUMBNAIL_FRAME_RATE
+
+    def _get_playback_frame(self) -> int:
+        """ Get the preview frame to display, paced by the wall clock time
+        """
+        elapsed_frames = int((time.monotonic() - self.playback_start_time) / self._get_frame_interval())
+        return elapsed_frames % max(self.active_thumbnail.frames_total, 1)
+
     def _update_thumbnail_frame(self):
-        """ Refresh the thumbnail frame according to THUMBNAIL_FRAME_RATE
+        """ Load the pending previews and redraw the player when its frame changes.
+
+            The timer only runs while an animation preview is displayed or loaded.
         """
         try:
-            # get height from the context
-            asset_browsers_areas_info = _get_assetbrowser_panel_elements()
-            _, default_region = next(iter(asset_browsers_areas_info), (None, None))
-            if default_region is not None:
-                self.player_position[1] = default_region.height - thumbnail.THUMBNAIL_SIZE - 10
-                self.player_position[0] = default_region.width/2 - thumbnail.THUMBNAIL_SIZE/2
-            if self.active_thumbnail is None or self.active_preview_texture is None:
-                try:
-                    loaded_thumbnail = self.loaded_preview_queue.get(block=False)
-                except Empty:
-                    pass
-                else:
-                    self.active_thumbnail = loaded_thumbnail
-                    image_width = self.active_thumbnail.frames_rows * thumbnail.THUMBNAIL_SIZE
-                    self.active_preview_texture  = gpu.types.GPUTexture(
-                        (image_width,image_width),
-                        layers=0,
-                        is_cubemap=False,
-                        format='RGBA8',
-                        data=self.active_thumbnail.buffer,
-                    )
-                return 1/THUMBNAIL_FRAME_RATE
-
-            if self.thumbnail_frame_current >= self.active_thumbnail.frames_total - 1:
-                self.thumbnail_frame_current = 0
-            else:
-                self.thumbnail_frame_current += 1
-
-            x, y = thumbnail.get_frame_coordinates(
-                self.thumbnail_frame_current-1,
-                self.active_thumbnail.frames_rows,
-                remap_to_range=(0, 1)
-            )
-            spritesheet_frame_dimension = 1/self.active_thumbnail.frames_rows
+            self.preview_loader.update()
+            self._consume_loaded_previews()
 
-            self.active_frame_uvs = (
-                (x, y), 
-                (x+spritesheet_frame_dimension, y), 
-                (x+spritesheet_frame_dimension, y+spritesheet_frame_dimension), 
-                (x, y+spritesheet_frame_dimension)
-            )
+            is_playing = self.active_thumbnail is not None and self.active_preview_texture is not None
+            is_drawn = time.monotonic() - self._last_draw_time < PLAYBACK_IDLE_DELAY
+            if not is_drawn or (not is_playing and self.preview_loader.is_idle()):
+                return None
 
+            self._redraw_areas()
+            if not is_playing:
+                return LOADER_UPDATE_INTERVAL
 
-            for area, region in asset_browsers_areas_info:
-                area.tag_redraw()
+            # Wake up at the next frame boundary, late frames are dropped instead of delaying the playback
+            frame_interval = self._get_frame_interval()
+            elapsed = time.monotonic() - self.playback_start_time
+            next_frame_delay = frame_interval - (elapsed % frame_interval)
+            if self.preview_loader.is_idle():
+                return next_frame_delay
+            return min(next_frame_delay, LOADER_UPDATE_INTERVAL)
         except Exception as e:
             logging.error(e)
 
-        return 1/THUMBNAIL_FRAME_RATE
+        return None
+
+    def _redraw_areas(self):
+        for area_pointer, area in list(self._drawing_areas.items()):
+            try:
+                area.tag_redraw()
+            except ReferenceError:
+                # The area has been removed
+                del self._drawing_areas[area_pointer]
+
+    def _consume_loaded_previews(self):
+        """ Store the previews loaded in background in the cache and activate the selected one.
+
+            Previews are delivered level by level, each level replaces the lower resolution one.
+        """
+        while True:
+            try:
+                load_result = self.preview_loader.results.get(block=False)
+            except Empty:
+                return
+            cached_preview = self.preview_cache.get_preview(load_result.key)
+            if cached_preview is not None and cached_preview.frame_size >= load_result.preview.frame_size:
+                continue
+            if load_result.prefetched:
+                self.preview_cache.put_preview(load_result.key, load_result.preview, low_priority=True)
+                if load_result.key == self.active_preview_key:
+                    self._activate_cached_preview()
+                continue
+            # Drop the results of superseded requests
+            if load_result.request_id != self.active_request_id or load_result.key != self.active_preview_key:
+                continue
+            self.preview_cache.put_preview(load_result.key, load_result.preview)
+            self._activate_cached_preview()
+
+    def _activate_cached_preview(self) -> bool:
+        """ Activate the cached preview of the active selection.
+            The playback is restarted only when no preview was displayed, not when its resolution increases.
+
+        Returns:
+            bool: True if the preview was found in the cache
+        """
+        was_playing = self.active_thumbnail is not None
+        self.active_thumbnail, self.active_preview_texture = self.preview_cache.get_texture(self.active_preview_key)
+        if self.active_thumbnail is None:
+            return False
+        if not was_playing:
+            self.playback_start_time = time.monotonic()
+        return True
 
     def _clear_thumbnail_cache(self):
-        if self.active_thumbnail is not None:
-            del self.active_thumbnail.buffer
-            self.active_thumbnail = None
-        if self.active_preview_texture is not None:
-            del self.active_preview_texture
-            self.active_preview_texture = None
+        # The preview stays in the cache, only the active references are released
+        self.active_thumbnail = None
+        self.active_preview_texture = None
 
     def _is_cache_cleared(self):
         return self.active_thumbnail is None
@@ -121,17 +158,59 @@ class ASSET_AnimationPreviewPlayer:
         """
         # Begin cache update
         if self.active_selection is None:
+            self.preview_loader.cancel()
+            self.active_request_id = None
             return
 
         library_path = bpy.types.AssetHandle.get_full_library_path(self.active_selection)
-        threading.Thread(
-            target=thumbnail.load_thumbnail,
-            args=(
-                self.loaded_preview_queue,
+        self.active_preview_key = get_preview_key(self.active_selection.name, library_path)
+        # Previews cached at a low resolution level are displayed while their full resolution is loaded
+        if self._activate_cached_preview() and self.active_thumbnail.is_complete:
+            self.preview_loader.cancel()
+            self.active_request_id = None
+        else:
+            self.active_request_id = self.preview_loader.request(
+                self.active_preview_key,
                 self.active_selection.name,
                 library_path
-            ),
-        ).start()
+            )
+        self._prefetch_neighbour_previews(library_path)
+
+    def _get_listed_catalog_ids(self, params: bpy.types.FileAssetSelectParams) -> set[str]:
+        """ Get the ids of the catalogs whose assets are listed by the asset browser
+
+        Returns:
+            set[str]: The catalog ids, None when the assets of every catalog are listed
+        """
+        catalog_id = getattr(params, "catalog_id", "")
+        # The nil uuid is the "All" catalog
+        if not catalog_id.strip('0-'):
+            return None
+        asset_library = bpy.context.preferences.filepaths.asset_libraries.get(params.asset_library_ref)
+        if asset_library is None:
+            return {catalog_id}
+        return get_catalog_model(asset_library.path).get_catalog_tree_uuids(catalog_id)
+
+    def _prefetch_neighbour_previews(self, library_path: str):
+        """ Prefetch the previews of the assets displayed around the active selection.
+            The neighbour files are resolved in background, reading their catalogs may take a while.
+        """
+        params = bpy.context.space_data.params
+        sort_method = params.sort_method
+        sort_invert = getattr(params, "use_sort_invert", False)
+        catalog_ids = self._get_listed_catalog_ids(params)
+        cached_files = {key[0] for key in self.preview_cache.keys()}
+
+        def get_prefetched_files() -> list[str]:
+            neighbour_files = get_neighbour_asset_files(
+                library_path,
+                sort_method=sort_method,
+                sort_invert=sort_invert,
+                catalog_ids=catalog_ids,
+            )
+            return [filepath for filepath in neighbour_files if filepath not in cached_files]
+
+        self.preview_loader.prefetch_later(get_prefetched_files)
 
     def _draw_animation_preview(self):
         """ Draw the animation preview in the asset browser
@@ -140,12 +219,20 @@ class ASSET_AnimationPreviewPlayer:
 
         if selected_asset is None or get_asset_type(selected_asset) != AssetType.ANIMATION:
             self.active_selection = None
+            self.active_preview_key = None
+            if self.active_request_id is not None:
+                self.preview_loader.cancel()
+                self.active_request_id = None
             if not self._is_cache_cleared():
                 self._clear_thumbnail_cache()
             return
 
+        area = bpy.context.area
+        self._drawing_areas[area.as_pointer()] = area
+        self._last_draw_time = time.monotonic()
+        self._ensure_timer()
+
         if self.active_selection != selected_asset:
-            self.thumbnail_frame_current = 0
             self.active_selection = selected_asset
             self._clear_thumbnail_cache()
             self._generate_tumbnail_cache()
@@ -153,18 +240,23 @@ class ASSET_AnimationPreviewPlayer:
         if self.active_thumbnail is None or self.active_preview_texture is None:
             return
 
-        self.batch = batch_for_shader(
-            self.shader, 'TRI_FAN',
-            {
-                "pos": (
-                    (self.player_position[0], self.player_position[1]),
-                    (self.player_position[0]+thumbnail.THUMBNAIL_SIZE, self.player_position[1]),
-                    (self.player_position[0]+thumbnail.THUMBNAIL_SIZE, self.player_position[1]+thumbnail.THUMBNAIL_SIZE),
-                    (self.player_position[0], self.player_position[1]+thumbnail.THUMBNAIL_SIZE)),
-                "texCoord": self.active_frame_uvs,
-            },
-        )
+        if self.batch is None:
+            self.batch = create_quad_batch(get_spritesheet_shader(), thumbnail.THUMBNAIL_SIZE)
 
-        self.shader.bind()
-        self.shader.uniform_sampler("image", self.active_preview_texture)
-        self.batch.draw(self.shader)
\ No newline at end of file
+        region = bpy.context.region
+        player_position = (
+            region.width/2 - thumbnail.THUMBNAIL_SIZE/2,
+            region.height - thumbnail.THUMBNAIL_SIZE - PLAYER_MARGIN
+        )
+        frame_offset = thumbnail.get_frame_coordinates(
+            self._get_playback_frame() + self.active_thumbnail.frame_tile_offset,
+            self.active_thumbnail.frames_rows,
+            remap_to_range=(0, 1)
+        )
+        draw_spritesheet_frame(
+            self.batch,
+            self.active_preview_texture,
+            player_position,
+            frame_offset,
+            1/self.active_thumbnail.frames_rows
+        )
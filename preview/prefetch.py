@@ -0,0 +1,147 @@
+import logging
+import os
+import re
+from pathlib import Path
+
+from ..asset import blend_reader
+
+# Number of assets to prefetch before and after the active asset
+PREFETCH_NEIGHBOURS_COUNT = 2
+
+# Digit runs of the names, compared as numbers by the natural sort
+DIGITS_REGEX = re.compile(r'(\d+)')
+
+
+def get_natural_sort_key(name: str) -> tuple:
+    """ Get the key sorting names as the asset browser does (BLI_strcasecmp_natural): case insensitive, with the
+        digit runs compared as numbers, e.g. "walk_2" before "walk_10"
+
+    Args:
+        name (str): The name to sort
+
+    Returns:
+        tuple: The sort key, text and number parts alternating
+    """
+    parts = DIGITS_REGEX.split(name.lower())
+    parts[1::2] = [int(part) for part in parts[1::2]]
+    # Names only differing by case or leading zeros keep a stable order
+    return (parts, name)
+
+
+_SORT_KEYS = {
+    'FILE_SORT_ALPHA': lambda entry: get_natural_sort_key(entry.name),
+    'FILE_SORT_EXTENSION': lambda entry: get_natural_sort_key(entry.name),
+    'FILE_SORT_TIME': lambda entry: -entry.stat().st_mtime,
+    'FILE_SORT_SIZE': lambda entry: -entry.stat().st_size,
+}
+
+# Sorted asset files per library directory: {directory: (directory mtime, sort method, [file paths])}
+_sorted_library_files = {}
+# Catalog ids of the assets of each file: {file path: (file mtime, {catalog ids})}
+_files_catalog_ids = {}
+
+
+def _get_sorted_library_files(library_directory: str, sort_method: str) -> list[str]:
+    """ List the asset files of a library directory, in the asset browser sort order
+
+    Args:
+        library_directory (str): The library directory
+        sort_method (str): The asset browser sort method
+
+    Returns:
+        list[str]: The sorted asset file paths
+    """
+    directory_mtime = os.stat(library_directory).st_mtime
+    cached_files = _sorted_library_files.get(library_directory)
+    if cached_files is not None and cached_files[:2] == (directory_mtime, sort_method):
+        return cached_files[2]
+
+    with os.scandir(library_directory) as entries:
+        blend_entries = [entry for entry in entries if entry.is_file() and entry.name.endswith('.blend')]
+    blend_entries.sort(key=_SORT_KEYS.get(sort_method, _SORT_KEYS['FILE_SORT_ALPHA']))
+    files = [entry.path.replace('\\', '/') for entry in blend_entries]
+    _sorted_library_files[library_directory] = (directory_mtime, sort_method, files)
+    return files
+
+
+def _get_file_catalog_ids(asset_filepath: str) -> set[str]:
+    """ Get the catalog ids of the assets of a file, read without Blender
+
+    Returns:
+        set[str]: The catalog ids, empty if the file can't be read
+    """
+    try:
+        file_mtime = os.stat(asset_filepath).st_mtime
+    except OSError:
+        return set()
+    cached_catalog_ids = _files_catalog_ids.get(asset_filepath)
+    if cached_catalog_ids is not None and cached_catalog_ids[0] == file_mtime:
+        return cached_catalog_ids[1]
+
+    try:
+        catalog_ids = {asset.catalog_id for asset in blend_reader.read_asset_metadata(asset_filepath)}
+    except (OSError, blend_reader.BlendFileError) as e:
+        logging.error(f"Can't read the catalogs of {asset_filepath}: {e}")
+        catalog_ids = set()
+    _files_catalog_ids[asset_filepath] = (file_mtime, catalog_ids)
+    return catalog_ids
+
+
+def _get_next_files(files: list[str], catalog_ids: set[str], count: int) -> list[str]:
+    """ Get the first files of a list with an asset in one of the catalogs, all the catalogs if None
+    """
+    if catalog_ids is None:
+        return files[:count]
+    next_files = []
+    for filepath in files:
+        if len(next_files) == count:
+            break
+        if not catalog_ids.isdisjoint(_get_file_catalog_ids(filepath)):
+            next_files.append(filepath)
+    return next_files
+
+
+def get_neighbour_asset_files(
+        asset_filepath: str,
+        sort_method: str = 'FILE_SORT_ALPHA',
+        sort_invert: bool = False,
+        count: int = PREFETCH_NEIGHBOURS_COUNT,
+        catalog_ids: set[str] = None) -> list[str]:
+    """ Get the asset files displayed around an asset in the asset browser
+
+    Assets are published one per file, the neighbours are resolved from the library directory content. When the
+    asset browser only lists the assets of some catalogs, the catalogs of the files are read to skip the other ones.
+    Reads files, should not be called from the main thread.
+
+    Args:
+        asset_filepath (str): The file path of the active asset
+        sort_method (str, optional): The asset browser sort method. Defaults to 'FILE_SORT_ALPHA'.
+        sort_invert (bool, optional): Whether the sort order is inverted. Defaults to False.
+        count (int, optional): The number of neighbours on each side. Defaults to PREFETCH_NEIGHBOURS_COUNT.
+        catalog_ids (set[str], optional): The ids of the catalogs listed by the asset browser. Defaults to None,
+            listing every catalog.
+
+    Returns:
+        list[str]: The neighbour file paths, the closest ones first
+    """
+    asset_filepath = str(asset_filepath).replace('\\', '/')
+    library_directory = str(Path(asset_filepath).parent)
+    try:
+        files = _get_sorted_library_files(library_directory, sort_method)
+    except OSError:
+        return []
+    if sort_invert:
+        files = files[::-1]
+    if asset_filepath not in files:
+        return []
+
+    active_index = files.index(asset_filepath)
+    next_files = _get_next_files(files[active_index + 1:], catalog_ids, count)
+    previous_files = _get_next_files(files[active_index - 1::-1] if active_index else [], catalog_ids, count)
+    neighbours = []
+    for offset in range(count):
+        # Next asset first, browsing usually goes forward
+        for side_files in (next_files, previous_files):
+            if offset < len(side_files):
+                neighbours.append(side_files[offset])
+    return neighbours
@@ -0,0 +1,99 @@
+import gpu
+from gpu_extras.batch import batch_for_shader
+
+_SPRITESHEET_VERTEX_SOURCE = """
+void main()
+{
+    uv = frameOffset + texCoord * frameScale;
+    gl_Position = ModelViewProjectionMatrix * vec4(pos, 0.0, 1.0);
+}
+"""
+
+_SPRITESHEET_FRAGMENT_SOURCE = """
+void main()
+{
+    fragColor = texture(image, uv);
+}
+"""
+
+_spritesheet_shader = None
+
+
+def get_spritesheet_shader() -> gpu.types.GPUShader:
+    """ Get the shader drawing a single frame of a spritesheet, created on first use
+
+        Uniforms:
+            ModelViewProjectionMatrix (mat4): The drawing matrix
+            frameOffset (vec2): The UV coordinates of the frame in the spritesheet
+            frameScale (float): The UV size of a frame in the spritesheet
+            image (sampler2D): The spritesheet texture
+
+    Returns:
+        gpu.types.GPUShader: The spritesheet shader
+    """
+    global _spritesheet_shader
+    if _spritesheet_shader is None:
+        interface = gpu.types.GPUStageInterfaceInfo("animation_preview_interface")
+        interface.smooth('VEC2', "uv")
+
+        shader_info = gpu.types.GPUShaderCreateInfo()
+        shader_info.push_constant('MAT4', "ModelViewProjectionMatrix")
+        shader_info.push_constant('VEC2', "frameOffset")
+        shader_info.push_constant('FLOAT', "frameScale")
+        shader_info.sampler(0, 'FLOAT_2D', "image")
+        shader_info.vertex_in(0, 'VEC2', "pos")
+        shader_info.vertex_in(1, 'VEC2', "texCoord")
+        shader_info.vertex_out(interface)
+        shader_info.fragment_out(0, 'VEC4', "fragColor")
+        shader_info.vertex_source(_SPRITESHEET_VERTEX_SOURCE)
+        shader_info.fragment_source(_SPRITESHEET_FRAGMENT_SOURCE)
+        _spritesheet_shader = gpu.shader.create_from_info(shader_info)
+    return _spritesheet_shader
+
+
+def create_quad_batch(shader: gpu.types.GPUShader, size: float) -> gpu.types.GPUBatch:
+    """ Create a square batch, from the origin to (size, size), with unit texture coordinates
+
+    Args:
+        shader (gpu.types.GPUShader): The shader the batch is drawn with
+        size (float): The quad size
+
+    Returns:
+        gpu.types.GPUBatch: The quad batch
+    """
+    return batch_for_shader(
+        shader, 'TRI_FAN',
+        {
+            "pos": ((0, 0), (size, 0), (size, size), (0, size)),
+            "texCoord": ((0, 0), (1, 0), (1, 1), (0, 1)),
+        },
+    )
+
+
+def draw_spritesheet_frame(
+        batch: gpu.types.GPUBatch,
+        texture: gpu.types.GPUTexture,
+        position: tuple[float, float],
+        frame_offset: tuple[float, float],
+        frame_scale: float):
+    """ Draw a spritesheet frame with a quad batch created by `create_quad_batch`
+
+    Args:
+        batch (gpu.types.GPUBatch): The quad batch
+        texture (gpu.types.GPUTexture): The spritesheet texture
+        position (tuple[float, float]): The position of the quad in the region
+        frame_offset (tuple[float, float]): The UV coordinates of the frame in the spritesheet
+        frame_scale (float): The UV size of a frame in the spritesheet
+    """
+    shader = get_spritesheet_shader()
+    with gpu.matrix.push_pop():
+        gpu.matrix.translate(position)
+        shader.bind()
+        shader.uniform_float(
+            "ModelViewProjectionMatrix",
+            gpu.matrix.get_projection_matrix() @ gpu.matrix.get_model_view_matrix()
+        )
+        shader.uniform_float("frameOffset", frame_offset)
+        shader.uniform_float("frameScale", frame_scale)
+        shader.uniform_sampler("image", texture)
+        batch.draw(shader)
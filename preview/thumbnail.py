@@ -1,145 +1,504 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import re
 import bpy 
-import gpu
-from gpu_extras.batch import batch_for_shader
 import math
-from mathutils import Matrix
+import time
 import numpy
-import struct
-from queue import Queue
+
+from ..asset import blend_reader
+from .capture import ViewportCapture
+from .encoding import decode_delta_spritesheet, encode_delta_spritesheet, join_frames
 
 
 THUMBNAIL_NAME_REGEX = re.compile("(?P<asset_name>.+)_THUMBNAIL_(?P<frame_number>\d+)")
 THUMBNAIL_SIZE = 128
+# Animation previews are capped to a MAX_PREVIEW_ATLAS_SIZE² spritesheet, long animations are sampled with a stride
+MAX_PREVIEW_ATLAS_SIZE = 1024
+MAX_PREVIEW_FRAMES = (MAX_PREVIEW_ATLAS_SIZE // THUMBNAIL_SIZE) ** 2
+# Frame sizes of the lower resolution levels stored along the THUMBNAIL_SIZE animation preview
+PREVIEW_LEVELS_FRAME_SIZES = (32, 64)
+# Identifiers of the AnimationPreview enum properties, by the value stored in the .blend files
+STORED_PIXEL_FORMATS = ('FLOAT', 'RGBA8')
+STORED_ENCODINGS = ('RAW', 'DELTA')
 
 @dataclass
 class AnimationPreviewMetadata:
     """Dataclass to store loaded metadata of an animation preview.
     """
     asset_name: str
-    buffer: gpu.types.Buffer
+    buffer: numpy.ndarray
     frames_total: int
     frames_rows: int
+    library_path: str = ""
+    frame_stride: int = 1
+    frame_tile_offset: int = 0
+    frame_size: int = THUMBNAIL_SIZE
+    # Decoded resolution levels, by frame size. `buffer` is the largest one.
+    levels: dict[int, numpy.ndarray] = field(default_factory=dict)
+    is_complete: bool = True
+
+    @property
+    def image_width(self) -> int:
+        return self.frames_rows * self.frame_size
+
+    @property
+    def nbytes(self) -> int:
+        return sum(level.nbytes for level in self.levels.values()) or self.buffer.nbytes
+
+
+def _encode_preview_pixels(float_pixels: numpy.ndarray) -> numpy.ndarray:
+    """Encode float pixels to compact RGBA8 pixels.
+
+    Args:
+        float_pixels (numpy.ndarray): The pixels, as floats in the [0, 1] range
+
+    Returns:
+        numpy.ndarray: The pixels as uint8
+    """
+    return (numpy.clip(float_pixels, 0.0, 1.0) * 255.0 + 0.5).astype(numpy.uint8)
+
+
+def _decode_preview_buffer(
+        preview_buffer: bytes,
+        buffer_size: int,
+        pixel_format: str = 'RGBA8',
+        encoding: str = 'RAW') -> numpy.ndarray:
+    """Decode a stored spritesheet to compact RGBA8 pixels.
+
+    Args:
+        preview_buffer (bytes): The pixels stored in the asset
+        buffer_size (int): The number of channel values in the buffer, or of bytes for delta encoded buffers
+        pixel_format (str, optional): The stored pixel format, 'FLOAT' or 'RGBA8'. Defaults to 'RGBA8'.
+        encoding (str, optional): The buffer encoding, 'RAW' or 'DELTA'. Defaults to 'RAW'.
+
+    Returns:
+        numpy.ndarray: The spritesheet pixels as a flat uint8 array
+    """
+    if encoding == 'DELTA':
+        return decode_delta_spritesheet(preview_buffer[:buffer_size])
+    if pixel_format == 'RGBA8':
+        return numpy.frombuffer(preview_buffer, dtype=numpy.uint8, count=buffer_size)
+    return _encode_preview_pixels(numpy.frombuffer(preview_buffer, dtype=numpy.float32, count=buffer_size))
 
 
-def load_thumbnail(queue:Queue, asset_name, asset_path):
-    animation_preview_texture = None
-    if asset_path not in [None, ""]:
-        # Use temporary data to load the asset to avoid datablock linking persistence
-        with bpy.data.temp_data(filepath=asset_path) as tmp_data:
-            # Load asset data
-            with tmp_data.libraries.load(asset_path, link=False) as (data_from, data_to):
-                data_to.actions = data_from.actions
-            
+def get_sampling_stride(frame_count: int, max_frames: int = MAX_PREVIEW_FRAMES) -> int:
+    """Get the stride to sample an animation with, to fit the preview frames budget.
+
+    Args:
+        frame_count (int): The number of frames of the animation
+        max_frames (int, optional): The maximum number of preview frames. Defaults to MAX_PREVIEW_FRAMES.
+
+    Returns:
+        int: The sampling stride, 1 if every frame fits
+    """
+    return max(1, math.ceil(frame_count / max_frames))
+
+
+def downscale_spritesheet(
+        pixels: numpy.ndarray,
+        image_width: int,
+        frame_size: int,
+        source_frame_size: int = THUMBNAIL_SIZE) -> numpy.ndarray:
+    """Downscale a RGBA8 spritesheet with a box filter.
+
+    Args:
+        pixels (numpy.ndarray): The spritesheet pixels
+        image_width (int): The spritesheet width
+        frame_size (int): The downscaled frame size, a divisor of source_frame_size
+        source_frame_size (int, optional): The spritesheet frame size. Defaults to THUMBNAIL_SIZE.
+
+    Returns:
+        numpy.ndarray: The downscaled spritesheet pixels, shaped (width, width, 4)
+    """
+    factor = source_frame_size // frame_size
+    width = image_width // factor
+    blocks = pixels.reshape(width, factor, width, factor, 4)
+    return blocks.mean(axis=(1, 3), dtype=numpy.float32).round().astype(numpy.uint8)
+
+
+@dataclass
+class StoredPreviewLevel:
+    """Dataclass to store the raw pixels of an animation preview resolution level.
+    """
+    frame_size: int
+    preview_buffer: bytes
+    preview_buffer_size: int
+    pixel_format: str
+    encoding: str = 'RAW'
+
+
+@dataclass
+class StoredAnimationPreview:
+    """Dataclass to store the raw animation preview data read from an asset file.
+    """
+    asset_name: str
+    library_path: str
+    frames_total: int
+    frames_rows: int
+    frame_stride: int
+    # Resolution levels, sorted by increasing frame size
+    levels: list[StoredPreviewLevel]
+
+
+def read_animation_preview(asset_name: str, asset_path: str) -> StoredAnimationPreview:
+    """Read the raw animation preview stored in an asset file.
+
+    Must be called from the main thread, Blender data isn't thread-safe.
+
+    Args:
+        asset_name (str): The name of the asset action, None to read the first asset of the file
+        asset_path (str): The path of the .blend file containing the asset
+
+    Returns:
+        StoredAnimationPreview: The raw preview data, None if the asset has no preview
+    """
+    if asset_path in [None, ""]:
+        return None
+    # Use temporary data to load the asset to avoid datablock linking persistence
+    with bpy.data.temp_data(filepath=asset_path) as tmp_data:
+        # Load asset data
+        with tmp_data.libraries.load(asset_path, link=False) as (data_from, data_to):
+            data_to.actions = [name for name in data_from.actions if asset_name is None or name == asset_name]
+
+        if asset_name is None:
+            asset = next((action for action in tmp_data.actions if action.asset_data is not None), None)
+        else:
             asset = tmp_data.actions.get(asset_name)
-            anim_preview = asset.animation_preview
-            if anim_preview is not None:
-                buffer_data = gpu.types.Buffer(
-                    'FLOAT',
-                    anim_preview.preview_buffer_size,
-                    struct.unpack(
-                        f'{anim_preview.preview_buffer_size}f',
-                        asset.animation_preview.preview_buffer
-                    )
-                )
-                animation_preview_texture = buffer_data
-            if animation_preview_texture is not None:
-                queue.put(
-                    AnimationPreviewMetadata(
-                        asset_name=asset_name,
-                        buffer=animation_preview_texture,
-                        frames_total=anim_preview.frames_total,
-                        frames_rows=anim_preview.frames_rows
-                    ),
-                    block=False
-                )
+        if asset is None or asset.animation_preview.preview_buffer_size == 0:
+            return None
+        anim_preview = asset.animation_preview
+        levels = [
+            StoredPreviewLevel(
+                frame_size=level.frame_size,
+                preview_buffer=bytes(level.preview_buffer),
+                preview_buffer_size=level.preview_buffer_size,
+                pixel_format='RGBA8',
+                encoding=level.encoding,
+            )
+            for level in anim_preview.levels
+        ]
+        levels.append(
+            StoredPreviewLevel(
+                frame_size=anim_preview.frame_size,
+                preview_buffer=bytes(anim_preview.preview_buffer),
+                preview_buffer_size=anim_preview.preview_buffer_size,
+                pixel_format=anim_preview.pixel_format,
+                encoding=anim_preview.encoding,
+            )
+        )
+        return StoredAnimationPreview(
+            asset_name=asset.name,
+            library_path=asset_path,
+            frames_total=anim_preview.frames_total,
+            frames_rows=anim_preview.frames_rows,
+            frame_stride=anim_preview.frame_stride,
+            levels=sorted(levels, key=lambda level: level.frame_size),
+        )
     #TODO: Put default image
 
+
+def read_animation_preview_file(asset_name: str, asset_path: str) -> StoredAnimationPreview:
+    """Read the raw animation preview stored in an asset file, without Blender.
+
+    Safe to call from any thread. The `animation_preview` properties are read as custom properties of the action,
+    the unset ones having the defaults of the AnimationPreview property group.
+
+    Args:
+        asset_name (str): The name of the asset action, None to read the first asset of the file
+        asset_path (str): The path of the .blend file containing the asset
+
+    Raises:
+        blend_reader.BlendFileError: If the file can't be read without Blender, e.g. zstd compressed without the
+            zstandard module
+
+    Returns:
+        StoredAnimationPreview: The raw preview data, None if the asset has no preview
+    """
+    if asset_path in [None, ""]:
+        return None
+    with blend_reader.BlendFile(asset_path) as blend_file:
+        if asset_name is None:
+            asset_block = next(
+                (
+                    id_block for id_block in blend_file.iter_id_blocks()
+                    if id_block.code[:2] == b'AC' and blend_file.is_asset(id_block)
+                ),
+                None
+            )
+        else:
+            asset_block = blend_file.find_id_block(b'AC', asset_name)
+        if asset_block is None:
+            return None
+        anim_preview = blend_file.read_id_properties(asset_block).get('animation_preview') or {}
+        if not anim_preview.get('preview_buffer_size'):
+            return None
+        levels = [
+            StoredPreviewLevel(
+                frame_size=level.get('frame_size', 32),
+                preview_buffer=level.get('preview_buffer') or b"",
+                preview_buffer_size=level.get('preview_buffer_size', 0),
+                pixel_format='RGBA8',
+                encoding=STORED_ENCODINGS[level.get('encoding', 0)],
+            )
+            for level in anim_preview.get('levels') or []
+        ]
+        levels.append(
+            StoredPreviewLevel(
+                frame_size=anim_preview.get('frame_size', THUMBNAIL_SIZE),
+                preview_buffer=anim_preview.get('preview_buffer') or b"",
+                preview_buffer_size=anim_preview['preview_buffer_size'],
+                pixel_format=STORED_PIXEL_FORMATS[anim_preview.get('pixel_format', 0)],
+                encoding=STORED_ENCODINGS[anim_preview.get('encoding', 0)],
+            )
+        )
+        return StoredAnimationPreview(
+            asset_name=blend_file.read_id_name(asset_block),
+            library_path=asset_path,
+            frames_total=anim_preview.get('frames_total', 0),
+            frames_rows=anim_preview.get('frames_rows', 0),
+            frame_stride=anim_preview.get('frame_stride', 1),
+            levels=sorted(levels, key=lambda level: level.frame_size),
+        )
+
+
+def decode_animation_preview(stored_preview: StoredAnimationPreview):
+    """Decode a raw animation preview progressively, safe to call from any thread.
+
+    The resolution levels are decoded from the smallest to the largest one.
+
+    Args:
+        stored_preview (StoredAnimationPreview): The raw preview read from the asset file
+
+    Yields:
+        AnimationPreviewMetadata: The decoded preview, each time a resolution level is decoded
+    """
+    # Legacy float spritesheets were written one tile late
+    frame_tile_offset = -1 if stored_preview.levels[-1].pixel_format == 'FLOAT' else 0
+    levels = {}
+    for level_index, level in enumerate(stored_preview.levels):
+        levels[level.frame_size] = _decode_preview_buffer(
+            level.preview_buffer,
+            level.preview_buffer_size,
+            level.pixel_format,
+            level.encoding
+        )
+        is_last_level = level_index == len(stored_preview.levels) - 1
+        yield AnimationPreviewMetadata(
+            asset_name=stored_preview.asset_name,
+            buffer=levels[level.frame_size],
+            frames_total=stored_preview.frames_total,
+            frames_rows=stored_preview.frames_rows,
+            library_path=stored_preview.library_path,
+            frame_stride=stored_preview.frame_stride,
+            frame_tile_offset=frame_tile_offset,
+            frame_size=level.frame_size,
+            levels=dict(levels),
+            is_complete=is_last_level,
+        )
+
+
+class AnimationPreviewCapture:
+    """Capture the frames of an animation preview over several calls, keeping the UI responsive in between.
+
+    Long animations are sampled with a stride so the spritesheet fits in MAX_PREVIEW_ATLAS_SIZE.
+    The capture must be finished with `finish`, or released with `free` when cancelled.
+    Frames are captured from the viewport, unless another frame capture (such as a `RenderCapture`) is given.
+    """
+    def __init__(
+            self,
+            frame_range: tuple[int, int] = (1, 50),
+            encoding: str = 'RAW',
+            frame_capture=None):
+        self.encoding = encoding
+        self.frame_stride = get_sampling_stride(frame_range[1]-frame_range[0])
+        self.sampled_frames = range(frame_range[0], frame_range[1], self.frame_stride)
+        self.frames_rows = math.ceil(math.sqrt(len(self.sampled_frames)))
+        self.frames_captured = 0
+        # Frames are captured at the thumbnail size and assembled in the spritesheet on the CPU
+        self._frames = numpy.zeros(
+            (self.frames_rows*self.frames_rows, THUMBNAIL_SIZE, THUMBNAIL_SIZE, 4),
+            dtype=numpy.uint8
+        )
+        self._last_frame_pixels = None
+        self._frame_capture = frame_capture or ViewportCapture(THUMBNAIL_SIZE)
+
+    @property
+    def frames_total(self) -> int:
+        return len(self.sampled_frames)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.frames_captured >= self.frames_total
+
+    def capture(self, context: bpy.types.Context, time_budget: float = None) -> bool:
+        """Capture the next frames, until every frame is captured or the time budget is spent.
+
+        Args:
+            context (bpy.types.Context): The context to capture the viewport from
+            time_budget (float, optional): The time (in seconds) after which no new frame is captured.
+                Defaults to None, capturing every remaining frame.
+
+        Returns:
+            bool: True if every frame has been captured
+        """
+        start_time = time.monotonic()
+        while not self.is_finished:
+            context.scene.frame_current = self.sampled_frames[self.frames_captured]
+            self._last_frame_pixels = self._frame_capture.capture(context)
+            self._frames[self.frames_captured] = _encode_preview_pixels(self._last_frame_pixels)
+            self.frames_captured += 1
+            if time_budget is not None and time.monotonic() - start_time >= time_budget:
+                break
+        return self.is_finished
+
+    def finish(self) -> tuple[StoredAnimationPreview, numpy.ndarray]:
+        """Encode the captured frames as an animation preview
+
+        Returns:
+            tuple[StoredAnimationPreview, numpy.ndarray]: The encoded preview, and the float pixels of the last captured
+                frame (None if no frame was captured)
+        """
+        self.free()
+        spritesheet_pixels = join_frames(self._frames, self.frames_rows, THUMBNAIL_SIZE)
+        canvas_width = THUMBNAIL_SIZE*self.frames_rows
+
+        # The lower resolution levels are loaded first by the player
+        levels = [
+            _encode_preview_level(
+                downscale_spritesheet(spritesheet_pixels, canvas_width, frame_size),
+                self.frames_captured,
+                self.frames_rows,
+                frame_size,
+                self.encoding
+            )
+            for frame_size in PREVIEW_LEVELS_FRAME_SIZES
+        ]
+        levels.append(
+            _encode_preview_level(
+                spritesheet_pixels,
+                self.frames_captured,
+                self.frames_rows,
+                THUMBNAIL_SIZE,
+                self.encoding
+            )
+        )
+        captured_preview = StoredAnimationPreview(
+            asset_name=None,
+            library_path="",
+            frames_total=self.frames_captured,
+            frames_rows=self.frames_rows,
+            frame_stride=self.frame_stride,
+            levels=levels,
+        )
+        # The last captured frame is the current scene frame, reused as the still preview
+        still_pixels = self._last_frame_pixels.ravel() if self._last_frame_pixels is not None else None
+        return captured_preview, still_pixels
+
+    def free(self):
+        self._frame_capture.free()
+
+
+def capture_animation_preview(
+        context: bpy.types.Context,
+        frame_range: tuple[int, int] = (1, 50),
+        encoding: str = 'RAW',
+    ) -> tuple[StoredAnimationPreview, numpy.ndarray]:
+    """Capture the viewport over a frame range and encode it as an animation preview.
+
+    The captured preview can be stored in several assets with `store_animation_preview`.
+
+    Args:
+        context (bpy.types.Context): The context to capture the viewport from
+        frame_range (tuple[int, int], optional): The range of frames to capture. Defaults to (1, 50).
+        encoding (str, optional): The preview buffer encoding, 'RAW' or 'DELTA'. Defaults to 'RAW'.
+
+    Returns:
+        tuple[StoredAnimationPreview, numpy.ndarray]: The encoded preview, and the float pixels of the last captured
+            frame (None if no frame was captured)
+    """
+    preview_capture = AnimationPreviewCapture(frame_range, encoding)
+    try:
+        preview_capture.capture(context)
+    finally:
+        preview_capture.free()
+    return preview_capture.finish()
+
+
+def store_animation_preview(asset: bpy.types.ID, stored_preview: StoredAnimationPreview):
+    """Store an encoded animation preview in an asset.
+
+    Args:
+        asset (bpy.types.ID): The asset to store the preview in
+        stored_preview (StoredAnimationPreview): The preview, as returned by `capture_animation_preview`
+    """
+    anim_preview = asset.animation_preview
+    *lower_levels, full_level = stored_preview.levels
+    _write_preview_level(anim_preview, full_level)
+    anim_preview.pixel_format = full_level.pixel_format
+    anim_preview.frame_size = full_level.frame_size
+    anim_preview.frames_total = stored_preview.frames_total
+    anim_preview.frames_rows = stored_preview.frames_rows
+    anim_preview.frame_stride = stored_preview.frame_stride
+
+    anim_preview.levels.clear()
+    for level in lower_levels:
+        preview_level = anim_preview.levels.add()
+        preview_level.frame_size = level.frame_size
+        _write_preview_level(preview_level, level)
+
+
 def asset_generate_animation_preview(
         asset: bpy.types.ID,
         context: bpy.types.Context,
         frame_range: tuple[int, int] = (1, 50),
+        encoding: str = 'RAW',
     ):
-    """Capture the viewport and store it in the image buffer.
+    """Capture the viewport and store it in the asset animation preview.
 
     Args:
+        asset (bpy.types.ID): The asset to generate the preview for
         context (bpy.types.Context): The context to capture the viewport from
-        framebuffer_image (bpy.types.Image): The image buffer to store the captured viewport
         frame_range (tuple[int, int], optional): The range of frames to capture. Defaults to (1, 50).
+        encoding (str, optional): The preview buffer encoding, 'RAW' or 'DELTA'. Defaults to 'RAW'.
 
     Returns:
-        bpy.types.Image: The image buffer containing the captured animation
+        numpy.ndarray: The float pixels of the last captured frame, None if no frame was captured
+    """
+    captured_preview, still_pixels = capture_animation_preview(context, frame_range, encoding)
+    store_animation_preview(asset, captured_preview)
+    return still_pixels
+
+
+def _encode_preview_level(
+        pixels: numpy.ndarray,
+        frames_total: int,
+        frames_rows: int,
+        frame_size: int,
+        encoding: str) -> StoredPreviewLevel:
+    """Encode RGBA8 spritesheet pixels with the given encoding.
     """
-    # Create thumbnail image 
-    frame_count = frame_range[1]-frame_range[0]
-    frame_in_row = math.ceil(math.sqrt(frame_count))
-    image_width = THUMBNAIL_SIZE*frame_in_row
-    
-    # Check if the total number of frames has changed
-    width = height = THUMBNAIL_SIZE
-    canvas_width = canvas_height = image_width
-
-    preview_spritesheet = gpu.types.GPUOffScreen(
-        canvas_width,
-        canvas_height
+    if encoding == 'DELTA':
+        preview_buffer = encode_delta_spritesheet(pixels, frames_total, frames_rows, frame_size)
+        preview_buffer_size = len(preview_buffer)
+    else:
+        preview_buffer = pixels.tobytes()
+        preview_buffer_size = pixels.size
+    return StoredPreviewLevel(
+        frame_size=frame_size,
+        preview_buffer=preview_buffer,
+        preview_buffer_size=preview_buffer_size,
+        pixel_format='RGBA8',
+        encoding=encoding,
     )
-    img_size = 2/frame_in_row
-    shader = gpu.shader.from_builtin('IMAGE')
-
-    for frame in range(frame_range[0], frame_range[1]):
-        remaped_frame = numpy.interp(frame, [frame_range[0], frame_range[1]], [0, frame_count])
-        bpy.context.scene.frame_current= frame
-        capture = _capture_viewport(context)
-        captured_viewport = gpu.types.GPUTexture((width, height), data=capture)
-        x, y = get_frame_coordinates(
-            remaped_frame-1,
-            frame_in_row,
-            remap_to_range=(-1, 1)
-        )
-        pos = (
-            (x, y), 
-            (x+img_size, y), 
-            (x+img_size, y+img_size), 
-            (x, y+img_size)
-        )
 
-        #  Render the frame to the spritesheet
-        with preview_spritesheet.bind():
-            # Optionnally set scissor test
-            # gpu.state.scissor_test_set(True)
-            # gpu.state.scissor_set(0,0, 128, 128)
-
-            fb = gpu.state.active_framebuffer_get()
-            
-            with gpu.matrix.push_pop():
-                # reset matrices -> use normalized device coordinates [-1, 1]
-                gpu.matrix.load_matrix(Matrix.Identity(4))
-                gpu.matrix.load_projection_matrix(Matrix.Identity(4))
-                
-                
-                batch = batch_for_shader(
-                    shader, 'TRI_FAN',
-                    {
-                        "pos": pos,
-                        "texCoord": ((0, 0), (1, 0), (1, 1), (0, 1)),
-                    },
-                )
-                shader.uniform_sampler("image", captured_viewport)
-                batch.draw(shader)
-
-    with preview_spritesheet.bind():
-        pixelBuffer = fb.read_color(0, 0, canvas_width, canvas_height, 4, 0, 'FLOAT')
-        buffer_dimension = canvas_width * canvas_height * 4
-        pixelBuffer.dimensions = buffer_dimension
-
-        # export result        
-        asset.animation_preview.preview_buffer = struct.pack(f'{buffer_dimension}f', *pixelBuffer)
-        asset.animation_preview.preview_buffer_size = buffer_dimension
-        asset.animation_preview.frames_total = frame_count
-        asset.animation_preview.frames_rows = frame_in_row
-        asset.animation_preview.frame_size = THUMBNAIL_SIZE
- 
+
+def _write_preview_level(preview_level: bpy.types.PropertyGroup, level: StoredPreviewLevel):
+    """Write an encoded level in an animation preview, or one of its levels.
+    """
+    preview_level.preview_buffer = level.preview_buffer
+    preview_level.preview_buffer_size = level.preview_buffer_size
+    preview_level.encoding = level.encoding
+
 
 def get_frame_coordinates(
         frame:int, 
@@ -169,96 +528,38 @@ def get_frame_coordinates(
     return row, col
 
 
-def _capture_viewport(
+def capture_preview(
         context: bpy.types.Context,
     ):
-    """Capture the viewport and store it in the asset preview.
+    """Capture the viewport at the thumbnail size.
 
     Args:
         context (bpy.types.Context): The context to capture the viewport from
-        asset_name (str): The name of the asset to generate the preview for
+
+    Returns:
+        numpy.ndarray: The captured pixels, as a flat float array
     """
-    preview_with = THUMBNAIL_SIZE
-    preview_height = THUMBNAIL_SIZE
-    preview_buffer_dimensions = preview_with * preview_height * 4
-    preview_offscreen_render = gpu.types.GPUOffScreen(preview_with, preview_height)
-    # Setup Render Buffer
-    viewport_render_width = bpy.context.scene.render.resolution_x
-    viewport_render_height = bpy.context.scene.render.resolution_y
-    viewport_render = gpu.types.GPUOffScreen(viewport_render_width, viewport_render_height)
-
-    with viewport_render.bind():
-        fb = gpu.state.active_framebuffer_get()
-        scene = context.scene
-        view_matrix = scene.camera.matrix_world.inverted()
-        projection_matrix = scene.camera.calc_matrix_camera(
-            context.evaluated_depsgraph_get(),
-            x=viewport_render_width,
-            y=viewport_render_height,
-            scale_x=1.0,
-            scale_y=1.0)
-
-        # Another possibility to get the view matrix and projection matrix
-        # space3d.region_3d.view_matrix,
-        # space3d.region_3d.window_matrix,
-
-        fb.clear(color=(1.0, 0.0, 0.0, 1.0))
-        viewport_render.draw_view3d(
-            scene,
-            context.view_layer,
-            context.space_data,
-            context.region,
-            view_matrix,
-            projection_matrix,
-            do_color_management=True,
-            draw_background=True)
-
-        # Read the pixels from the render buffer
-        viewport_render_buffer = fb.read_color(
-            int((viewport_render_width-viewport_render_height)/2), 0, 
-            viewport_render_height, viewport_render_height, 
-            4, 
-            0,
-            'FLOAT'
-        )
-    
-    viewport_render.free()
-    viewport_render_buffer.dimensions = viewport_render_height * viewport_render_height * 4
-    render_texture = gpu.types.GPUTexture((viewport_render_height, viewport_render_height), data=viewport_render_buffer)
-
-    with preview_offscreen_render.bind():
-        fb = gpu.state.active_framebuffer_get()
-        with gpu.matrix.push_pop():
-            gpu.matrix.load_matrix(Matrix.Identity(4))
-            gpu.matrix.load_projection_matrix(Matrix.Identity(4))
-            shader = gpu.shader.from_builtin('IMAGE')
-            batch = batch_for_shader(
-                shader, 'TRI_FAN',
-                {
-                    "pos": ((-1, -1), (1, -1), (1, 1), (-1, 1)),
-                    "texCoord": ((0, 0), (1, 0), (1, 1), (0, 1)),
-                },
-            )
-            shader.uniform_sampler("image", render_texture)
-            batch.draw(shader)
-            
-            # Read the pixels from the render buffer
-            pixelBuffer = fb.read_color(0, 0, preview_with, preview_height, 4, 0, 'FLOAT')
-    
-    preview_offscreen_render.free()
-    pixelBuffer.dimensions = preview_buffer_dimensions
-
-    return pixelBuffer            
-            
+    with ViewportCapture(THUMBNAIL_SIZE) as viewport_capture:
+        return viewport_capture.capture(context).ravel()
+
 
 def asset_generate_preview(
         asset: bpy.types.ID,
         context: bpy.types.Context,
+        preview_pixels: numpy.ndarray = None,
     ):
+    """Store the still preview of an asset, capturing the viewport unless pixels are given.
+
+    Args:
+        asset (bpy.types.ID): The asset to generate the preview for
+        context (bpy.types.Context): The context to capture the viewport from
+        preview_pixels (numpy.ndarray, optional): Already captured float pixels. Defaults to None.
+    """
     # Setup ID Preview
     preview = asset.preview_ensure()
     preview.image_size = (THUMBNAIL_SIZE, THUMBNAIL_SIZE)
-    preview_pixels = _capture_viewport(context)
+    if preview_pixels is None:
+        preview_pixels = capture_preview(context)
 
     # Save the image buffer back to the ID preview
     preview.image_pixels_float[:] = preview_pixels
\ No newline at end of file
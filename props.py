@@ -1,7 +1,7 @@
 import bpy
 from bpy.app.handlers import persistent
 
-from .catalog.catalog_parser import parse_library_catalogs
+from .catalog.catalog_parser import search_catalog_paths
 from .prefs import get_preferences
 
 
@@ -40,8 +40,9 @@ def _stamp_asset_type_as_tag(self, context):
 def _get_catalogs_paths(self, context, edit_text):
     asset_library_ref = context.area.spaces.active.params.asset_library_ref
     library_path = context.preferences.filepaths.asset_libraries.get(asset_library_ref).path
-    catalogs_path =  [ catalog['path'] for catalog in parse_library_catalogs(library_path)]
-    catalogs_path.append(edit_text)
+    catalogs_path = search_catalog_paths(library_path, edit_text)
+    if edit_text not in catalogs_path:
+        catalogs_path.append(edit_text)
     return catalogs_path
 
 
@@ -81,6 +82,11 @@ class NewAssetMetadata(bpy.types.PropertyGroup):
         name="Generate preview",
         default=True
     ) # type: ignore
+    isolate_preview: bpy.props.BoolProperty(
+        name="Isolate preview",
+        description="Only evaluate and draw the selected armatures and their dependencies in the preview",
+        default=True
+    ) # type: ignore
 
 
 class EditedAssetMetadata(bpy.types.PropertyGroup):
@@ -99,6 +105,48 @@ class EditedAssetMetadata(bpy.types.PropertyGroup):
     active_tag_index: bpy.props.IntProperty() # type: ignore
 
 
+class BatchEditedAssetMetadata(bpy.types.PropertyGroup):
+    catalog: bpy.props.StringProperty(
+        name="Catalog",
+        description="Catalog to move the selected assets to, unchanged if empty",
+        default="",
+        search=_get_catalogs_paths,
+    ) # type: ignore
+    add_tags: bpy.props.StringProperty(
+        name="Add tags",
+        description="Comma separated tags to add to the selected assets",
+        default="",
+    ) # type: ignore
+    remove_tags: bpy.props.StringProperty(
+        name="Remove tags",
+        description="Comma separated tags to remove from the selected assets",
+        default="",
+    ) # type: ignore
+
+
+class AnimationPreviewLevel(bpy.types.PropertyGroup):
+    preview_buffer: bpy.props.StringProperty(
+        name="Animation preview level",
+        subtype='BYTE_STRING',
+    ) # type: ignore
+    preview_buffer_size: bpy.props.IntProperty(
+        name="Animation preview level buffer size",
+        default=0
+    ) # type: ignore
+    frame_size: bpy.props.IntProperty(
+        name="Frame pixel size",
+        default=32
+    ) # type: ignore
+    encoding: bpy.props.EnumProperty(
+        name="Preview buffer encoding",
+        items=[
+            ("RAW", "Raw", "Every frame is stored"),
+            ("DELTA", "Delta", "A keyframe and the tiles changed in each frame are stored"),
+        ],
+        default="RAW"
+    ) # type: ignore
+
+
 class AnimationPreview(bpy.types.PropertyGroup):
     preview_buffer: bpy.props.StringProperty(
         name="Animation preview",
@@ -120,6 +168,31 @@ class AnimationPreview(bpy.types.PropertyGroup):
         name="Frame pixel size",
         default=128
     ) # type: ignore
+    frame_stride: bpy.props.IntProperty(
+        name="Animation frames between two preview frames",
+        default=1,
+        min=1
+    ) # type: ignore
+    pixel_format: bpy.props.EnumProperty(
+        name="Preview buffer pixel format",
+        items=[
+            ("FLOAT", "Float", "RGBA float pixels"),
+            ("RGBA8", "RGBA8", "RGBA 8 bits pixels"),
+        ],
+        default="FLOAT"
+    ) # type: ignore
+    encoding: bpy.props.EnumProperty(
+        name="Preview buffer encoding",
+        items=[
+            ("RAW", "Raw", "Every frame is stored"),
+            ("DELTA", "Delta", "A keyframe and the tiles changed in each frame are stored"),
+        ],
+        default="RAW"
+    ) # type: ignore
+    levels: bpy.props.CollectionProperty(
+        type=AnimationPreviewLevel,
+        name="Lower resolution levels of the preview, RGBA8 pixels",
+    ) # type: ignore
 
 
 @persistent
@@ -138,6 +211,8 @@ CLASSES = (
     AssetPredefinedTags,
     NewAssetMetadata,
     EditedAssetMetadata,
+    BatchEditedAssetMetadata,
+    AnimationPreviewLevel,
     AnimationPreview
 )
 
@@ -153,6 +228,7 @@ def register():
     )
     bpy.types.WindowManager.new_asset_metadata = bpy.props.PointerProperty(type=NewAssetMetadata)
     bpy.types.WindowManager.edited_asset_metadata = bpy.props.PointerProperty(type=EditedAssetMetadata)
+    bpy.types.WindowManager.batch_edited_asset_metadata = bpy.props.PointerProperty(type=BatchEditedAssetMetadata)
     bpy.app.handlers.load_post.append(initialize_asset_metadata)
     bpy.types.Action.animation_preview = bpy.props.PointerProperty(
         type=AnimationPreview,
@@ -165,6 +241,7 @@ def unregister():
     del bpy.types.WindowManager.asset_tags
     del bpy.types.WindowManager.new_asset_metadata
     del bpy.types.WindowManager.edited_asset_metadata
+    del bpy.types.WindowManager.batch_edited_asset_metadata
     del bpy.types.Action.animation_preview
     for cls in CLASSES:
         bpy.utils.unregister_class(cls)
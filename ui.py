@@ -5,7 +5,10 @@ from bpy_extras import asset_utils
 
 from .asset.asset_file_info import get_created_date
 from .asset.asset_type import AssetType, get_asset_type
+from .asset.edit_queue import asset_edit_queue
+from .editor.user import is_super_user
 from .ops import (ASSETLIB_OP_AddAssetPredefinedTag, ASSETLIB_OP_ApplyAsset,
+                  ASSETLIB_OP_BatchEditAssetsMetadata, ASSETLIB_OP_CompactCatalog,
                   ASSETLIB_OP_CreateAsset, ASSETLIB_OP_EditActiveAssetMetadata,
                   ASSETLIB_OP_RemoveAssetTag, display_apply_warning,
                   display_no_rights_file_warning)
@@ -79,6 +82,16 @@ class ASSETBROWSER_PT_infos(asset_utils.AssetBrowserPanel, bpy.types.Panel):
         if is_animation_asset and preview_player_registered:
             layout.separator(factor=23.0)
 
+        # Progress of the edits saved in background
+        if asset_edit_queue.pending_jobs:
+            message_box = layout.box()
+            for job in asset_edit_queue.pending_jobs:
+                message_box.label(text=f"{job.description}: saving...", icon='SORTTIME')
+        elif asset_edit_queue.last_errors:
+            message_box = layout.box()
+            for error in asset_edit_queue.last_errors:
+                message_box.label(text=error, icon='ERROR')
+
         if asset_file_handle is None:
             layout.label(text="No active asset", icon='INFO')
             return
@@ -127,8 +140,6 @@ class ASSETBROWSER_PT_infos(asset_utils.AssetBrowserPanel, bpy.types.Panel):
             rm_tag_op.active_tag_index = asset_edited_data.active_tag_index
 
             layout.separator()
-            message_box = layout.box()
-            message_box.label(text="After saving, refresh to see any changes", icon='QUESTION')
             row = layout.row()
             confirm_op = row.operator(ASSETLIB_OP_EditActiveAssetMetadata.bl_idname, icon='FILE_TICK', text="Save")
             confirm_op.commit_changes = True
@@ -177,6 +188,9 @@ class ASSETBROWSER_PT_infos(asset_utils.AssetBrowserPanel, bpy.types.Panel):
             layout.separator()
             row = layout.row()
             row.operator(ASSETLIB_OP_EditActiveAssetMetadata.bl_idname, icon='GREASEPENCIL')
+            if context.selected_asset_files and len(context.selected_asset_files) > 1:
+                row = layout.row()
+                row.operator(ASSETLIB_OP_BatchEditAssetsMetadata.bl_idname, icon='DOCUMENTS')
 
 
 class OBJECT_PT_QuickAssetCreationPanel(bpy.types.Panel):
@@ -205,6 +219,10 @@ class OBJECT_PT_QuickAssetCreationPanel(bpy.types.Panel):
             row.label(text="Render preview:")
             row.prop(metadatas, "generate_preview", text="")
             row = layout.row(align=True)
+            row.enabled = metadatas.generate_preview
+            row.label(text="Isolate armatures:")
+            row.prop(metadatas, "isolate_preview", text="")
+            row = layout.row(align=True)
             row.label(text="Frame range:")
             row.prop(metadatas, "range_start")
             row.prop(metadatas, "range_end")
@@ -288,6 +306,27 @@ class OBJECT_PT_RemoveAssetPanel(bpy.types.Panel):
         )
 
 
+class OBJECT_PT_LibraryMaintenancePanel(bpy.types.Panel):
+    bl_space_type = 'FILE_BROWSER'
+    bl_region_type = 'TOOLS'
+    bl_category = "Animation"
+    bl_label = "Library"
+
+    @classmethod
+    def poll(cls, context):
+        space_data = context.space_data
+        # can be None when save/reload with a file selector open
+        if space_data.params is None:
+            return False
+        if not (space_data.type == 'FILE_BROWSER' and space_data.browse_mode == 'ASSETS'):
+            return False
+        # Only the super users maintain the library
+        return is_super_user()
+
+    def draw(self, context):
+        self.layout.operator(ASSETLIB_OP_CompactCatalog.bl_idname, icon="SORTALPHA")
+
+
 class AssetBrowserUIOverrideState(AppOverrideState):
     """ A class to store UI overrides
     """
@@ -315,6 +354,7 @@ class AssetBrowserUIOverrideState(AppOverrideState):
                     "OBJECT_PT_QuickAssetCreationPanel",
                     "OBJECT_PT_QuickAssetLoadPanel",
                     "OBJECT_PT_RemoveAssetPanel",
+                    "OBJECT_PT_LibraryMaintenancePanel",
                     "FILEBROWSER_PT_bookmarks_volumes",
                     "FILEBROWSER_PT_bookmarks_system",
                     "FILEBROWSER_PT_directory_path",
@@ -334,6 +374,7 @@ classes = (
     OBJECT_PT_QuickAssetCreationPanel,
     OBJECT_PT_QuickAssetLoadPanel,
     OBJECT_PT_RemoveAssetPanel,
+    OBJECT_PT_LibraryMaintenancePanel,
     ASSETBROWSER_PT_infos,
 )
 